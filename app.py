@@ -2,80 +2,31 @@ import json
 import io
 import os
 import random
-import tempfile
+from datetime import date, timedelta
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from prompt import generate_schedule, parse_response
+import metrics
+from cache import cached_generate_schedule, content_hash, get_schedule_cache, memoize, schedule_key, stage_stats
+from prompt import ParseError, ScheduleStream, build_prompt, count_tokens, parse_schedule, score_schedule, token_report
+from render import get_render_worker, week_zip
+from editor import ScheduleEditor
+from export import assignments_to_csv
+from matrix import ScheduleMatrix
+from repair import repair_schedule
+from roster import parse_uploaded_file, roster_sheets
+from roster_store import RosterStore, monday
+from rules import SLOTS, validate_constraints
 from supabase_client import push_schedule, load_schedule
+from timeline import TIMELINE_STYLE, TIMELINE_WIDTH, timeline_body
+from transport import call_usage, track_calls
+from week import DAYS, iter_days
 
 # --- Data loading helpers ---
 
-SHIFT_TIME_MAP = {
-    "shift_1": {"start_time": "07:00", "end_time": "15:00"},
-    "shift_2": {"start_time": "13:00", "end_time": "21:00"},
-    "shift_3": {"start_time": "15:00", "end_time": "23:00"},
-}
-
-DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-
-TASK_COLORS = {
-    "Floor": "#6C9BD2",
-    "Outdoor": "#7BC67E",
-    "Restroom": "#E8A87C",
-    "Egress": "#D4A5D0",
-    "BOH": "#F0C75E",
-    "Float": "#85E0E0",
-    "Break": "#CCCCCC",
-}
-
-TIME_SLOTS = ["07:00", "08:00", "09:00", "10:00", "11:00", "12:00", "13:00", "14:00", "15:00", "16:00", "17:00", "18:00", "19:00", "20:00", "21:00", "22:00"]
-
-
-def normalize_shift(value):
-    if pd.isna(value):
-        return None
-    value = str(value).strip().lower()
-    if value == "off":
-        return None
-    if "7.00" in value or "07" in value:
-        return "shift_1"
-    if "13.00" in value or "1.00" in value:
-        return "shift_2"
-    if "15.00" in value or "3.00" in value:
-        return "shift_3"
-    if "shift 1" in value:
-        return "shift_1"
-    if "shift 2" in value:
-        return "shift_2"
-    if "shift 3" in value:
-        return "shift_3"
-    return None
-
-
-def parse_uploaded_file(uploaded_file) -> list[dict]:
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-    else:
-        df = pd.read_excel(uploaded_file)
-
-    df.columns = df.columns.str.strip()
-    schedule = []
-
-    for _, row in df.iterrows():
-        name = row["Name"]
-        for day in df.columns[1:]:
-            shift_name = normalize_shift(row[day])
-            if shift_name:
-                schedule.append({
-                    "name": name,
-                    "day": day,
-                    "shift_name": shift_name,
-                    "start_time": SHIFT_TIME_MAP[shift_name]["start_time"],
-                    "end_time": SHIFT_TIME_MAP[shift_name]["end_time"],
-                })
-    return schedule
+ENGINES = {"AI (LLM)": "llm", "Solver": "solver"}
 
 
 def load_bundled_schedule() -> list[dict]:
@@ -88,358 +39,213 @@ def filter_by_day(schedule: list[dict], day: str) -> list[dict]:
     return [s for s in schedule if s["day"] == day]
 
 
-def get_task_color(task: str) -> str:
-    task_lower = task.lower()
-    if "boh" in task_lower:
-        return TASK_COLORS["BOH"]
-    if task_lower == "break":
-        return TASK_COLORS["Break"]
-    if "floor" in task_lower:
-        return TASK_COLORS["Floor"]
-    if "outdoor" in task_lower:
-        return TASK_COLORS["Outdoor"]
-    if "restroom" in task_lower:
-        return TASK_COLORS["Restroom"]
-    if "egress" in task_lower:
-        return TASK_COLORS["Egress"]
-    if "float" in task_lower:
-        return TASK_COLORS["Float"]
-    return "#B0B0B0"
-
-
-# --- Constraint Validation ---
-
-def validate_constraints(assignments: list[dict]) -> list[dict]:
-    results = []
-
-    # Build time->employee->task mapping
-    time_map = {}  # {time: {employee: task}}
-    for a in assignments:
-        for time, task in a["tasks"].items():
-            if time not in time_map:
-                time_map[time] = {}
-            time_map[time][a["employee"]] = task
-
-    # 1. No double-booking
-    double_booked = False
-    for time, emp_tasks in time_map.items():
-        employees = list(emp_tasks.keys())
-        if len(employees) != len(set(employees)):
-            double_booked = True
-            break
-    results.append({"rule": "No double-booking", "pass": not double_booked})
-
-    # 2. Restroom_2: 1-2 people, 2 from 14:00
-    r2_ok = True
-    r2_times = [t for t in time_map if "10:00" <= t <= "22:00"]
-    for time in r2_times:
-        if time in time_map:
-            count = sum(1 for t in time_map[time].values() if "Restroom_2" in t)
-            if count < 1:
-                r2_ok = False
-            if time >= "14:00" and count < 2:
-                r2_ok = False
-            if count > 2:
-                r2_ok = False
-    results.append({"rule": "Restroom_2 staffing", "pass": r2_ok})
-
-    # 3. Restroom_4: exactly 1
-    r4_ok = True
-    r4_times = [t for t in time_map if "10:00" <= t <= "22:00"]
-    for time in r4_times:
-        if time in time_map:
-            count = sum(1 for t in time_map[time].values() if "Restroom_4" in t)
-            if count != 1:
-                r4_ok = False
-    results.append({"rule": "Restroom_4 staffing (exactly 1)", "pass": r4_ok})
-
-    # 4. Egress: exactly 2, 10:00-12:00
-    egress_ok = True
-    for time in ["10:00", "11:00"]:
-        if time in time_map:
-            count = sum(1 for t in time_map[time].values() if "Egress" in t)
-            if count != 2:
-                egress_ok = False
-    results.append({"rule": "Egress (exactly 2, 10-12)", "pass": egress_ok})
-
-    # 5. BOH-Breakroom: exactly 1 at 10:00 and 14:00
-    boh_br_ok = True
-    for time in ["10:00", "14:00"]:
-        if time in time_map:
-            count = sum(1 for t in time_map[time].values() if "BOH-Breakroom" in t)
-            if count != 1:
-                boh_br_ok = False
-    results.append({"rule": "BOH-Breakroom (exactly 1)", "pass": boh_br_ok})
-
-    # 6. BOH-Restrooms: exactly 1 at 10:00 and 14:00
-    boh_rr_ok = True
-    for time in ["10:00", "14:00"]:
-        if time in time_map:
-            count = sum(1 for t in time_map[time].values() if "BOH-Restrooms" in t)
-            if count != 1:
-                boh_rr_ok = False
-    results.append({"rule": "BOH-Restrooms (exactly 1)", "pass": boh_rr_ok})
-
-    return results
-
-
-# --- Timeline Grid HTML ---
-
-def build_timeline_html(assignments: list[dict]) -> str:
-    rows_html = ""
-    for idx, a in enumerate(assignments):
-        row_bg = "#FFFFFF" if idx % 2 == 0 else "#F8F9FA"
-        # Employee name cell
-        name = a["employee"]
-        initials = "".join(w[0].upper() for w in name.split()[:2])
-        cells = ""
-        for time in TIME_SLOTS:
-            task = a["tasks"].get(time, "")
-            if task:
-                bg = get_task_color(task)
-                cells += (
-                    f'<td class="hk-cell">'
-                    f'<div class="hk-block" style="background:{bg};">'
-                    f'<span class="hk-task-text">{task}</span>'
-                    f'</div></td>'
-                )
-            else:
-                cells += '<td class="hk-cell"><div class="hk-empty"></div></td>'
-
-        rows_html += (
-            f'<tr style="background:{row_bg};">'
-            f'<td class="hk-name-cell">'
-            f'<div class="hk-name-row">'
-            f'<span class="hk-initials">{initials}</span>'
-            f'<span class="hk-name">{name}</span>'
-            f'</div></td>'
-            f'{cells}</tr>'
-        )
+# --- Memoized stages ---
+# Streamlit reruns main() on every interaction; these skip the work when inputs are unchanged.
 
-    header_cells = "".join(
-        f'<th class="hk-th">{t}</th>' for t in TIME_SLOTS
-    )
+@memoize("parse")
+def parse_upload(name: str, data: bytes) -> list[dict]:
+    with metrics.span("upload", bytes=len(data)) as span:
+        upload = io.BytesIO(data)
+        upload.name = name
+        schedule = parse_uploaded_file(upload)
+        span["rows"] = len(schedule)
+    return schedule
+
+
+@memoize("sort")
+def ordered_assignments(assignments: list[dict]) -> list[dict]:
+    # A row cleared in the editor has no tasks; it sorts first instead of failing
+    return sorted(assignments, key=lambda a: min(a["tasks"], default=""))
+
+
+# Dated, indexed roster; each sheet of a workbook is one week from the chosen start
+roster_store = memoize("roster")(RosterStore.from_schedule)
+# Each schedule is decoded into task codes once; the stages below run on the matrix
+schedule_matrix = memoize("matrix")(ScheduleMatrix.from_assignments)
+
+
+@memoize("timeline")
+def render_timeline(assignments: list[dict]) -> str:
+    with metrics.span("timeline", rows=len(assignments)) as span:
+        body = timeline_body(schedule_matrix(assignments))
+        span["bytes"] = len(body)
+    return body
+
+
+@memoize("validate")
+def check_rules(assignments: list[dict]) -> list[dict]:
+    with metrics.span("validate", rows=len(assignments)):
+        return validate_constraints(schedule_matrix(assignments))
+
+
+@memoize("csv")
+def schedule_csv(assignments: list[dict]) -> str:
+    with metrics.span("csv", rows=len(assignments)) as span:
+        csv = assignments_to_csv(schedule_matrix(assignments))
+        span["bytes"] = len(csv)
+    return csv
 
-    legend_items = "".join(
-        f'<div class="hk-legend-item">'
-        f'<span class="hk-legend-swatch" style="background:{color};"></span>'
-        f'<span class="hk-legend-label">{cat}</span>'
-        f'</div>'
-        for cat, color in TASK_COLORS.items()
-    )
 
-    html = f"""
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=DM+Sans:ital,opsz,wght@0,9..40,300;0,9..40,500;0,9..40,700;1,9..40,300&display=swap');
-
-        .hk-grid-wrap {{
-            font-family: 'DM Sans', -apple-system, BlinkMacSystemFont, sans-serif;
-            max-width: 100%;
-            overflow-x: auto;
-            color: #1A1A2E;
-        }}
-
-        /* ── Legend ── */
-        .hk-legend {{
-            display: flex;
-            flex-wrap: wrap;
-            gap: 6px;
-            margin-bottom: 16px;
-            padding: 10px 14px;
-            background: #F1F3F5;
-            border-radius: 8px;
-            border: 1px solid #E2E6EA;
-        }}
-        .hk-legend-item {{
-            display: inline-flex;
-            align-items: center;
-            gap: 6px;
-            padding: 3px 10px 3px 6px;
-            background: #FFFFFF;
-            border-radius: 100px;
-            border: 1px solid #E2E6EA;
-        }}
-        .hk-legend-swatch {{
-            width: 10px;
-            height: 10px;
-            border-radius: 3px;
-            flex-shrink: 0;
-        }}
-        .hk-legend-label {{
-            font-size: 11px;
-            font-weight: 500;
-            letter-spacing: 0.02em;
-            color: #495057;
-        }}
-
-        /* ── Table ── */
-        .hk-table {{
-            border-collapse: separate;
-            border-spacing: 0;
-            width: 100%;
-            border-radius: 10px;
-            overflow: hidden;
-            border: 1px solid #DEE2E6;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.04), 0 4px 12px rgba(0,0,0,0.03);
-        }}
-
-        .hk-th {{
-            padding: 10px 8px;
-            font-size: 11px;
-            font-weight: 700;
-            letter-spacing: 0.06em;
-            text-transform: uppercase;
-            text-align: center;
-            color: #868E96;
-            background: #F8F9FA;
-            border-bottom: 2px solid #DEE2E6;
-            min-width: 100px;
-        }}
-        .hk-th:first-child {{
-            text-align: left;
-            padding-left: 16px;
-            min-width: 180px;
-        }}
-
-        /* ── Name cell ── */
-        .hk-name-cell {{
-            padding: 8px 12px 8px 16px;
-            border-bottom: 1px solid #ECEEF0;
-            vertical-align: middle;
-        }}
-        .hk-name-row {{
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }}
-        .hk-initials {{
-            width: 28px;
-            height: 28px;
-            border-radius: 6px;
-            background: #E9ECEF;
-            color: #495057;
-            font-size: 10px;
-            font-weight: 700;
-            letter-spacing: 0.04em;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            flex-shrink: 0;
-        }}
-        .hk-name {{
-            font-size: 13px;
-            font-weight: 500;
-            color: #212529;
-            white-space: nowrap;
-        }}
-
-        /* ── Task cells ── */
-        .hk-cell {{
-            padding: 4px 3px;
-            border-bottom: 1px solid #ECEEF0;
-            border-left: 1px solid #F1F3F5;
-            vertical-align: middle;
-            text-align: center;
-        }}
-        .hk-block {{
-            padding: 7px 6px;
-            border-radius: 5px;
-            min-height: 32px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            transition: transform 0.1s ease, box-shadow 0.1s ease;
-        }}
-        .hk-block:hover {{
-            transform: translateY(-1px);
-            box-shadow: 0 2px 6px rgba(0,0,0,0.1);
-        }}
-        .hk-task-text {{
-            font-size: 11px;
-            font-weight: 600;
-            color: rgba(0,0,0,0.7);
-            letter-spacing: 0.01em;
-            white-space: nowrap;
-            line-height: 1.2;
-        }}
-        .hk-empty {{
-            min-height: 32px;
-            border-radius: 5px;
-            background: repeating-linear-gradient(
-                -45deg,
-                transparent,
-                transparent 3px,
-                #F1F3F5 3px,
-                #F1F3F5 4px
-            );
-        }}
-
-        /* ── Row hover ── */
-        .hk-table tbody tr:hover {{
-            background: #F0F4FF !important;
-        }}
-        .hk-table tbody tr:hover .hk-initials {{
-            background: #D0D7DE;
-        }}
-
-        /* ── Last row no border ── */
-        .hk-table tbody tr:last-child td {{
-            border-bottom: none;
-        }}
-    </style>
-
-    <div class="hk-grid-wrap">
-        <div class="hk-legend">{legend_items}</div>
-        <table class="hk-table">
-            <thead>
-                <tr>
-                    <th class="hk-th">Employee</th>
-                    {header_cells}
-                </tr>
-            </thead>
-            <tbody>
-                {rows_html}
-            </tbody>
-        </table>
-    </div>
-    """
-    return html
-
-
-# --- Export ---
-
-def assignments_to_csv(assignments: list[dict]) -> str:
+@memoize("png", maxsize=8)
+def schedule_png(assignments: list[dict]) -> bytes:
+    body = render_timeline(assignments)
+    with metrics.span("png", rows=len(assignments)) as span:
+        png = get_render_worker().png(body, TIMELINE_WIDTH, head=TIMELINE_STYLE)
+        span["bytes"] = len(png)
+    return png
+
+
+@memoize("week_export", maxsize=2)
+def week_export(day_assignments: dict[str, list[dict]]) -> tuple[bytes, bytes]:
+    """(PDF, ZIP) for the week, both from one render pass over every day."""
+    ordered = {day: ordered_assignments(a) for day, a in day_assignments.items()}
+    bodies = {day: render_timeline(a) for day, a in ordered.items()}
+    with metrics.span("week_export", rows=sum(map(len, ordered.values()))) as span:
+        pdf, pngs = get_render_worker().week(bodies, TIMELINE_WIDTH, head=TIMELINE_STYLE)
+        archive = week_zip(pngs, {day: schedule_csv(a) for day, a in ordered.items()})
+        span["bytes"] = len(pdf) + len(archive)
+    return pdf, archive
+
+
+def week_to_csv(week: dict) -> str:
+    """One CSV for the whole week, with a Day column; days without a schedule are skipped."""
     rows = []
-    for a in assignments:
-        for time, task in a["tasks"].items():
-            rows.append({"Employee": a["employee"], "Time": time, "Task": task})
-    df = pd.DataFrame(rows)
-    return df.to_csv(index=False)
+    for day, day_result in week.items():
+        if day_result.result is None:
+            continue
+        for a in day_result.result["assignments"]:
+            for time, task in a["tasks"].items():
+                rows.append({"Day": day, "Employee": a["employee"], "Time": time, "Task": task})
+    return pd.DataFrame(rows, columns=["Day", "Employee", "Time", "Task"]).to_csv(index=False)
 
 
 # --- Streamlit App ---
 
+def stream_schedule(day_staff: list[dict], compact: bool = False) -> tuple[dict | None, str]:
+    """Generate with a streaming completion, drawing the grid row by row."""
+    stream = ScheduleStream(day_staff, compact)
+    status = st.empty()
+    grid = st.empty()
+    status.caption("Waiting for the first row...")
+    for _ in stream:
+        grid.html(timeline_body(stream.rows))
+        status.caption(f"{len(stream.rows)} rows · first row after {stream.first_row_seconds:.1f}s")
+    status.empty()
+    grid.empty()
+    st.session_state["stream_timing"] = {
+        "first_row": stream.first_row_seconds,
+        "total": stream.total_seconds,
+    }
+    return stream.result(), stream.raw
+
+
+def apply_repair(result: dict) -> dict:
+    """Repair rule violations locally and remember the diff for display."""
+    repaired = repair_schedule(result["assignments"])
+    st.session_state["repair"] = repaired
+    return {**result, "assignments": repaired["assignments"]}
+
+
+def generate_week_schedules(store: RosterStore, week_start: date, **kwargs) -> None:
+    """Generate every rostered day of the week concurrently, ticking off each day as it finishes."""
+    rosters = store.week(week_start)
+    days = list(rosters)
+    progress = st.progress(0.0, text=f"Generating {len(days)} days...")
+    status = st.empty()
+    lines = []
+    week = {}
+    for i, day_result in enumerate(iter_days(rosters, **kwargs), 1):
+        week[day_result.day] = day_result
+        if day_result.ok:
+            note = " (cached)" if day_result.cache_hit else f" in {day_result.seconds:.1f}s"
+            retries = f", {day_result.attempts} attempts" if day_result.attempts > 1 else ""
+            lines.append(f"✅ {day_result.day}{note}{retries}")
+        else:
+            lines.append(f"❌ {day_result.day}: {day_result.error}")
+        progress.progress(i / len(days), text=f"{i}/{len(days)} days done")
+        status.markdown("  \n".join(lines))
+    progress.empty()
+    st.session_state["week_results"] = {d: week[d] for d in days}
+
+
+def show_week(week: dict) -> None:
+    st.subheader("Week")
+    tabs = st.tabs(list(week))
+    for tab, (day, day_result) in zip(tabs, week.items()):
+        with tab:
+            if day_result.result is None:
+                st.error(f"{day}: {day_result.error}")
+                continue
+            assignments = ordered_assignments(day_result.result["assignments"])
+            failing = [v["rule"] for v in check_rules(assignments) if not v["pass"]]
+            if failing:
+                st.warning(f"{len(failing)} rule(s) failing: {', '.join(failing)}")
+            if day_result.repair and day_result.repair["changes"]:
+                st.caption(f"Auto-repaired {len(day_result.repair['changes'])} cell(s)")
+            st.html(render_timeline(assignments))
+    col_csv, col_export = st.columns(2)
+    with col_csv:
+        st.download_button(
+            "Download week CSV", data=week_to_csv(week), file_name="schedule_week.csv", mime="text/csv",
+        )
+    with col_export:
+        day_assignments = {d: r.result["assignments"] for d, r in week.items() if r.result is not None}
+        export_key = content_hash(day_assignments)
+        export = st.session_state.get("week_export")
+        if export and export[0] == export_key:
+            st.download_button(
+                "Download week PDF", data=export[1], file_name="schedule_week.pdf", mime="application/pdf",
+            )
+            st.download_button(
+                "Download week ZIP", data=export[2], file_name="schedule_week.zip", mime="application/zip",
+            )
+        elif day_assignments and st.button("Export week PDF/ZIP"):
+            try:
+                with st.spinner(f"Rendering {len(day_assignments)} days..."):
+                    st.session_state["week_export"] = (export_key, *week_export(day_assignments))
+                st.rerun()
+            except Exception as e:
+                st.warning(f"Week export unavailable: {e}")
+
+
 def main():
     st.set_page_config(page_title="HK Task Scheduler", layout="wide")
     st.title("HK Task Scheduler")
     st.caption("Daily housekeeping schedule generator for luxury gallery")
+    # Every timeline on the page shares one copy of the grid stylesheet
+    st.html(TIMELINE_STYLE)
 
     # Sidebar: Upload + Day Selection
     with st.sidebar:
         st.header("Schedule Input")
 
+        week_start = monday(st.date_input("Week starting", value=monday(date.today()), format="YYYY-MM-DD"))
+        week = 0
+
         uploaded_file = st.file_uploader(
             "Upload staff schedule", type=["xlsx", "csv"],
-            help="Excel or CSV with Name column + day columns"
+            help="Excel or CSV with Name column + day columns; every sheet of a workbook is read"
         )
 
         if uploaded_file:
             try:
-                schedule = parse_uploaded_file(uploaded_file)
-                st.success(f"Loaded {len(schedule)} schedule entries")
+                schedule = parse_upload(uploaded_file.name, uploaded_file.getvalue())
+                sheets = roster_sheets(schedule)
+                st.success(f"Loaded {len(schedule)} schedule entries from {max(len(sheets), 1)} sheet(s)")
+                roster = schedule
+                if len(sheets) > 1:
+                    sheet = st.selectbox("Sheet / week", sheets)
+                    week = sheets.index(sheet)
+                    schedule = [s for s in schedule if s["sheet"] == sheet]
                 try:
-                    push_schedule(schedule)
-                    st.success("Saved to Supabase")
+                    pushed = push_schedule(schedule)
+                    if pushed["skipped"]:
+                        st.caption("Supabase already up to date")
+                    else:
+                        st.success(
+                            f"Saved to Supabase ({pushed['inserted']} added, "
+                            f"{pushed['updated']} changed, {pushed['deleted']} removed)"
+                        )
                 except Exception as e:
                     st.warning(f"Could not save to Supabase: {e}")
             except Exception as e:
@@ -457,12 +263,38 @@ def main():
             else:
                 schedule = load_bundled_schedule()
                 st.info("Using bundled schedule data")
+            roster = schedule
 
         day = st.selectbox("Select day", DAYS, index=3)  # Default Thursday
 
+        engine = st.radio(
+            "Engine", list(ENGINES), horizontal=True,
+            help="Solver builds the schedule locally in milliseconds; AI calls the LLM",
+        )
+        samples = 1
+        stream_rows = False
+        compact = False
+        auto_repair = False
+        if ENGINES[engine] == "llm":
+            samples = st.number_input(
+                "Parallel samples", min_value=1, max_value=8, value=1,
+                help="Request several completions at once and keep the first valid schedule",
+            )
+            if samples == 1:
+                stream_rows = st.checkbox("Stream rows as they arrive", value=True)
+            compact = st.checkbox(
+                "Compact prompt", value=False,
+                help="Tabular roster, short task codes and a condensed example; codes are expanded on parse",
+            )
+            auto_repair = st.checkbox(
+                "Auto-repair violations", value=True,
+                help="Fix rule violations locally with task swaps instead of regenerating",
+            )
+
         if schedule:
-            day_staff = filter_by_day(schedule, day)
-            st.metric("Available staff", len(day_staff))
+            on = week_start + timedelta(days=7 * week + DAYS.index(day))
+            day_staff = roster_store(roster, week_start).day_roster(on)
+            st.metric("Available staff", len(day_staff), help=f"Rostered on {on.isoformat()}")
 
             if len(day_staff) < 6:
                 st.warning(f"Only {len(day_staff)} staff available. Minimum 6 recommended.")
@@ -474,53 +306,152 @@ def main():
         st.info("Please upload a valid staff schedule file.")
         return
 
-    if not day_staff:
-        st.warning(f"No staff available on {day}.")
-        return
-
     # Generate button
-    col1, col2 = st.columns([1, 1])
+    col1, col2, col3 = st.columns([1, 1, 1])
     with col1:
         generate = st.button("Generate Schedule", type="primary", use_container_width=True)
     with col2:
         regenerate = st.button("Regenerate", use_container_width=True)
+    with col3:
+        generate_week = st.button("Generate Week", use_container_width=True)
+
+    if generate_week:
+        generate_week_schedules(
+            roster_store(roster, week_start), week_start + timedelta(days=7 * week),
+            backend=ENGINES[engine], samples=int(samples), compact=compact, auto_repair=auto_repair,
+        )
+    if "week_results" in st.session_state:
+        show_week(st.session_state["week_results"])
+
+    if not day_staff:
+        st.warning(f"No staff available on {day}.")
+        return
 
     if generate or regenerate:
-        with st.spinner("Generating schedule with AI..."):
-            try:
-                random.shuffle(day_staff)
-                result, raw_response = generate_schedule(day_staff)
-                if result and "assignments" in result:
-                    st.session_state["schedule_result"] = result
-                    st.session_state["day_staff"] = day_staff
+        try:
+            day_staff = random.sample(day_staff, len(day_staff))
+            with track_calls() as calls:
+                if stream_rows:
+                    with metrics.span("generate", backend="llm", rows=len(day_staff), stream=True) as span:
+                        key = schedule_key(day_staff, compact=compact)
+                        cached = None if regenerate else get_schedule_cache().get(key)
+                        hit = span["cache_hit"] = cached is not None
+                        if hit:
+                            result, raw_response = cached
+                            st.session_state.pop("stream_timing", None)
+                        else:
+                            result, raw_response = stream_schedule(day_staff, compact)
+                            get_schedule_cache().admit(key, result, raw_response)
                 else:
-                    st.error("Failed to parse schedule from AI response. Try regenerating.")
-                    with st.expander("Raw LLM response (debug)"):
-                        st.code(raw_response[:3000])
-            except Exception as e:
-                st.error(f"Generation failed: {e}")
+                    st.session_state.pop("stream_timing", None)
+                    with st.spinner(f"Generating schedule with {engine}..."):
+                        result, raw_response, hit = cached_generate_schedule(
+                            day_staff, backend=ENGINES[engine], samples=int(samples),
+                            bypass_cache=bool(regenerate), compact=compact,
+                        )
+            if ENGINES[engine] == "llm" and not hit:
+                report = token_report(day_staff)
+                # Best-of-N cancels the other samples once one is valid, so only the server's
+                # usage for the calls actually made is exact; estimate a single call otherwise
+                usage = call_usage(calls)
+                estimated = usage is None
+                if estimated:
+                    usage = count_tokens(build_prompt(day_staff, compact)), count_tokens(raw_response)
+                st.session_state["token_usage"] = {
+                    "prompt": usage[0],
+                    "completion": usage[1],
+                    "estimated": estimated,
+                    "calls": len(calls),
+                    "full_prompt": report["full"],
+                    "saved": report["saved"] if compact else 0.0,
+                }
+            else:
+                st.session_state.pop("token_usage", None)
+            if hit:
+                st.info("Loaded a previously validated schedule from cache. Use Regenerate for a fresh one.")
+            st.session_state.pop("repair", None)
+            if result and "assignments" in result:
+                if auto_repair and score_schedule(result):
+                    result = apply_repair(result)
+                st.session_state["schedule_result"] = result
+                st.session_state["day_staff"] = day_staff
+            else:
+                try:
+                    parse_schedule(raw_response)
+                    reason = "no assignments"
+                except ParseError as e:
+                    reason = str(e)
+                st.error(f"Failed to parse schedule from AI response: {reason}. Try regenerating.")
+                with st.expander("Raw LLM response (debug)"):
+                    st.code(raw_response[:3000])
+        except Exception as e:
+            st.error(f"Generation failed: {e}")
 
     # Display results
     if "schedule_result" in st.session_state:
         result = st.session_state["schedule_result"]
         assignments = result["assignments"]
-        assignments = sorted(assignments, key=lambda a: min(a["tasks"].keys()))
+        assignments = ordered_assignments(assignments)
 
         st.subheader(f"Schedule for {day}")
-        st.html(build_timeline_html(assignments))
+        timing = st.session_state.get("stream_timing")
+        if timing and timing["first_row"] is not None:
+            st.caption(
+                f"Time to first row: {timing['first_row']:.1f}s · "
+                f"full response: {timing['total']:.1f}s"
+            )
+        usage = st.session_state.get("token_usage")
+        if usage:
+            approx = "~" if usage["estimated"] else ""
+            caption = f"{approx}{usage['prompt']:,} prompt / {approx}{usage['completion']:,} completion tokens"
+            if usage["calls"] > 1:
+                caption += f" over {usage['calls']} calls"
+            if usage["saved"]:
+                caption += f" · compact prompt {usage['saved']:.0%} smaller than full ({usage['full_prompt']:,})"
+            st.caption(caption)
+        state = schedule_editor(assignments)
+        edited = edit_assignments(result, state)
+        if edited is not result:
+            result = st.session_state["schedule_result"] = edited
+            assignments = ordered_assignments(result["assignments"])
+        st.html(render_timeline(assignments))
+
+        unfilled = result.get("unfilled")
+        if unfilled:
+            gaps = ", ".join(f"{u['task']} at {u['time']} (-{u['missing']})" for u in unfilled)
+            st.warning(f"Not enough staff to cover: {gaps}")
 
         # Constraint validation
         st.subheader("Constraint Validation")
-        validations = validate_constraints(assignments)
+        # Edited schedules come from the editor's live counters instead of a full re-check
+        validations = state["editor"].results() if state["editor"].edits else check_rules(assignments)
         cols = st.columns(3)
         for i, v in enumerate(validations):
             with cols[i % 3]:
                 icon = "✅" if v["pass"] else "❌"
                 st.markdown(f"{icon} **{v['rule']}**")
+                if not v["pass"]:
+                    where = ", ".join(
+                        " ".join(str(c[k]) for k in ("employee", "time", "task") if c.get(k))
+                        for c in v["cells"][:5]
+                    )
+                    more = f" (+{v['violations'] - 5} more)" if v["violations"] > 5 else ""
+                    st.caption(f"{v['violations']} violation(s): {where}{more}")
+
+        if not all(v["pass"] for v in validations) and st.button("Repair violations"):
+            st.session_state["schedule_result"] = apply_repair(result)
+            st.rerun()
+        repair = st.session_state.get("repair")
+        if repair and repair["changes"]:
+            with st.expander(
+                f"Repaired {len(repair['changes'])} cell(s): "
+                f"{repair['violations_before']} → {repair['violations_after']} violations"
+            ):
+                st.dataframe(pd.DataFrame(repair["changes"]), hide_index=True, use_container_width=True)
 
         # Export
         col_csv, col_png = st.columns(2)
-        csv_data = assignments_to_csv(assignments)
+        csv_data = schedule_csv(assignments)
         with col_csv:
             st.download_button(
                 "Download CSV",
@@ -529,32 +460,114 @@ def main():
                 mime="text/csv",
             )
         with col_png:
-            try:
-                from playwright.sync_api import sync_playwright
-                png_filename = f"{day}_Schedule.png"
-                timeline_html = build_timeline_html(assignments)
-                # Wrap in full HTML doc without max-width constraint
-                full_html = f"<html><body style='margin:0;padding:16px;background:#fff;'>{timeline_html}</body></html>"
-                html_path = os.path.join(tempfile.gettempdir(), "schedule_tmp.html")
-                with open(html_path, "w") as f:
-                    f.write(full_html)
-                viewport_w = len(TIME_SLOTS) * 120 + 300
-                with sync_playwright() as p:
-                    browser = p.chromium.launch(headless=True)
-                    page = browser.new_page(viewport={"width": viewport_w, "height": 800})
-                    page.goto(f"file://{html_path}")
-                    page.wait_for_timeout(500)
-                    png_bytes = page.screenshot(full_page=True)
-                    browser.close()
+            # Rendering is on request only; the result is kept for this exact schedule
+            png_key = content_hash(assignments)
+            png = st.session_state.get("png")
+            if png and png[0] == png_key:
                 st.download_button(
                     "Download PNG",
-                    data=png_bytes,
-                    file_name=png_filename,
+                    data=png[1],
+                    file_name=f"{day}_Schedule.png",
                     mime="image/png",
                 )
-            except Exception as e:
-                st.warning(f"PNG export unavailable: {e}")
+            elif st.button("Render PNG"):
+                try:
+                    with st.spinner("Rendering PNG..."):
+                        st.session_state["png"] = (png_key, schedule_png(assignments))
+                    st.rerun()
+                except Exception as e:
+                    st.warning(f"PNG export unavailable: {e}")
+
+
+def editor_frame(editor: ScheduleEditor) -> pd.DataFrame:
+    frame = pd.DataFrame(
+        [tasks for _, tasks in editor.matrix.tasks(SLOTS)], columns=SLOTS, dtype=object,
+    )
+    frame.insert(0, "Employee", editor.matrix.employees)
+    return frame
+
+
+def schedule_editor(assignments: list[dict]) -> dict:
+    """The session's editor for this schedule, rebuilt when the schedule changes elsewhere."""
+    key = content_hash(assignments)
+    state = st.session_state.get("editor")
+    if state is None or state["key"] != key:
+        editor = ScheduleEditor(assignments)
+        frame = editor_frame(editor)
+        # "base" feeds the grid widget and only changes (with "version") when a swap redraws it;
+        # "view" is the last grid seen, so each rerun applies just the newly edited cells
+        state = {"key": key, "id": key[:12], "editor": editor, "base": frame, "view": frame, "version": 0}
+        st.session_state["editor"] = state
+    return state
+
+
+def edit_assignments(result: dict, state: dict) -> dict:
+    """Click-to-edit grid plus a two-cell swap; every change is re-validated incrementally."""
+    editor = state["editor"]
+    with st.expander("Edit assignments", expanded=editor.edits > 0):
+        edited = st.data_editor(
+            state["base"], key=f"editor_{state['id']}_{state['version']}", hide_index=True,
+            disabled=["Employee"], use_container_width=True,
+        )
+        changed = edited[SLOTS].fillna("").to_numpy() != state["view"][SLOTS].fillna("").to_numpy()
+        for row, col in zip(*np.nonzero(changed)):
+            value = edited.iat[row, col + 1]
+            editor.set_task(int(row), SLOTS[col], None if pd.isna(value) else str(value))
+        state["view"] = edited
+
+        cells = [(r, t) for r in range(len(editor.matrix)) for t in SLOTS]
+
+        def label(cell):
+            return f"{editor.matrix.employees[cell[0]]} @ {cell[1]} ({editor.task(*cell) or '—'})"
+
+        col_a, col_b, col_swap = st.columns([2, 2, 1])
+        a = col_a.selectbox("Swap cell", cells, format_func=label, key=f"swap_a_{state['id']}")
+        b = col_b.selectbox("with", cells, format_func=label, key=f"swap_b_{state['id']}")
+        if col_swap.button("Swap") and a != b:
+            editor.swap(*a, *b)
+            state["base"] = state["view"] = editor_frame(editor)
+            state["version"] += 1
+            st.rerun()
+
+        st.caption(f"{editor.edits} edit(s) · {editor.total} violation(s)")
+    if not editor.edits:
+        return result
+    # Keep the editor across the rerun the new schedule triggers
+    edited_result = {**result, "assignments": editor.to_assignments()}
+    state["key"] = content_hash(ordered_assignments(edited_result["assignments"]))
+    return edited_result
+
+
+def show_stage_stats() -> None:
+    """Per-stage memo hits and misses, rendered after main() so this rerun is counted."""
+    stats = stage_stats()
+    with st.sidebar.expander("Rerun cache"):
+        st.dataframe(
+            pd.DataFrame.from_dict(stats, orient="index", columns=["hits", "misses", "entries"]),
+            use_container_width=True,
+        )
+
+
+def show_performance() -> None:
+    """Per-stage span timings and the latest spans; also writes the Prometheus file for this rerun."""
+    summary = metrics.RECORDER.summary()
+    metrics.RECORDER.flush()
+    with st.sidebar.expander("Performance"):
+        if not summary:
+            st.caption("No stages timed yet")
+            return
+        frame = pd.DataFrame(summary).set_index("stage")
+        for column in ("seconds", "p50", "p95", "max"):
+            frame[column] = (frame[column] * 1e3).round(1)
+        st.dataframe(
+            frame.rename(columns={"seconds": "total ms", "p50": "p50 ms", "p95": "p95 ms", "max": "max ms"}),
+            use_container_width=True,
+        )
+        st.caption("Latest spans")
+        st.dataframe(pd.DataFrame(metrics.RECORDER.recent()), hide_index=True, use_container_width=True)
 
 
 if __name__ == "__main__":
     main()
+    show_stage_stats()
+    show_performance()
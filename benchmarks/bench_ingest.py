@@ -0,0 +1,159 @@
+"""Roster ingestion benchmark: vectorized ``roster_frame`` vs the old iterrows loop.
+
+    python -m benchmarks.bench_ingest --rows 5000
+    python -m benchmarks.bench_ingest --xlsx --rows 5000 --sheets 4
+
+Builds a synthetic multi-site, multi-week export (one row per person-week,
+one column per day), checks both paths produce identical records and
+prints the timings. ``--xlsx`` writes a multi-sheet workbook instead and
+compares time and peak memory of ``pd.read_excel`` against the streaming
+``iter_workbook`` reader.
+"""
+
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+import pandas as pd
+
+from roster import SHIFT_TIME_MAP, iter_workbook, normalize_shift, roster_frame, roster_records
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+CELLS = [
+    "7.00 am to 15.00 pm", "13.00 pm to 21.00 pm", "15.00 pm to 23.00 pm", "OFF", "off ",
+    "Shift 1", "Shift 2", "shift 3", "07:00-15:00", "1.00 pm - 9.00 pm", "3.00 pm - 11.00 pm", None, "Leave",
+]
+
+
+def legacy_parse(df: pd.DataFrame) -> list[dict]:
+    """The original per-cell loop, kept as the reference implementation."""
+    schedule = []
+    for _, row in df.iterrows():
+        name = row["Name"]
+        for day in df.columns[1:]:
+            shift_name = normalize_shift(row[day])
+            if shift_name:
+                schedule.append({
+                    "name": name,
+                    "day": day,
+                    "shift_name": shift_name,
+                    "start_time": SHIFT_TIME_MAP[shift_name]["start_time"],
+                    "end_time": SHIFT_TIME_MAP[shift_name]["end_time"],
+                })
+    return schedule
+
+
+def synthetic_roster(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = random.Random(seed)
+    data = {"Name": [f"Site {i % 5} Staff {i // 5:05d}" for i in range(rows)]}
+    for day in DAYS:
+        data[day] = [rng.choice(CELLS) for _ in range(rows)]
+    return pd.DataFrame(data)
+
+
+def _best(fn, repeat: int) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, out
+
+
+def run(rows: int, repeat: int = 3) -> dict:
+    df = synthetic_roster(rows)
+    legacy_s, expected = _best(lambda: legacy_parse(df), repeat)
+    vector_s, frame = _best(lambda: roster_frame(df), repeat)
+    records_s, actual = _best(lambda: roster_records(roster_frame(df)), repeat)
+    assert actual == expected, "vectorized ingestion diverged from the legacy loop"
+
+    csv = df.to_csv(index=False)
+    csv_s, _ = _best(lambda: roster_frame(pd.read_csv(io.StringIO(csv))), repeat)
+    return {
+        "rows": rows,
+        "cells": rows * len(DAYS),
+        "records": len(frame),
+        "legacy_s": legacy_s,
+        "vectorized_s": vector_s,
+        "vectorized_records_s": records_s,
+        "csv_end_to_end_s": csv_s,
+        "speedup": legacy_s / vector_s,
+    }
+
+
+def write_workbook(path: str, rows: int, sheets: int) -> None:
+    wb = openpyxl.Workbook(write_only=True)
+    for week in range(sheets):
+        ws = wb.create_sheet(f"Week {week + 1}")
+        df = synthetic_roster(rows, seed=week)
+        ws.append(list(df.columns))
+        for row in df.itertuples(index=False):
+            ws.append(list(row))
+    wb.save(path)
+
+
+def _peak(fn) -> tuple[float, int, object]:
+    """Wall time of one untraced run, then peak traced allocation of a second run."""
+    seconds, out = _best(fn, 1)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, out
+
+
+def run_xlsx(rows: int, sheets: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "roster.xlsx")
+        write_workbook(path, rows, sheets)
+        size = os.path.getsize(path)
+
+        def pandas_all_sheets():
+            frames = pd.read_excel(path, sheet_name=None)
+            return sum(len(roster_frame(df.rename(columns=str.strip))) for df in frames.values())
+
+        pandas_s, pandas_peak, pandas_n = _peak(pandas_all_sheets)
+        stream_s, stream_peak, stream_n = _peak(lambda: sum(1 for _ in iter_workbook(path)))
+    assert pandas_n == stream_n, "streaming reader diverged from read_excel"
+    return {
+        "rows": rows * sheets, "sheets": sheets, "file_mb": size / 2**20, "records": stream_n,
+        "pandas_s": pandas_s, "pandas_peak_mb": pandas_peak / 2**20,
+        "stream_s": stream_s, "stream_peak_mb": stream_peak / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--xlsx", action="store_true", help="benchmark workbook readers instead")
+    parser.add_argument("--sheets", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.xlsx:
+        print(f"{'rows':>7} {'sheets':>6} {'file':>7} {'records':>8} {'read_excel':>18} {'iter_workbook':>18}")
+        for rows in args.rows:
+            r = run_xlsx(rows, args.sheets)
+            print(
+                f"{r['rows']:>7} {r['sheets']:>6} {r['file_mb']:>5.1f}MB {r['records']:>8} "
+                f"{r['pandas_s']:>6.2f}s {r['pandas_peak_mb']:>7.1f}MB peak "
+                f"{r['stream_s']:>6.2f}s {r['stream_peak_mb']:>7.1f}MB peak"
+            )
+        return
+
+    print(f"{'rows':>7} {'records':>8} {'legacy':>9} {'vector':>9} {'+records':>9} {'csv e2e':>9} {'speedup':>8}")
+    for rows in args.rows:
+        r = run(rows, args.repeat)
+        print(
+            f"{r['rows']:>7} {r['records']:>8} {r['legacy_s'] * 1e3:>7.1f}ms {r['vectorized_s'] * 1e3:>7.1f}ms "
+            f"{r['vectorized_records_s'] * 1e3:>7.1f}ms {r['csv_end_to_end_s'] * 1e3:>7.1f}ms {r['speedup']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Offline end-to-end load test against the local stub LLM server.
+
+    python -m benchmarks.bench_load --sessions 8 --rounds 3 --staff 20
+    python -m benchmarks.bench_load --sessions 16 --latency 1.0 --token-rate 80 --error-rate 0.1
+
+Starts ``benchmarks.stub_server`` in-process and points the app's shared
+transport at it. Then K threads each act as one app session running
+upload -> generate (streamed, as the app does) -> validate -> export. The
+report gives the p50/p95/p99 latency per stage, time to first row, failed
+sessions, and the transport's retries. All sessions share the process-wide
+transport and rate limiter, as Streamlit sessions do, so ``--rate`` (the
+limiter's requests per second) matters as much as the server settings.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app import filter_by_day
+from benchmarks.bench_ingest import DAYS
+from benchmarks.bench_pipeline import _Upload, roster_csv
+from benchmarks.stub_server import StubServer
+from export import assignments_to_csv
+from prompt import ScheduleStream
+from roster import parse_uploaded_file
+from rules import validate_constraints
+from timeline import build_timeline_html
+from transport import LIMITER, RATE_PER_SECOND, get_transport
+
+STAGES = ["upload", "first_row", "generate", "validate", "export", "session"]
+PERCENTILES = (50, 95, 99)
+
+
+def session(csv: bytes, day: str, compact: bool) -> dict[str, float]:
+    """One pass through the app's pipeline; stage name -> seconds."""
+    timings = {}
+    started = time.perf_counter()
+    schedule = parse_uploaded_file(_Upload(csv))
+    day_staff = filter_by_day(schedule, day)
+    timings["upload"] = time.perf_counter() - started
+
+    t = time.perf_counter()
+    stream = ScheduleStream(day_staff, compact)
+    for _ in stream:
+        pass
+    result = stream.result()
+    timings["generate"] = time.perf_counter() - t
+    timings["first_row"] = stream.first_row_seconds
+    if not result:
+        raise ValueError("No schedule in the response")
+
+    t = time.perf_counter()
+    validate_constraints(result["assignments"])
+    timings["validate"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    assignments_to_csv(result["assignments"])
+    build_timeline_html(result["assignments"])
+    timings["export"] = time.perf_counter() - t
+    timings["session"] = time.perf_counter() - started
+    return timings
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"n": 0}
+    values = np.percentile(samples, PERCENTILES)
+    return {"n": len(samples), **{f"p{p}": float(v) for p, v in zip(PERCENTILES, values)}, "max": max(samples)}
+
+
+def run_load(sessions: int = 4, rounds: int = 2, staff: int = 20, compact: bool = False,
+             rate: float = RATE_PER_SECOND, **server_options) -> dict:
+    """Run ``sessions`` concurrent sessions ``rounds`` times each against a fresh stub server."""
+    csv = roster_csv(staff, 1)
+    env = {k: os.environ.get(k) for k in ("HF_BASE_URL", "HF_TOKEN")}
+    limiter = (LIMITER.rate, LIMITER.capacity)
+    samples = {stage: [] for stage in STAGES}
+    errors = []
+    with StubServer(**server_options) as server:
+        os.environ["HF_BASE_URL"], os.environ["HF_TOKEN"] = server.url, "stub"
+        LIMITER.rate, LIMITER.capacity = rate, max(1, sessions)
+        try:
+            transport = get_transport("stub")
+            calls_before = len(transport.calls)
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="session") as pool:
+                futures = [
+                    pool.submit(session, csv, DAYS[(i + r) % len(DAYS)], compact)
+                    for r in range(rounds) for i in range(sessions)
+                ]
+                for future in futures:
+                    try:
+                        for stage, seconds in future.result().items():
+                            if seconds is not None:
+                                samples[stage].append(seconds)
+                    except Exception as e:
+                        errors.append(f"{type(e).__name__}: {e}")
+            wall = time.perf_counter() - started
+            calls = list(transport.calls)[calls_before:]
+        finally:
+            LIMITER.rate, LIMITER.capacity = limiter
+            for key, value in env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        requests, injected = server.requests, server.failures
+
+    return {
+        "stages": {stage: percentiles(values) for stage, values in samples.items()},
+        "sessions": sessions * rounds,
+        "failed": len(errors),
+        "errors": errors[:5],
+        "wall": wall,
+        "sessions_per_second": sessions * rounds / wall,
+        "requests": requests,
+        "injected_errors": injected,
+        "retries": sum(c["attempts"] - 1 for c in calls),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent app sessions")
+    parser.add_argument("--rounds", type=int, default=3, help="pipeline runs per session")
+    parser.add_argument("--staff", type=int, default=20, help="roster size")
+    parser.add_argument("--compact", action="store_true", help="use the compact prompt")
+    parser.add_argument("--rate", type=float, default=RATE_PER_SECOND, help="client rate limit, requests/s")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-rate", type=float, default=200.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    report = run_load(
+        args.sessions, args.rounds, args.staff, args.compact, args.rate,
+        latency=args.latency, token_rate=args.token_rate, error_rate=args.error_rate,
+    )
+    print(f"{'stage':<10} {'n':>4} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for stage, p in report["stages"].items():
+        if p["n"]:
+            print(f"{stage:<10} {p['n']:>4} " + " ".join(f"{p[k] * 1e3:>7.1f}ms" for k in ("p50", "p95", "p99", "max")))
+    print(
+        f"\n{report['sessions']} sessions in {report['wall']:.1f}s ({report['sessions_per_second']:.2f}/s), "
+        f"{report['failed']} failed · {report['requests']} requests, "
+        f"{report['injected_errors']} injected errors, {report['retries']} retries"
+    )
+    for error in report["errors"]:
+        print(f"  {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Scheduling pipeline benchmark with stored baselines.
+
+    python -m benchmarks.bench_pipeline                       # full grid, compare to baselines
+    python -m benchmarks.bench_pipeline --staff 10 100 --weeks 1
+    python -m benchmarks.bench_pipeline --update              # re-record baselines
+
+Times each stage (best of ``--repeat`` samples, looping fast stages) and measures its peak traced
+allocation on synthetic data. Roster stages (``parse_uploaded_file``,
+``filter_by_day``) see ``staff x weeks`` person-weeks; schedule stages
+(``validate_constraints``, ``build_timeline_html``, ``assignments_to_csv``,
+``parse_response``) see one day of ``staff`` assignments. The timeline is
+measured twice: ``build_timeline_html`` with its row and cell caches cleared
+before every call (a new schedule), and ``build_timeline_html_warm`` with
+them primed (a rerun; past ``ROW_ENTRIES`` rows the LRU misses anyway). A stage regresses
+when its time or peak memory exceeds the stored baseline by more than
+``--threshold`` (and by more than a small absolute floor, so sub-millisecond
+noise is ignored); the exit status is 1 if anything regressed. Baselines
+are machine-specific, so record them with ``--update`` on the machine that
+checks them.
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from app import filter_by_day
+from benchmarks.bench_ingest import DAYS, synthetic_roster
+from export import assignments_to_csv
+from prompt import parse_response
+from roster import parse_uploaded_file
+from rules import BREAK_WINDOWS, SHIFT_HOURS, validate_constraints
+from timeline import _cell, build_timeline_html, timeline_row
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+STAFF = [10, 100, 1000, 5000]
+WEEKS = [1, 4, 52]
+# Shared machines swing ~1.7x run to run; a 2x slowdown is well outside that
+THRESHOLD = 2.0
+MIN_SECONDS = 0.005
+MIN_PEAK_MB = 0.5
+SAMPLE_SECONDS = 0.05
+MAX_LOOPS = 1024
+
+TASKS = [
+    "Floor -1", "Floor 0", "Floor 1", "Floor 2", "Floor 3", "Floor 4", "Outdoor", "Outdoor DP",
+    "Outdoor Hallway", "Egress", "BOH-Breakroom", "BOH-Restrooms", "Restroom 2", "Restroom_2",
+    "Restroom 4", "Float_0", "Float_1", "Float_TRELLO", "Trash Removal",
+]
+
+
+# --- Synthetic data ---
+
+def roster_csv(staff: int, weeks: int) -> bytes:
+    """Wide roster export: one row per person-week, one column per day."""
+    frames = [synthetic_roster(staff, seed=week) for week in range(weeks)]
+    return pd.concat(frames, ignore_index=True).to_csv(index=False).encode()
+
+
+def synthetic_assignments(staff: int, seed: int = 0) -> list[dict]:
+    """One day of LLM-shaped assignments: a task per hour of each shift and one break."""
+    rng = random.Random(seed)
+    shifts = list(SHIFT_HOURS)
+    assignments = []
+    for i in range(staff):
+        shift = shifts[i % len(shifts)]
+        start, end = SHIFT_HOURS[shift]
+        lo, hi = BREAK_WINDOWS[shift]
+        rest = rng.randrange(lo, hi)
+        tasks = {f"{h:02d}:00": "Break" if h == rest else rng.choice(TASKS) for h in range(start, end)}
+        if shift != "shift_1" and rng.random() < 0.2:
+            tasks["20:30"] = "Trash Removal"
+        assignments.append({
+            "employee": f"Site {i % 5} Staff {i // 5:05d}",
+            "shift": f"Shift {shift[-1]} ({start:02d}:00-{end:02d}:00)",
+            "break": f"{rest:02d}:00-{rest + 1:02d}:00",
+            "tasks": tasks,
+        })
+    return assignments
+
+
+class _Upload(io.BytesIO):
+    name = "roster.csv"
+
+
+# --- Measurement ---
+
+def _timed(fn, loops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    return time.perf_counter() - started
+
+
+def _best(fn, repeat: int) -> float:
+    """Best per-call time; fast stages loop until a sample lasts ``SAMPLE_SECONDS``."""
+    loops = 1
+    while _timed(fn, loops) < SAMPLE_SECONDS and loops < MAX_LOOPS:
+        loops *= 2
+    return min(_timed(fn, loops) for _ in range(repeat)) / loops
+
+
+def _peak_mb(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def _cold_timeline(assignments: list[dict]) -> str:
+    timeline_row.cache_clear()
+    _cell.cache_clear()
+    return build_timeline_html(assignments)
+
+
+def stages(staff: int, weeks: int) -> dict:
+    """Stage name -> zero-argument callable, over data built once up front."""
+    csv = roster_csv(staff, weeks)
+    schedule = parse_uploaded_file(_Upload(csv))
+    assignments = synthetic_assignments(staff)
+    response = json.dumps({"assignments": assignments})
+    return {
+        "parse_uploaded_file": lambda: parse_uploaded_file(_Upload(csv)),
+        "filter_by_day": lambda: [filter_by_day(schedule, day) for day in DAYS],
+        "validate_constraints": lambda: validate_constraints(assignments),
+        "build_timeline_html": lambda: _cold_timeline(assignments),
+        "build_timeline_html_warm": lambda: build_timeline_html(assignments),
+        "assignments_to_csv": lambda: assignments_to_csv(assignments),
+        "parse_response": lambda: parse_response(response),
+    }
+
+
+# Stages whose input does not grow with the number of weeks
+PER_DAY = {
+    "validate_constraints", "build_timeline_html", "build_timeline_html_warm", "assignments_to_csv", "parse_response",
+}
+
+
+def run(staff_sizes: list[int], week_counts: list[int], repeat: int = 3) -> dict[str, dict]:
+    """``"stage/staff/weeks"`` -> {"seconds", "peak_mb"} over the grid."""
+    results = {}
+    for staff in staff_sizes:
+        for weeks in week_counts:
+            for stage, fn in stages(staff, weeks).items():
+                if stage in PER_DAY and weeks != week_counts[0]:
+                    continue
+                key = f"{stage}/{staff}/{1 if stage in PER_DAY else weeks}"
+                if key in results:
+                    continue
+                results[key] = {"seconds": round(_best(fn, repeat), 7), "peak_mb": round(_peak_mb(fn), 3)}
+    return results
+
+
+def compare(results: dict, baselines: dict, threshold: float = THRESHOLD) -> list[str]:
+    """One message per measurement that regressed past ``threshold`` x its baseline."""
+    regressions = []
+    for key, r in results.items():
+        base = baselines.get(key)
+        if base is None:
+            continue
+        for field, floor in (("seconds", MIN_SECONDS), ("peak_mb", MIN_PEAK_MB)):
+            limit = max(base[field] * threshold, base[field] + floor)
+            if r[field] > limit:
+                regressions.append(f"{key} {field}: {r[field]:.4g} > {limit:.4g} (baseline {base[field]:.4g})")
+    return regressions
+
+
+def load_baselines(path: str = BASELINES) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(results: dict, path: str = BASELINES) -> None:
+    baselines = {**load_baselines(path), **results}
+    with open(path, "w") as f:
+        json.dump(dict(sorted(baselines.items())), f, indent=1)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--staff", type=int, nargs="+", default=STAFF)
+    parser.add_argument("--weeks", type=int, nargs="+", default=WEEKS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--update", action="store_true", help="record these results as the baselines")
+    args = parser.parse_args()
+
+    results = run(args.staff, args.weeks, args.repeat)
+    baselines = load_baselines(args.baselines)
+    print(f"{'stage':<22} {'staff':>6} {'weeks':>5} {'time':>10} {'peak':>9} {'vs base':>8}")
+    for key, r in results.items():
+        stage, staff, weeks = key.split("/")
+        base = baselines.get(key)
+        ratio = f"{r['seconds'] / base['seconds']:.2f}x" if base else "-"
+        print(f"{stage:<22} {staff:>6} {weeks:>5} {r['seconds'] * 1e3:>8.2f}ms {r['peak_mb']:>7.2f}MB {ratio:>8}")
+
+    if args.update:
+        save_baselines(results, args.baselines)
+        print(f"Baselines written to {args.baselines}")
+        return
+    regressions = compare(results, baselines, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
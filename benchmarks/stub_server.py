@@ -0,0 +1,225 @@
+"""Local OpenAI-compatible chat-completions server for offline runs.
+
+    python -m benchmarks.stub_server --port 8900 --latency 0.5 --token-rate 150 --error-rate 0.05
+    HF_BASE_URL=http://127.0.0.1:8900/v1 HF_TOKEN=stub uv run streamlit run app.py
+
+Serves ``POST /v1/chat/completions``, blocking and streaming (SSE, with a
+final usage chunk when ``stream_options.include_usage`` is set). Every
+request waits ``latency`` seconds before its first token and then produces
+``token_rate`` tokens per second. ``error_rate`` of requests fail with one
+of ``errors`` (429/500/503 by default). The reply is built from the roster
+in the prompt, full or compact, by the in-process solver, so it parses and
+validates like a real schedule. When no roster is found, the example from
+the prompt template is returned instead.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prompt import EXPECTED_OUTPUT, SHIFT_CODES, count_tokens
+from roster import SHIFT_TIME_MAP
+from solver import solve_schedule
+
+STAFF_JSON = re.compile(r"<staff schedule>\s*(\[.*?\])\s*</staff schedule>", re.S)
+STAFF_LINES = re.compile(r"Staff \(name\|shift\):\n((?:[^\n|]+\|[^\n]+\n?)+)")
+# Word-ish pieces with their leading whitespace, so the pieces join back to the text
+STREAM_PIECES = re.compile(r"\s*(?:[A-Za-z]+|\d+|[^\sA-Za-z\d])|\s+")
+TICK = 0.02
+ERRORS = (429, 500, 503)
+
+
+def prompt_roster(prompt: str) -> list[dict]:
+    """The day roster a full or compact prompt was built from."""
+    match = STAFF_JSON.search(prompt)
+    if match:
+        return json.loads(match.group(1))
+    match = STAFF_LINES.search(prompt)
+    if not match:
+        return []
+    roster = []
+    for line in match.group(1).splitlines():
+        name, _, code = line.rpartition("|")
+        shift_name = SHIFT_CODES.get(code, (code,))[0]
+        roster.append({"name": name, "shift_name": shift_name, **SHIFT_TIME_MAP.get(shift_name, {})})
+    return roster
+
+
+def example_schedule() -> str:
+    body = EXPECTED_OUTPUT.split("<example response>", 1)[1].split("</example response>", 1)[0]
+    return "{" + body.strip().strip("{}") + "}"
+
+
+def template_response(messages: list[dict], structured: bool) -> str:
+    """A solver schedule for the prompt's roster, shaped like the model's answer."""
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    roster = prompt_roster(prompt)
+    if roster:
+        result = solve_schedule(roster)
+        payload = json.dumps({"assignments": result["assignments"]}, indent=1)
+    else:
+        payload = example_schedule()
+    return payload if structured else f"<response>\n{payload}\n</response>"
+
+
+class StubServer:
+    """Threaded stub server; use as a context manager or call ``start``/``stop``."""
+
+    def __init__(self, latency: float = 0.2, token_rate: float = 200.0, error_rate: float = 0.0,
+                 errors: tuple[int, ...] = ERRORS, structured: bool = True, respond=template_response,
+                 seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.errors = errors
+        self.structured = structured
+        self.respond = respond
+        self.requests = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True, name="stub-llm")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _injected_error(self) -> int | None:
+        with self._lock:
+            self.requests += 1
+            if self._rng.random() < self.error_rate:
+                self.failures += 1
+                return self._rng.choice(self.errors)
+        return None
+
+
+def _handler(server: StubServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._error(404, "Not found")
+            status = server._injected_error()
+            if status:
+                return self._error(status, "Injected failure")
+            structured = "response_format" in body
+            if structured and not server.structured:
+                return self._error(400, "response_format is not supported")
+
+            try:
+                content = server.respond(body.get("messages", []), structured)
+            except Exception as e:
+                return self._error(500, f"Responder failed: {e}")
+            usage = {
+                "prompt_tokens": sum(count_tokens(str(m.get("content", ""))) for m in body.get("messages", [])),
+                "completion_tokens": count_tokens(content),
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            time.sleep(server.latency)
+            if body.get("stream"):
+                include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+                self._stream(body.get("model", "stub"), content, usage if include_usage else None)
+            else:
+                time.sleep(usage["completion_tokens"] / server.token_rate)
+                self._json(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion",
+                    "created": int(time.time()), "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}],
+                    "usage": usage,
+                })
+
+        def _json(self, status: int, payload: dict) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, status: int, message: str) -> None:
+            self._json(status, {"error": {"message": message, "type": "stub_error", "code": status}})
+
+        def _stream(self, model: str, content: str, usage: dict | None) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            chunk_id, created = f"chatcmpl-{uuid.uuid4().hex}", int(time.time())
+
+            def send(delta: dict, finish: str | None = None, **extra) -> None:
+                chunk = {
+                    "id": chunk_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}] if delta is not None else [],
+                    **extra,
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+            pieces = STREAM_PIECES.findall(content)
+            per_tick = max(1, round(server.token_rate * TICK))
+            send({"role": "assistant", "content": ""})
+            for i in range(0, len(pieces), per_tick):
+                send({"content": "".join(pieces[i:i + per_tick])})
+                time.sleep(per_tick / server.token_rate)
+            send({}, "stop")
+            if usage:
+                send(None, usage=usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="completion tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--no-structured", action="store_true", help="reject response_format with a 400")
+    args = parser.parse_args()
+
+    server = StubServer(args.latency, args.token_rate, args.error_rate, structured=not args.no_structured,
+                        host=args.host, port=args.port)
+    print(f"Serving chat completions on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
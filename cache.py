@@ -0,0 +1,236 @@
+"""Caches for generated schedules and for derived UI artifacts.
+
+Entries are content-addressed: the key is a hash of the canonicalised roster
+(sorted names, shifts, day), the backend, the model name and the prompt
+template, so the same roster hits regardless of the order it was shuffled
+into. A small in-memory LRU sits on top of a JSON-file store on disk; both
+evict by size and TTL. Only schedules that pass validation are admitted.
+
+``memoize`` caches any pure stage (parse, filter, render, validate, export)
+on a content hash of its arguments so Streamlit reruns with unchanged
+inputs skip the work; ``stage_stats`` reports hits and misses per stage.
+"""
+
+import copy
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+
+import metrics
+import prompt
+from lru import LRUCache
+
+CACHE_DIR = os.environ.get(
+    "HK_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "schedules")
+)
+TTL_SECONDS = 7 * 24 * 3600
+MEMORY_ENTRIES = 128
+DISK_ENTRIES = 1000
+STAGE_ENTRIES = 32
+
+
+class DiskStore:
+    """One JSON file per key; oldest files are dropped past ``max_entries``."""
+
+    def __init__(self, path: str = CACHE_DIR, ttl: float | None = TTL_SECONDS,
+                 max_entries: int = DISK_ENTRIES, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+
+    def get(self, key: str):
+        item = self.item(key)
+        return None if item is None else item[1]
+
+    def item(self, key: str) -> tuple[float, object] | None:
+        """``(created, value)`` of a live entry."""
+        try:
+            with open(self._file(key)) as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if self.ttl is not None and self.clock() - entry["created"] > self.ttl:
+            self.delete(key)
+            return None
+        return entry["created"], entry["value"]
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            tmp = self._file(key) + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"created": self.clock(), "value": value}, f)
+            os.replace(tmp, self._file(key))
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        # Called with the lock held; other processes may still remove files underneath
+        files = [f for f in os.listdir(self.path) if f.endswith(".json")]
+        if len(files) <= self.max_entries:
+            return
+
+        def mtime(f):
+            try:
+                return os.path.getmtime(os.path.join(self.path, f))
+            except OSError:
+                return 0.0
+        files.sort(key=mtime)
+        for f in files[: len(files) - self.max_entries]:
+            self.delete(f[: -len(".json")])
+
+
+def template_hash(compact: bool = False) -> str:
+    """Fingerprint of the prompt template; changes whenever the prompt text does."""
+    return hashlib.sha256(prompt.build_prompt([], compact).encode()).hexdigest()[:16]
+
+
+def schedule_key(day_staff: list[dict], backend: str = "llm", compact: bool = False) -> str:
+    roster = sorted(
+        (s["name"], s.get("day", ""), s["shift_name"], s["start_time"], s["end_time"]) for s in day_staff
+    )
+    payload = json.dumps(
+        {"roster": roster, "backend": backend, "model": prompt.MODEL_NAME, "template": template_hash(compact)},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ScheduleCache:
+    def __init__(self, memory: LRUCache | None = None, disk: DiskStore | None = None):
+        self.memory = memory or LRUCache(MEMORY_ENTRIES, ttl=TTL_SECONDS)
+        self.disk = disk or DiskStore()
+
+    def get(self, key: str) -> tuple[dict, str] | None:
+        """The cached ``(result, raw)``; the result is a copy, so callers may edit it."""
+        entry = self.memory.get(key)
+        if entry is None:
+            item = self.disk.item(key)
+            if item is None:
+                return None
+            # Promoted entries keep their age, so the TTL still counts from when they were generated
+            created, entry = item
+            self.memory.set(key, entry, created=created)
+        return copy.deepcopy(entry["result"]), entry["raw"]
+
+    def admit(self, key: str, result: dict | None, raw: str) -> bool:
+        """Store ``result`` only if it is a schedule with zero rule violations."""
+        if prompt.score_schedule(result) != 0:
+            return False
+        entry = {"result": copy.deepcopy(result), "raw": raw}
+        self.memory.set(key, entry)
+        self.disk.set(key, entry)
+        return True
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_schedule_cache() -> ScheduleCache:
+    """Process-wide cache shared by every Streamlit session."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ScheduleCache()
+    return _cache
+
+
+def cached_generate_schedule(
+    day_staff: list[dict], backend: str = "llm", samples: int = 1, bypass_cache: bool = False,
+    compact: bool = False,
+) -> tuple[dict | None, str, bool]:
+    """``generate_schedule`` behind the cache; returns ``(result, raw, cache_hit)``.
+
+    ``bypass_cache`` skips the lookup (Regenerate) but still admits the new result.
+    The solver is deterministic and fast, so it is never cached.
+    """
+    with metrics.span("generate", backend=backend, rows=len(day_staff), cache_hit=False) as span:
+        if backend == "solver":
+            return *prompt.generate_schedule(day_staff, backend=backend), False
+
+        cache = get_schedule_cache()
+        key = schedule_key(day_staff, backend, compact)
+        if not bypass_cache:
+            hit = cache.get(key)
+            if hit is not None:
+                span["cache_hit"] = True
+                return *hit, True
+
+        result, raw = prompt.generate_schedule(day_staff, backend=backend, samples=samples, compact=compact)
+        cache.admit(key, result, raw)
+        return result, raw, False
+
+
+# --- Stage memoization ---
+
+_MISSING = object()
+_stages: dict[str, LRUCache] = {}
+_stages_lock = threading.Lock()
+
+
+def content_hash(*parts) -> str:
+    """SHA-256 over raw bytes or canonical JSON of each part."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            h.update(bytes(part))
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def memoize(stage: str, maxsize: int = STAGE_ENTRIES):
+    """Cache a pure function's results per content hash of its arguments.
+
+    Cached values are shared between callers and reruns, so they must not be
+    mutated.
+    """
+    def decorator(fn):
+        cache = _stages.setdefault(stage, LRUCache(maxsize))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = content_hash(*args, *sorted(kwargs.items()))
+            with _stages_lock:
+                value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = fn(*args, **kwargs)
+                with _stages_lock:
+                    cache.set(key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def stage_stats() -> dict[str, dict]:
+    return {
+        stage: {"hits": c.hits, "misses": c.misses, "entries": len(c)}
+        for stage, c in _stages.items()
+    }
+
+
+metrics.RECORDER.register(
+    "hk_memo_hits_total", "Memoized stage calls served from the rerun cache.",
+    lambda: {stage: c.hits for stage, c in _stages.items()},
+)
+metrics.RECORDER.register(
+    "hk_memo_misses_total", "Memoized stage calls that ran the stage.",
+    lambda: {stage: c.misses for stage, c in _stages.items()},
+)
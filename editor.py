@@ -0,0 +1,160 @@
+"""Manual edits to a generated schedule with incremental re-validation.
+
+``ScheduleEditor`` keeps the rule engine's counters next to the schedule:
+category counts per slot, hours per person and category, and one violation
+mask per rule. Changing a cell adjusts the counters for that slot and that
+person and re-checks only the slices of each rule mask that can have
+changed, so an edit costs the same however large the roster is. ``results``
+gives the same report as ``rules.validate_constraints``.
+"""
+
+import numpy as np
+
+from matrix import EMPTY, REGISTRY, ScheduleMatrix, inferred_hours
+from rules import (
+    CATEGORY_INDEX, COMPILED, SLOT_INDEX, SLOTS, Occupancy,
+    _category_codes, _cells, _missing_breaks, _shift_masks, rule_masks,
+)
+
+HALF_HOUR = SLOT_INDEX["20:30"]
+# The half-hour slot counts as active when its hour is (see rules._active_slots)
+ACTIVE_FROM = np.arange(len(SLOTS))
+ACTIVE_FROM[HALF_HOUR] = SLOT_INDEX["20:00"]
+BREAK = CATEGORY_INDEX["Break"]
+
+
+class ScheduleEditor:
+    def __init__(self, assignments: list[dict]):
+        self.matrix = ScheduleMatrix.from_assignments(assignments)
+        self.employees, self.row_employee = self.matrix.row_employees()
+        self.occ, self.busy, _ = self.matrix.cell_counts()
+        o = self.matrix.occupancy()
+        self.in_shift, self.break_window, self.has_shift = o.in_shift, o.break_window, o.has_shift
+        # Without a parseable shift field the shift is inferred from the first task, which edits can move
+        no_tasks = np.full(len(self.employees), len(SLOTS))
+        self.inferred = [h is None for h in self.matrix.shift_hours(no_tasks)]
+        self.first = np.where(self.busy.any(axis=1), (self.busy > 0).argmax(axis=1), len(SLOTS))
+
+        self.counts = (self.occ > 0).sum(axis=0)      # (S, C) people per slot and category
+        self.hours = (self.occ > 0).sum(axis=1)       # (E, C) slots per person and category
+        self.slot_busy = (self.busy > 0).sum(axis=0)  # (S,) people scheduled per slot
+        self.masks = rule_masks(o)
+        self.missing = _missing_breaks(o)
+        self.totals = np.array([int(m.sum()) for m in self.masks])
+        self.kinds = [cr.rule.kind for cr in COMPILED]
+        self.breaks_rule = self.kinds.index("breaks")
+        self.edits = 0
+
+    # --- Editing ---
+
+    def task(self, row: int, time: str) -> str:
+        return REGISTRY.names[self.matrix.codes[row, SLOT_INDEX[time]]]
+
+    def set_task(self, row: int, time: str, task: str | None) -> None:
+        """Put ``task`` (None or "" clears it) in one cell and update the affected rule counters."""
+        s = SLOT_INDEX[time]
+        extra = self.matrix.meta[row].extra_tasks
+        old, new = int(self.matrix.codes[row, s]), REGISTRY.code(task) if task else EMPTY
+        if old == new and time not in extra:
+            return
+        e = self.row_employee[row]
+        if old != EMPTY:
+            self._count(e, s, self._categories(old), -1)
+        if time in extra:
+            # A blank or non-string entry under this slot counted as a task; the edit replaces it
+            self._count(e, s, np.array(_category_codes(extra.pop(time))), -1)
+        if new != EMPTY:
+            self._count(e, s, self._categories(new), +1)
+        self.matrix.codes[row, s] = new
+        self.edits += 1
+        self._refresh(e, s)
+
+    def swap(self, row_a: int, time_a: str, row_b: int, time_b: str) -> None:
+        """Exchange two cells: two people in one slot, or one person's tasks at two times."""
+        a, b = self.task(row_a, time_a), self.task(row_b, time_b)
+        self.set_task(row_a, time_a, b)
+        self.set_task(row_b, time_b, a)
+
+    @staticmethod
+    def _categories(code: int) -> np.ndarray:
+        return np.flatnonzero(REGISTRY.occupancy()[code])
+
+    def _count(self, e: int, s: int, cats: np.ndarray, delta: int) -> None:
+        busy_before = self.busy[e, s] > 0
+        self.busy[e, s] += delta
+        if (self.busy[e, s] > 0) != busy_before:
+            self.slot_busy[s] += delta
+        held_before = self.occ[e, s, cats] > 0
+        self.occ[e, s, cats] += delta
+        changed = cats[(self.occ[e, s, cats] > 0) != held_before]
+        self.counts[s, changed] += delta
+        self.hours[e, changed] += delta
+
+    def _refresh(self, e: int, s: int) -> None:
+        if self.inferred[e]:
+            busy = np.flatnonzero(self.busy[e])
+            first = busy[0] if len(busy) else len(SLOTS)
+            if first != self.first[e]:
+                self.first[e] = first
+                self._set_shift(e, inferred_hours(first))
+        slots = [s, HALF_HOUR] if ACTIVE_FROM[HALF_HOUR] == s else [s]
+        for i, (cr, kind) in enumerate(zip(COMPILED, self.kinds)):
+            if kind == "count":
+                for t in slots:
+                    active = self.slot_busy[ACTIVE_FROM[t]] > 0
+                    c = self.counts[t, cr.cats][:, None]
+                    self._put(i, (slice(None), t), cr.mask[:, t] & active & ((c < cr.lo) | (c > cr.hi))[:, 0])
+            elif kind == "per_person":
+                self._put(i, e, self.hours[e, cr.cats] > cr.hi[:, 0])
+            elif kind == "double_booking":
+                self._put(i, (e, s), self.busy[e, s] > 1)
+            elif kind == "shift_hours":
+                self._put(i, e, (self.busy[e] > 0) & ~self.in_shift[e] & self.has_shift[e])
+            elif kind == "breaks":
+                self._put(i, e, self._break_row(e))
+
+    def _put(self, i: int, index, values) -> None:
+        mask = self.masks[i]
+        self.totals[i] += int(np.sum(values)) - int(np.sum(mask[index]))
+        mask[index] = values
+
+    def _break_row(self, e: int) -> np.ndarray:
+        window = self.break_window[e]
+        breaks = self.occ[e, :, BREAK] > 0
+        inside = breaks & window
+        self.missing[e] = window.any() and not inside.any()
+        extra = inside & (np.cumsum(inside) > 1)
+        return ((breaks & ~window) | extra) & window.any()
+
+    def _set_shift(self, e: int, hours: tuple[int, int] | None) -> None:
+        self.has_shift[e] = hours is not None
+        if hours is None:
+            self.in_shift[e], self.break_window[e] = True, False
+        else:
+            self.in_shift[e], self.break_window[e] = _shift_masks(hours)
+
+    # --- Reporting ---
+
+    @property
+    def total(self) -> int:
+        """All violations, the same figure as ``violation_counts(...).sum()``."""
+        return int(self.totals.sum() + self.missing.sum())
+
+    def violation_counts(self) -> np.ndarray:
+        counts = self.totals.copy()
+        counts[self.breaks_rule] += int(self.missing.sum())
+        return counts
+
+    def results(self) -> list[dict]:
+        """The ``validate_constraints`` report for the edited schedule."""
+        o = Occupancy(self.employees, self.occ > 0, self.busy, self.in_shift, self.break_window, self.has_shift)
+        results = []
+        for cr, mask in zip(COMPILED, self.masks):
+            cells = _cells(cr, mask, o)
+            if cr.rule.kind == "breaks":
+                cells += [{"employee": self.employees[e], "time": None} for e in np.flatnonzero(self.missing)]
+            results.append({"rule": cr.rule.name, "pass": not cells, "violations": len(cells), "cells": cells})
+        return results
+
+    def to_assignments(self) -> list[dict]:
+        return self.matrix.to_assignments()
@@ -0,0 +1,16 @@
+"""Schedule file exports shared by the app and the command line."""
+
+import pandas as pd
+
+from matrix import ScheduleMatrix
+
+
+def assignments_to_csv(assignments: list[dict] | ScheduleMatrix) -> str:
+    if isinstance(assignments, ScheduleMatrix):
+        return pd.DataFrame(list(assignments.records()), columns=["Employee", "Time", "Task"]).to_csv(index=False)
+    rows = []
+    for a in assignments:
+        for time, task in a["tasks"].items():
+            rows.append({"Employee": a["employee"], "Time": time, "Task": task})
+    df = pd.DataFrame(rows)
+    return df.to_csv(index=False)
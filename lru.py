@@ -0,0 +1,59 @@
+"""Thread-safe LRU mapping with an optional TTL.
+
+Kept free of project imports so lightweight modules (``supabase_client``)
+can cache without loading the LLM and solver stack that ``cache`` pulls in.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded mapping with least-recently-used eviction and an optional TTL; thread-safe."""
+
+    def __init__(self, maxsize: int = 128, ttl: float | None = None, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and self.ttl is not None and self.clock() - item[0] > self.ttl:
+                del self._data[key]
+                item = None
+            if item is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, created: float | None = None) -> None:
+        """Store ``value``; ``created`` keeps the age of an entry copied from another store."""
+        with self._lock:
+            self._data[key] = (self.clock() if created is None else created, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,6 +1,178 @@
-def main():
-    print("Hello from hk-task-scheduler-v2!")
+"""Generate schedules without the UI.
+
+    python main.py roster.xlsx --backend solver --out schedules/
+    python main.py roster.csv --week-start 2026-10-19 --days Monday Thursday --formats csv json png
+    python main.py roster.xlsx --start 2026-10-19 --end 2026-11-01 --compact --workers 4
+
+The roster is dated as in the app: ``--week-start`` is the first sheet's
+week and each further sheet the week after. Every selected date is
+generated on the week thread pool (the LLM calls are network-bound), then
+validated and written to ``--out`` as ``<date>_<Day>.csv``/``.json``/``.png``
+together with ``summary.json``. The exit status is 1 when any day could not
+be generated. Pipeline modules are imported after argument parsing, the LLM
+client only for ``--backend llm`` and the browser only when PNGs are requested.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+BACKENDS = ["llm", "solver"]
+FORMATS = ["csv", "json", "png"]
+
+
+def _date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO date: {value!r}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="hk-scheduler", description=__doc__.splitlines()[0])
+    parser.add_argument("roster", help="Excel or CSV roster: a Name column and one column per day")
+    parser.add_argument("--week-start", type=_date, help="date in the roster's first week (default: this week)")
+    parser.add_argument("--days", nargs="+", metavar="DAY", help="weekdays of the first week, e.g. Monday thu")
+    parser.add_argument("--start", type=_date, help="first date to generate (default: the roster's first)")
+    parser.add_argument("--end", type=_date, help="last date to generate, inclusive (default: the roster's last)")
+    parser.add_argument("--backend", choices=BACKENDS, default="llm")
+    parser.add_argument("--samples", type=int, default=1, help="parallel LLM samples per day")
+    parser.add_argument("--compact", action="store_true", help="use the compact prompt")
+    parser.add_argument("--no-repair", action="store_true",
+                        help="keep rule violations instead of repairing them (the solver is never repaired)")
+    parser.add_argument("--no-cache", action="store_true", help="skip cached schedules (results are still cached)")
+    parser.add_argument("--workers", type=int, help="days generated concurrently (default HK_WEEK_WORKERS)")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["csv", "json"])
+    parser.add_argument("--out", default="schedules", help="output directory (default: schedules)")
+    args = parser.parse_args(argv)
+    if args.days and (args.start or args.end):
+        parser.error("--days cannot be combined with --start/--end")
+    return args
+
+
+def select_dates(store, week_start: date, days: list[str] | None = None,
+                 start: date | None = None, end: date | None = None) -> list[date]:
+    """Rostered dates to generate: named weekdays of the first week, or a date range."""
+    from roster_store import WEEKDAYS, monday
+
+    if days:
+        try:
+            offsets = sorted({WEEKDAYS[d.strip().lower()] for d in days})
+        except KeyError as e:
+            raise ValueError(f"Unknown day: {e.args[0]}") from None
+        candidates = [monday(week_start) + timedelta(days=i) for i in offsets]
+    else:
+        first, last = start or store.first_date, end or store.last_date
+        if first is None or last is None:
+            return []
+        candidates = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+    return [d for d in candidates if store.on(d)]
+
+
+def label(day: date) -> str:
+    return f"{day.isoformat()}_{day.strftime('%A')}"
+
+
+def write_day(out: str, day: date, day_result, validation: list[dict], formats: list[str], render=None) -> None:
+    from export import assignments_to_csv
+
+    name = os.path.join(out, label(day))
+    assignments = day_result.result["assignments"]
+    if "csv" in formats:
+        with open(f"{name}.csv", "w", newline="") as f:
+            f.write(assignments_to_csv(assignments))
+    if "json" in formats:
+        with open(f"{name}.json", "w") as f:
+            json.dump({
+                "date": day.isoformat(), "day": day.strftime("%A"), **day_result.result,
+                "repair": day_result.repair and {k: v for k, v in day_result.repair.items() if k != "assignments"},
+                "validation": validation,
+            }, f, indent=1)
+    if "png" in formats and render is not None:
+        with open(f"{name}.png", "wb") as f:
+            f.write(render(assignments))
+
+
+def _png_renderer():
+    from render import get_render_worker
+    from timeline import TIMELINE_STYLE, TIMELINE_WIDTH, timeline_body
+
+    worker = get_render_worker()
+
+    def render(assignments: list[dict]) -> bytes:
+        ordered = sorted(assignments, key=lambda a: min(a["tasks"].keys(), default=""))
+        return worker.png(timeline_body(ordered), TIMELINE_WIDTH, head=TIMELINE_STYLE)
+    return render
+
+
+def run(args: argparse.Namespace, log=print) -> dict:
+    """Generate, validate and write every selected date; returns the summary written to ``summary.json``."""
+    from roster import iter_uploaded_file
+    from roster_store import RosterStore, monday
+    from rules import validate_constraints
+    from week import WEEK_WORKERS, iter_days
+
+    week_start = monday(args.week_start or date.today())
+    with open(args.roster, "rb") as f:
+        # Streamed straight into the columnar store; the entry dicts are never all held at once
+        store = RosterStore.from_schedule(iter_uploaded_file(f), week_start)
+    dates = select_dates(store, week_start, args.days, args.start, args.end)
+    os.makedirs(args.out, exist_ok=True)
+    render = _png_renderer() if "png" in args.formats else None
+    by_label = {label(d): d for d in dates}
+    log(f"{len(store)} roster entries; generating {len(dates)} day(s) with {args.backend}")
+
+    started = time.perf_counter()
+    days = []
+    rosters = {key: store.day_roster(d) for key, d in by_label.items()}
+    # As in the app, solver schedules are not repaired: their "unfilled" gaps would no longer match
+    auto_repair = args.backend != "solver" and not args.no_repair
+    results = iter_days(
+        rosters, backend=args.backend, samples=args.samples, compact=args.compact,
+        auto_repair=auto_repair, bypass_cache=args.no_cache, workers=args.workers or WEEK_WORKERS,
+    )
+    for r in results:
+        day = by_label[r.day]
+        entry = {"date": day.isoformat(), "day": day.strftime("%A"), "staff": len(rosters[r.day]), "ok": r.ok,
+                 "seconds": round(r.seconds, 3), "attempts": r.attempts, "cache_hit": r.cache_hit, "error": r.error}
+        if r.ok:
+            validation = validate_constraints(r.result["assignments"])
+            entry["violations"] = sum(v["violations"] for v in validation)
+            try:
+                write_day(args.out, day, r, validation, args.formats, render)
+            except Exception as e:
+                entry["ok"], entry["error"] = False, f"Could not write outputs: {e}"
+        days.append(entry)
+        if entry["ok"]:
+            log(f"✓ {r.day}: {entry['staff']} staff, {entry['violations']} violation(s), {r.seconds:.1f}s")
+        else:
+            log(f"✗ {r.day}: {entry['error']}")
+
+    days.sort(key=lambda e: e["date"])
+    summary = {
+        "roster": os.path.abspath(args.roster), "backend": args.backend, "week_start": week_start.isoformat(),
+        "seconds": round(time.perf_counter() - started, 3), "days": days,
+    }
+    with open(os.path.join(args.out, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=1)
+    return summary
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    try:
+        summary = run(args)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    failed = sum(not d["ok"] for d in summary["days"])
+    print(f"{len(summary['days']) - failed}/{len(summary['days'])} day(s) written to {args.out} "
+          f"in {summary['seconds']:.1f}s")
+    return 1 if failed or not summary["days"] else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
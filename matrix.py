@@ -0,0 +1,205 @@
+"""Array-backed schedule representation.
+
+A ``ScheduleMatrix`` holds one small-int task code per assignment row and
+slot. Codes come from a process-wide ``TaskRegistry`` that interns every
+task spelling once and records its rule categories, so "Restroom_2" and
+"Restroom 2" are told apart for display but count as the same task for
+the rules. Everything that is not a grid cell (shift, break, other fields,
+task keys that are not ``HH:MM`` slots) is kept per row, so converting
+from and back to LLM JSON is lossless.
+"""
+
+import threading
+from collections.abc import Iterator
+
+import numpy as np
+
+from rules import (
+    CATEGORIES, SHIFT_HOURS, SLOT_INDEX, SLOT_MINUTES, SLOTS,
+    Occupancy, _category_codes, _shift_hours, _shift_masks, _slot_index, task_categories,
+)
+
+EMPTY = 0
+
+
+class TaskRegistry:
+    """Interned task spellings; code 0 is the empty cell."""
+
+    def __init__(self):
+        self.names = [""]
+        self._codes = {"": EMPTY}
+        self._rows = [np.zeros(len(CATEGORIES), dtype=bool)]
+        self._occupancy = None
+        self._lookup = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def code(self, task: str) -> int:
+        code = self._codes.get(task)
+        if code is not None:
+            return code
+        with self._lock:
+            code = self._codes.get(task)
+            if code is None:
+                if len(self.names) > np.iinfo(np.uint16).max:
+                    raise ValueError("Task registry is full")
+                row = np.zeros(len(CATEGORIES), dtype=bool)
+                row[list(_category_codes(task))] = True
+                self._rows.append(row)
+                self.names.append(task)
+                code = self._codes[task] = len(self.names) - 1
+                self._occupancy = self._lookup = None
+            return code
+
+    def categories(self, code: int) -> tuple[str, ...]:
+        return task_categories(self.names[code]) if code else ()
+
+    def occupancy(self) -> np.ndarray:
+        """(codes, C) bool: the rule categories each code counts towards."""
+        table = self._occupancy
+        if table is None or len(table) < len(self.names):
+            table = self._occupancy = np.stack(self._rows[:len(self.names)])
+        return table
+
+    def lookup(self) -> np.ndarray:
+        """Code -> spelling, as an object array for vectorized decoding."""
+        table = self._lookup
+        if table is None or len(table) < len(self.names):
+            table = self._lookup = np.array(self.names, dtype=object)
+        return table
+
+
+REGISTRY = TaskRegistry()
+
+
+class RowMeta:
+    """Per-row data that does not fit the grid."""
+
+    __slots__ = ("fields", "extra_tasks")
+
+    def __init__(self, fields: dict, extra_tasks: dict):
+        self.fields = fields            # every key but "tasks", in the original order
+        self.extra_tasks = extra_tasks  # task entries whose key is not a slot or whose value is not a string
+
+    @property
+    def employee(self) -> str:
+        return self.fields["employee"]
+
+
+class ScheduleMatrix:
+    """Rows x ``SLOTS`` task codes plus per-row metadata."""
+
+    __slots__ = ("codes", "meta")
+
+    def __init__(self, codes: np.ndarray, meta: list[RowMeta]):
+        self.codes = codes
+        self.meta = meta
+
+    @classmethod
+    def from_assignments(cls, assignments: list[dict]) -> "ScheduleMatrix":
+        codes = np.zeros((len(assignments), len(SLOTS)), dtype=np.uint16)
+        meta = []
+        for r, a in enumerate(assignments):
+            extra = {}
+            for time, task in a["tasks"].items():
+                s = SLOT_INDEX.get(time)
+                if s is None or not isinstance(task, str) or not task:
+                    extra[time] = task
+                else:
+                    codes[r, s] = REGISTRY.code(task)
+            meta.append(RowMeta({k: v for k, v in a.items() if k != "tasks"}, extra))
+        return cls(codes, meta)
+
+    def to_assignments(self) -> list[dict]:
+        names = REGISTRY.lookup()
+        out = []
+        for row, m in zip(self.codes, self.meta):
+            filled = np.flatnonzero(row)
+            tasks = dict(zip([SLOTS[s] for s in filled], names[row[filled]].tolist()))
+            out.append({**m.fields, "tasks": {**tasks, **m.extra_tasks}})
+        return out
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    @property
+    def employees(self) -> list[str]:
+        return [m.employee for m in self.meta]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
+
+    def tasks(self, slots: list[str] = SLOTS) -> Iterator[tuple[str, tuple[str, ...]]]:
+        """(employee, task per slot) for every row; idle slots are ""."""
+        names = REGISTRY.lookup()
+        decoded = names[self.codes[:, [SLOT_INDEX[s] for s in slots]]]
+        for m, row in zip(self.meta, decoded):
+            yield m.employee, tuple(row)
+
+    def records(self) -> Iterator[tuple[str, str, object]]:
+        """(employee, time, task) for every task entry, grid slots first."""
+        names = REGISTRY.lookup()
+        for row, m in zip(self.codes, self.meta):
+            for s in np.flatnonzero(row):
+                yield m.employee, SLOTS[s], names[row[s]]
+            for time, task in m.extra_tasks.items():
+                yield m.employee, time, task
+
+    def row_employees(self) -> tuple[list[str], np.ndarray]:
+        """Distinct employees in first-seen order, and each row's index into them."""
+        employees = list(dict.fromkeys(self.employees))
+        index = {name: e for e, name in enumerate(employees)}
+        return employees, np.array([index[m.employee] for m in self.meta], dtype=np.intp)
+
+    def cell_counts(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per employee: (E, S, C) task entries per category, (E, S) entries, and (E,) first busy slot.
+
+        Off-grid task keys that still name a slot (e.g. "7:00") are counted.
+        """
+        employees, row_employee = self.row_employees()
+        E, S, C = len(employees), len(SLOTS), len(CATEGORIES)
+        occ = np.zeros((E, S, C), dtype=np.int16)
+        busy = np.zeros((E, S), dtype=np.int16)
+        np.add.at(occ, row_employee, REGISTRY.occupancy()[self.codes])
+        np.add.at(busy, row_employee, self.codes != EMPTY)
+        for e, m in zip(row_employee, self.meta):
+            for time, task in m.extra_tasks.items():
+                s = _slot_index(time)
+                if s is not None:
+                    busy[e, s] += 1
+                    occ[e, s, list(_category_codes(task))] += 1
+        first = np.where(busy.any(axis=1), (busy > 0).argmax(axis=1), S)
+        return occ, busy, first
+
+    def shift_hours(self, first: np.ndarray) -> list[tuple[int, int] | None]:
+        """Shift hours per employee: the first parseable ``shift`` field, else inferred from ``first``."""
+        employees, row_employee = self.row_employees()
+        hours = [None] * len(employees)
+        for e, m in zip(row_employee, self.meta):
+            if hours[e] is None:
+                hours[e] = _shift_hours(str(m.fields.get("shift", "")))
+        return [h or inferred_hours(f) for h, f in zip(hours, first)]
+
+    def occupancy(self) -> Occupancy:
+        """The rule engine's tensor form; equivalent to ``rules.encode(self.to_assignments())``."""
+        employees, _ = self.row_employees()
+        occ, busy, first = self.cell_counts()
+        E, S = busy.shape
+        in_shift = np.ones((E, S), dtype=bool)
+        break_window = np.zeros((E, S), dtype=bool)
+        has_shift = np.zeros(E, dtype=bool)
+        for e, hours in enumerate(self.shift_hours(first)):
+            if hours is not None:
+                has_shift[e] = True
+                in_shift[e], break_window[e] = _shift_masks(hours)
+        return Occupancy(employees, occ > 0, busy, in_shift, break_window, has_shift)
+
+
+def inferred_hours(first: int) -> tuple[int, int] | None:
+    """The shift that starts at slot ``first``, as ``rules.encode`` infers it."""
+    if first >= len(SLOTS):
+        return None
+    return next((h for h in SHIFT_HOURS.values() if h[0] * 60 == SLOT_MINUTES[first]), None)
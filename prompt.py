@@ -1,13 +1,29 @@
+import asyncio
 import json
 import os
 import re
+import time
+from collections.abc import Iterator
 
+import openai
 from dotenv import load_dotenv
-from openai import OpenAI
+
+import metrics
+from rules import score_schedule
+from solver import solve_schedule
+from transport import Transport, get_transport
 
 load_dotenv()
 
 MODEL_NAME = "meta-llama/Llama-3.3-70B-Instruct" # meta-llama/Llama-4-Maverick-17B-128E-Instruct #meta-llama/Llama-3.3-70B-Instruct"
+COMPLETION_PARAMS = {"model": MODEL_NAME, "temperature": .8, "max_tokens": 8000}
+
+# Ask for schema-constrained JSON until the backend rejects ``response_format``
+STRUCTURED_OUTPUT = os.environ.get("HK_STRUCTURED_OUTPUT", "1") != "0"
+UNSUPPORTED = (openai.BadRequestError, openai.UnprocessableEntityError)
+# Only a 400/422 that names the structured-output parameter turns it off; others are real errors
+SCHEMA_REJECTED = re.compile(r"response_format|json_schema|structured output|guided_json", re.I)
+_structured_output = STRUCTURED_OUTPUT
 
 EXPECTED_OUTPUT = """
 <example response>
@@ -262,33 +278,161 @@ OVERFLOW:
 12. Unassigned staff → Float_TRELLO, Float_0, Float_1, Float _-1 or Outdoor (1h blocks, 11:00-19:00)
 """
 
-def get_completion(prompt: str, system_prompt: str = "") -> str:
+def _api_key() -> str:
     api_key = os.environ.get("HF_TOKEN")
     if not api_key:
         raise ValueError("HF_TOKEN environment variable not set")
+    return api_key
 
-    client = OpenAI(
-        base_url="https://router.huggingface.co/v1",
-        api_key=api_key,
-    )
+
+def _transport() -> Transport:
+    return get_transport(_api_key())
+
+
+def _messages(prompt: str, system_prompt: str = "") -> list[dict]:
     messages = []
 
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
 
     messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def _disable_structured_output(error: Exception) -> None:
+    """Stop requesting ``response_format`` if ``error`` rejects it; re-raise anything else."""
+    global _structured_output
+    if not SCHEMA_REJECTED.search(f"{error} {getattr(error, 'body', '')}"):
+        raise error
+    _structured_output = False
+
+
+def get_completion(prompt: str, system_prompt: str = "") -> str:
+    transport, messages = _transport(), _messages(prompt, system_prompt)
+    if _structured_output:
+        try:
+            return transport.complete(messages, response_format=RESPONSE_FORMAT, **COMPLETION_PARAMS)
+        except UNSUPPORTED as e:
+            _disable_structured_output(e)
+    return transport.complete(messages, **COMPLETION_PARAMS)
+
+
+def stream_completion(prompt: str, system_prompt: str = "") -> Iterator[str]:
+    """Yield the completion text piece by piece as the model produces it."""
+    transport, messages = _transport(), _messages(prompt, system_prompt)
+    if _structured_output:
+        chunks = transport.stream(messages, response_format=RESPONSE_FORMAT, **COMPLETION_PARAMS)
+        try:
+            first = next(chunks, None)
+        except UNSUPPORTED as e:
+            _disable_structured_output(e)
+        else:
+            if first is not None:
+                yield first
+                yield from chunks
+            return
+    yield from transport.stream(messages, **COMPLETION_PARAMS)
+
+
+async def _acomplete(transport: Transport, prompt: str) -> str:
+    messages = _messages(prompt)
+    if _structured_output:
+        try:
+            return await transport.acomplete(messages, response_format=RESPONSE_FORMAT, **COMPLETION_PARAMS)
+        except UNSUPPORTED as e:
+            _disable_structured_output(e)
+    return await transport.acomplete(messages, **COMPLETION_PARAMS)
+
+
+# --- Compact prompt encoding ---
+
+SHIFT_CODES = {
+    "S1": ("shift_1", "Shift 1 (07:00-15:00)"),
+    "S2": ("shift_2", "Shift 2 (13:00-21:00)"),
+    "S3": ("shift_3", "Shift 3 (15:00-23:00)"),
+}
+
+TASK_CODES = {
+    "F-1": "Floor -1", "F0": "Floor 0", "F1": "Floor 1", "F2": "Floor 2", "F3": "Floor 3", "F4": "Floor 4",
+    "ODP": "Outdoor DP", "OH": "Outdoor Hallway", "OSH": "Outdoor Side Hallway",
+    "OMG": "Outdoor Main Gate", "DPV": "Design Pavilion", "OUT": "Outdoor",
+    "EG": "Egress", "BB": "BOH-Breakroom", "BR": "BOH-Restrooms",
+    "R2": "Restroom 2", "R4": "Restroom 4", "R24": "Restroom 2&4",
+    "FT": "Float_TRELLO", "FL0": "Float_0", "FL1": "Float_1", "FL-1": "Float_-1",
+    "BRK": "Break", "TR": "Trash Removal",
+}
+
+COMPACT_EXAMPLE = """{"assignments":[
+{"employee":"staff_1","shift":"S1","break":"11:00-12:00","tasks":{"07:00":"F0","08:00":"F0","09:00":"ODP","10:00":"EG","11:00":"BRK","12:00":"R4","13:00":"R4","14:00":"FL0"}},
+{"employee":"staff_7","shift":"S2","break":"17:00-18:00","tasks":{"13:00":"FL1","14:00":"R2","15:00":"EG","16:00":"R2","17:00":"BRK","18:00":"R4","19:00":"BB","20:00":"R4","20:30":"TR"}},
+{"employee":"staff_11","shift":"S3","break":"19:00-20:00","tasks":{"15:00":"R2","16:00":"R2","17:00":"OUT","18:00":"FT","19:00":"BRK","20:00":"R4","21:00":"R24","22:00":"R24"}}
+]}"""
+
+
+def encode_roster(day_schedule: list[dict]) -> str:
+    """One ``name|shift code`` line per person."""
+    codes = {shift_name: code for code, (shift_name, _) in SHIFT_CODES.items()}
+    return "\n".join(f"{s['name']}|{codes.get(s['shift_name'], s['shift_name'])}" for s in day_schedule)
+
+
+def expand_row(row: dict) -> dict:
+    """Map short task and shift codes in one assignment back to their full names."""
+    if not isinstance(row, dict):
+        return row
+    row = dict(row)
+    if row.get("shift") in SHIFT_CODES:
+        row["shift"] = SHIFT_CODES[row["shift"]][1]
+    if isinstance(row.get("tasks"), dict):
+        row["tasks"] = {t: TASK_CODES.get(task, task) for t, task in row["tasks"].items()}
+    return row
+
+
+def expand_task_codes(result: dict | None) -> dict | None:
+    if not result or not isinstance(result.get("assignments"), list):
+        return result
+    return {**result, "assignments": [expand_row(a) for a in result["assignments"]]}
 
-    response = client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=messages,
-        temperature=.8, 
-        max_tokens=8000
+
+def build_compact_prompt(day_schedule: list[dict]) -> str:
+    legend = " ".join(f"{code}={name}" for code, name in TASK_CODES.items())
+    shifts = " ".join(f"{code}={label}" for code, (_, label) in SHIFT_CODES.items())
+
+    prompt = TASK_CONTEXT
+    prompt += f"\n{TASK_DESCRIPTION}"
+    prompt += f"\n{CONSTRAINT}"
+    prompt += f"\nTask codes: {legend}\nShift codes: {shifts}"
+    prompt += f"\n\nStaff (name|shift):\n{encode_roster(day_schedule)}"
+    prompt += f"\n\nExample output (one employee per shift):\n{COMPACT_EXAMPLE}"
+    prompt += (
+        "\n\nCreate the schedule for every staff member above, strictly following the rules. "
+        "Use only task and shift codes. Put the JSON in <response></response> tags."
     )
+    return prompt
+
+
+# --- Token accounting ---
+
+TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def count_tokens(text: str) -> int:
+    """Estimate BPE tokens: words, digit runs and punctuation marks, with long
+    words split every ~6 characters. Exact counts come from the API usage in
+    ``Transport.calls``."""
+    return sum(1 + (len(p) - 1) // 6 for p in TOKEN_PIECES.findall(text or ""))
+
+
+def token_report(day_schedule: list[dict]) -> dict:
+    """Estimated prompt size of the full and compact encodings for a roster."""
+    full = count_tokens(build_prompt(day_schedule))
+    compact = count_tokens(build_compact_prompt(day_schedule))
+    return {"full": full, "compact": compact, "saved": 1 - compact / full}
 
-    return response.choices[0].message.content
 
+def build_prompt(day_schedule: list[dict], compact: bool = False) -> str:
+    if compact:
+        return build_compact_prompt(day_schedule)
 
-def build_prompt(day_schedule: list[dict]) -> str:
     examples = f"""
 Use this example as a template for your output:
 
@@ -321,33 +465,386 @@ Use this example as a template for your output:
     return prompt
 
 
-def parse_response(response_text: str) -> dict | None:
-    # Strip reasoning blocks from models (<think>, <scratchpad>, etc.)
-    cleaned = re.sub(r"<think>.*?</think>", "", response_text, flags=re.DOTALL)
-    cleaned = re.sub(r"<scratchpad>.*?</scratchpad>", "", cleaned, flags=re.DOTALL)
-
-    match = re.search(r"<response>(.*?)</response>", cleaned, re.DOTALL)
-    if match:
-        json_str = match.group(1).strip()
-    else:
-        json_str = cleaned.strip()
-
-    # Try to find JSON object in the text
-    json_str = json_str.replace("'", '"')
-    brace_start = json_str.find("{")
-    brace_end = json_str.rfind("}")
-    if brace_start != -1 and brace_end != -1:
-        json_str = json_str[brace_start : brace_end + 1]
+# --- Response parsing ---
+
+TIME_KEY = re.compile(r"\d{2}:\d{2}")
+
+ASSIGNMENTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "assignments": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "employee": {"type": "string"},
+                    "shift": {"type": "string"},
+                    "break": {"type": "string"},
+                    "tasks": {
+                        "type": "object",
+                        "propertyNames": {"pattern": "^\\d{2}:\\d{2}$"},
+                        "additionalProperties": {"type": "string"},
+                        "minProperties": 1,
+                    },
+                },
+                "required": ["employee", "tasks"],
+            },
+        },
+    },
+    "required": ["assignments"],
+}
 
+RESPONSE_FORMAT = {"type": "json_schema", "json_schema": {"name": "schedule", "schema": ASSIGNMENTS_SCHEMA}}
+
+
+class ParseError(ValueError):
+    """Raised when a response is not a schedule; says where parsing stopped."""
+
+    def __init__(self, message: str, text: str = "", pos: int | None = None, path: str = ""):
+        self.message = message
+        self.pos = pos
+        self.path = path
+        self.line = self.column = None
+        where = []
+        if pos is not None:
+            self.line = text.count("\n", 0, pos) + 1
+            self.column = pos - text.rfind("\n", 0, pos)
+            where.append(f"line {self.line}, column {self.column}")
+        if path:
+            where.append(f"at {path}")
+        super().__init__(f"{message} ({'; '.join(where)})" if where else message)
+
+
+# Reasoning blocks are skipped; a <response> body (closed or cut off) is read in preference to the rest
+REASONING = re.compile(r"<(think|scratchpad)>.*?</\1>", re.DOTALL)
+RESPONSE_BODY = re.compile(r"<response>(.*?)(?:</response>|$)", re.DOTALL)
+WHITESPACE = re.compile(r"\s*")
+LITERAL = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?|true|false|null")
+STRING_CHUNK = {'"': re.compile(r'[^"\\]*'), "'": re.compile(r"[^'\\]*")}
+ESCAPES = {'"': '"', "'": "'", "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class _Reader:
+    """Recursive-descent JSON reader that also accepts single-quoted strings
+    and trailing commas, and reports the offset of the first real error."""
+
+    def __init__(self, text: str, pos: int):
+        self.text = text
+        self.pos = pos
+
+    def fail(self, message: str):
+        raise ParseError(message, self.text, self.pos)
+
+    def peek(self) -> str:
+        self.pos = WHITESPACE.match(self.text, self.pos).end()
+        return self.text[self.pos : self.pos + 1]
+
+    def value(self):
+        ch = self.peek()
+        if ch == "{":
+            return self.container("}", self.member, {})
+        if ch == "[":
+            return self.container("]", self.item, [])
+        if ch in ('"', "'"):
+            return self.string()
+        match = LITERAL.match(self.text, self.pos)
+        if not match:
+            self.fail("unexpected end of response" if not ch else f"unexpected character {ch!r}")
+        self.pos = match.end()
+        return json.loads(match.group())
+
+    def container(self, close: str, read, out):
+        self.pos += 1
+        while self.peek() != close:
+            if not self.text[self.pos :]:
+                self.fail(f"unexpected end of response, expected {close!r}")
+            read(out)
+            ch = self.peek()
+            if ch == ",":
+                self.pos += 1
+            elif ch != close:
+                self.fail(f"expected ',' or {close!r}")
+        self.pos += 1
+        return out
+
+    def member(self, out: dict) -> None:
+        if self.peek() not in ('"', "'"):
+            self.fail("expected a quoted key")
+        key = self.string()
+        if self.peek() != ":":
+            self.fail("expected ':'")
+        self.pos += 1
+        out[key] = self.value()
+
+    def item(self, out: list) -> None:
+        out.append(self.value())
+
+    def string(self) -> str:
+        text, quote = self.text, self.text[self.pos]
+        chunk = STRING_CHUNK[quote]
+        self.pos += 1
+        parts = []
+        while True:
+            end = chunk.match(text, self.pos).end()
+            parts.append(text[self.pos : end])
+            self.pos = end
+            if end >= len(text):
+                self.fail("unterminated string")
+            if text[end] == quote:
+                self.pos += 1
+                return "".join(parts)
+            esc = text[end + 1 : end + 2]
+            if esc == "u" and re.fullmatch(r"[0-9a-fA-F]{4}", text[end + 2 : end + 6]):
+                parts.append(chr(int(text[end + 2 : end + 6], 16)))
+                self.pos = end + 6
+            elif esc in ESCAPES:
+                parts.append(ESCAPES[esc])
+                self.pos = end + 2
+            else:
+                self.pos = end
+                self.fail("invalid escape")
+
+
+def _decode(text: str, start: int) -> tuple[object, int]:
+    """The JSON value at ``start`` and the offset just past it."""
     try:
-        return json.loads(json_str)
+        return json.JSONDecoder().raw_decode(text, start)
     except json.JSONDecodeError:
-        return None
+        # Not strict JSON: re-read tolerantly, which also locates the real error
+        reader = _Reader(text, start)
+        return reader.value(), reader.pos
+
+
+def _payload(text: str) -> dict:
+    """The first top-level object that is a schedule, inside ``<response>`` when the tag is present.
+
+    Prose or example JSON before the schedule is skipped; if nothing
+    qualifies, the first candidate's error is raised.
+    """
+    # Blank out reasoning blocks so error offsets still point into ``text``
+    text = REASONING.sub(lambda m: " " * len(m.group()), text)
+    body = RESPONSE_BODY.search(text)
+    pos, end = (body.start(1), body.end(1)) if body else (0, len(text))
+    error = None
+    while (start := text.find("{", pos, end)) != -1:
+        pos = start + 1
+        try:
+            data, pos = _decode(text, start)
+            return check_schedule(data)
+        except ParseError as e:
+            error = error or e
+    raise error or ParseError("no JSON object in response")
+
+
+def check_schedule(data) -> dict:
+    """Validate parsed JSON against ``ASSIGNMENTS_SCHEMA``; raise ParseError with a path."""
+    if not isinstance(data, dict) or not isinstance(data.get("assignments"), list):
+        raise ParseError("expected an object with an 'assignments' list", path="$")
+    for i, row in enumerate(data["assignments"]):
+        path = f"assignments[{i}]"
+        if not isinstance(row, dict):
+            raise ParseError("expected an object", path=path)
+        if not isinstance(row.get("employee"), str):
+            raise ParseError("missing or non-string 'employee'", path=path)
+        for key in ("shift", "break"):
+            if key in row and not isinstance(row[key], str):
+                raise ParseError(f"'{key}' must be a string", path=f"{path}.{key}")
+        tasks = row.get("tasks")
+        if not isinstance(tasks, dict):
+            raise ParseError("missing or non-object 'tasks'", path=f"{path}.tasks")
+        if not tasks:
+            raise ParseError("'tasks' is empty", path=f"{path}.tasks")
+        for time, task in tasks.items():
+            if not TIME_KEY.fullmatch(time):
+                raise ParseError("task key is not a HH:MM time", path=f"{path}.tasks[{time!r}]")
+            if not isinstance(task, str):
+                raise ParseError("task must be a string", path=f"{path}.tasks[{time!r}]")
+    return data
+
+
+def parse_schedule(response_text: str) -> dict:
+    """Parse and validate a schedule response.
+
+    Reasoning blocks are skipped and the ``<response>`` body is read when the
+    tag is present; within it (or the whole text) each top-level object is
+    tried in turn, so prose or example JSON before the schedule is ignored.
+    Well-formed JSON is decoded in a single pass; single quotes and trailing
+    commas are tolerated. Anything else raises ParseError.
+    """
+    with metrics.span("parse_response", bytes=len(response_text)) as span:
+        result = _payload(response_text)
+        span["rows"] = len(result["assignments"])
+    return result
 
 
-def generate_schedule(day_schedule: list[dict]) -> tuple[dict | None, str]:
-    prompt = build_prompt(day_schedule)
-    response = get_completion(prompt)
-    return parse_response(response), response
+def parse_response(response_text: str) -> dict | None:
+    try:
+        return parse_schedule(response_text)
+    except ParseError:
+        return None
 
 
+ASSIGNMENTS_KEY = re.compile(r'"assignments"\s*:\s*\[')
+
+
+class AssignmentStream:
+    """Incremental parser that emits each ``assignments[i]`` object as soon as
+    its closing brace arrives. Every character is scanned once."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.done = False
+        self._pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._start = None
+
+    def feed(self, chunk: str) -> list[dict]:
+        self.buffer += chunk
+        if self.done:
+            return []
+        if not self._in_array:
+            # Step back a little in case the key was split across chunks
+            match = ASSIGNMENTS_KEY.search(self.buffer, max(0, self._pos - 32))
+            self._pos = len(self.buffer)
+            if not match:
+                return []
+            self._in_array = True
+            self._pos = match.end()
+
+        rows = []
+        buf = self.buffer
+        for i in range(self._pos, len(buf)):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0 and self._start is not None:
+                    try:
+                        rows.append(json.loads(buf[self._start : i + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._start = None
+            elif ch == "]" and self._depth == 0:
+                self.done = True
+                break
+        self._pos = len(buf)
+        return rows
+
+
+class ScheduleStream:
+    """Stream a schedule from the LLM, yielding each assignment row as it completes.
+
+    ``first_row_seconds`` (time to first row) and ``total_seconds`` are set
+    as the stream progresses; ``result()`` parses the full response at the end.
+    """
+
+    def __init__(self, day_schedule: list[dict], compact: bool = False):
+        self.prompt = build_prompt(day_schedule, compact)
+        self.compact = compact
+        self.rows = []
+        self.first_row_seconds = None
+        self.total_seconds = None
+        self._parser = AssignmentStream()
+
+    @property
+    def raw(self) -> str:
+        return self._parser.buffer
+
+    def __iter__(self) -> Iterator[dict]:
+        started = time.perf_counter()
+        for chunk in stream_completion(self.prompt):
+            for row in self._parser.feed(chunk):
+                if self.compact:
+                    row = expand_row(row)
+                if self.first_row_seconds is None:
+                    self.first_row_seconds = time.perf_counter() - started
+                self.rows.append(row)
+                yield row
+        self.total_seconds = time.perf_counter() - started
+
+    def result(self) -> dict | None:
+        parsed = _parse(self.raw, self.compact)
+        if parsed and "assignments" in parsed:
+            return parsed
+        rows = [r for r in self.rows if isinstance(r.get("tasks"), dict) and r["tasks"]]
+        return {"assignments": rows} if rows else None
+
+
+def _parse(response: str, compact: bool) -> dict | None:
+    result = parse_response(response)
+    return expand_task_codes(result) if compact else result
+
+
+async def _best_of_n(
+    transport: Transport, prompt: str, samples: int, compact: bool = False
+) -> tuple[dict | None, str]:
+    pending = [asyncio.create_task(_acomplete(transport, prompt)) for _ in range(samples)]
+    best, raw, error = None, "", None
+    try:
+        for next_done in asyncio.as_completed(pending):
+            try:
+                response = await next_done
+            except Exception as e:
+                error = e
+                continue
+            result = _parse(response, compact)
+            score = score_schedule(result)
+            if score is None:
+                raw = raw or response
+                continue
+            if best is None or score < best[0]:
+                best, raw = (score, result), response
+            if score == 0:
+                break
+    finally:
+        # First valid schedule wins: abort the requests still in flight
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if best is None and error is not None and not raw:
+        raise error
+    return (best[1] if best else None), raw
+
+
+def generate_best_of_n(
+    day_schedule: list[dict], samples: int = 4, compact: bool = False
+) -> tuple[dict | None, str]:
+    """Sample ``samples`` completions concurrently; return the first valid or best-scoring one."""
+    prompt = build_prompt(day_schedule, compact)
+    transport = _transport()
+    return transport.run(_best_of_n(transport, prompt, samples, compact))
+
+
+BACKENDS = ("llm", "solver")
+
+
+def generate_schedule(
+    day_schedule: list[dict], backend: str = "llm", samples: int = 1, compact: bool = False
+) -> tuple[dict | None, str]:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    if backend == "solver":
+        result = solve_schedule(day_schedule)
+        return result, json.dumps(result, indent=2)
+    if samples > 1:
+        return generate_best_of_n(day_schedule, samples, compact)
+
+    prompt = build_prompt(day_schedule, compact)
+    response = get_completion(prompt)
+    return _parse(response, compact), response
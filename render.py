@@ -0,0 +1,177 @@
+"""Headless-browser rendering and export of the timeline grid.
+
+One worker thread owns a Chromium instance for the life of the process and
+reuses a single page for every job. Playwright's sync API is tied to the
+thread that started it, so sessions hand jobs to that thread through a
+queue. Each job gets its HTML via ``set_content`` (no shared temp files).
+The screenshot is taken when the page signals it has finished laying out
+and loading fonts, instead of after a fixed sleep.
+
+A week export loads every day into one document in a single job. It
+prints that document to a PDF with one day per page, and screenshots
+each day's section as a PNG.
+"""
+
+import contextlib
+import html as html_lib
+import io
+import os
+import queue
+import threading
+import zipfile
+from concurrent.futures import Future
+
+RENDER_TIMEOUT = float(os.environ.get("HK_RENDER_TIMEOUT", "30"))
+VIEWPORT_HEIGHT = 800
+READY_FLAG = "window.__hkRendered === true"
+
+# Set once fonts are loaded and two frames have been painted
+READY_SCRIPT = """<script>
+document.fonts.ready.then(() => requestAnimationFrame(() => requestAnimationFrame(() => {
+  window.__hkRendered = true;
+})));
+</script>"""
+
+
+def page_document(body_html: str, head: str = "") -> str:
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'>{head}</head>"
+        f"<body style='margin:0;padding:16px;background:#fff;'>{body_html}{READY_SCRIPT}</body></html>"
+    )
+
+
+def week_document(day_html: dict[str, str]) -> str:
+    """All days in one body, one section per day, each starting a new printed page."""
+    return "".join(
+        f"<section id='day-{i}' style='break-after:page;padding:8px 0;'>"
+        f"<h2 style='font-family:sans-serif;margin:0 0 8px;'>{html_lib.escape(day)}</h2>{body}</section>"
+        for i, (day, body) in enumerate(day_html.items())
+    )
+
+
+@contextlib.contextmanager
+def launch_chromium():
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            yield browser
+        finally:
+            browser.close()
+
+
+class RenderWorker:
+    """Serializes render jobs onto one thread that keeps a browser warm."""
+
+    def __init__(self, launch=launch_chromium, timeout: float = RENDER_TIMEOUT):
+        self.launch = launch
+        self.timeout = timeout
+        self.renders = 0
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, job) -> Future:
+        """Queue ``job(page)`` to run on the worker thread."""
+        future = Future()
+        with self._lock:
+            self._jobs.put((job, future))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="render-worker")
+                self._thread.start()
+        return future
+
+    def png(self, html: str, width: int, head: str = "") -> bytes:
+        """Full-page PNG of ``html`` (a body fragment) at viewport ``width``."""
+        return self.submit(lambda page: self._png(page, html, width, head)).result(self.timeout)
+
+    def week(self, day_html: dict[str, str], width: int, head: str = "") -> tuple[bytes, dict[str, bytes]]:
+        """One render pass over every day: a multi-page PDF and a PNG per day.
+
+        ``head`` (e.g. a shared stylesheet) is included once for all days.
+        """
+        return self.submit(lambda page: self._week(page, day_html, width, head)).result(self.timeout * 2)
+
+    def close(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._jobs.put(None)
+        if thread is not None:
+            thread.join(self.timeout)
+
+    def _load(self, page, html: str, width: int, head: str) -> None:
+        page.set_viewport_size({"width": width, "height": VIEWPORT_HEIGHT})
+        page.set_content(page_document(html, head), wait_until="load")
+        page.wait_for_function(READY_FLAG, timeout=self.timeout * 1000)
+
+    def _png(self, page, html: str, width: int, head: str) -> bytes:
+        self._load(page, html, width, head)
+        return page.screenshot(full_page=True)
+
+    def _week(self, page, day_html: dict[str, str], width: int, head: str) -> tuple[bytes, dict[str, bytes]]:
+        self._load(page, week_document(day_html), width, head)
+        pngs = {day: page.locator(f"#day-{i}").screenshot() for i, day in enumerate(day_html)}
+        # Every page gets the tallest day's height so no day is split across pages
+        height = page.evaluate(
+            "Math.max(...[...document.querySelectorAll('section')].map(s => s.scrollHeight)) + 32"
+        )
+        pdf = page.pdf(width=f"{width}px", height=f"{height}px", print_background=True)
+        return pdf, pngs
+
+    def _run(self) -> None:
+        try:
+            with self.launch() as browser:
+                page = browser.new_page()
+                while True:
+                    job = self._jobs.get()
+                    if job is None:
+                        return
+                    job, future = job
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        future.set_result(job(page))
+                        self.renders += 1
+                    except Exception as e:
+                        future.set_exception(e)
+                        # A failed job may leave the page in a bad state
+                        with contextlib.suppress(Exception):
+                            page.close()
+                        page = browser.new_page()
+        except Exception as e:
+            # Browser failed to start or died: fail everything queued; the next job relaunches
+            with self._lock:
+                self._thread = None
+                while True:
+                    try:
+                        job = self._jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is not None and job[1].set_running_or_notify_cancel():
+                        job[1].set_exception(e)
+
+
+def week_zip(pngs: dict[str, bytes], csvs: dict[str, str]) -> bytes:
+    """ZIP with ``<Day>_Schedule.png`` and ``<Day>_Schedule.csv`` per day."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for day, png in pngs.items():
+            zf.writestr(f"{day}_Schedule.png", png)
+        for day, csv in csvs.items():
+            zf.writestr(f"{day}_Schedule.csv", csv)
+    return buffer.getvalue()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_render_worker() -> RenderWorker:
+    """Process-wide render worker shared by every Streamlit session."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = RenderWorker()
+        return _worker
@@ -0,0 +1,251 @@
+"""Local repair of rule violations in a generated schedule.
+
+A bounded min-conflicts search: pick a violated rule cell, enumerate the
+moves that touch it, score every candidate at once with the batched rule
+engine and keep the best. Moves are limited to swapping two people's tasks
+in the same slot, moving one person's task to another of their hours, and
+re-tasking filler (floats, outdoor rounds, floor touch-ups, idle hours) or
+offending cells.
+No LLM call is made; a typical schedule is fixed in a few milliseconds.
+"""
+
+import random
+import time
+from dataclasses import replace
+
+import numpy as np
+
+from rules import (
+    CATEGORIES, CATEGORY_INDEX, COMPILED, FLOATS, OUTDOOR_AREAS, SLOTS,
+    _category_codes, _missing_breaks, _slot_index, encode, rule_masks, violation_counts,
+)
+
+MAX_STEPS = 300
+TIME_BUDGET = 0.5
+MAX_SIDEWAYS = 25
+
+FLOORS = [c for c in CATEGORIES if c.startswith("Floor")]
+# Tasks with no headcount requirement that can absorb or give up a person
+FILLER = {CATEGORY_INDEX[c] for c in ["Outdoor", *OUTDOOR_AREAS, *FLOATS, *FLOORS, "Other"]}
+BREAK = "Break"
+
+
+def _slot_options() -> list[list[str | None]]:
+    """Tasks worth trying in each slot: anything a rule requires there, plus filler."""
+    options = []
+    for s, slot in enumerate(SLOTS):
+        tasks = []
+        for cr in COMPILED:
+            if cr.rule.kind != "count":
+                continue
+            for k, cat in enumerate(cr.cats):
+                name = CATEGORIES[cat]
+                if cr.mask[k, s] and cr.lo[k, 0] > 0 and name not in tasks:
+                    tasks.append(name)
+        if not slot.endswith(":00"):
+            tasks.append(None)
+        elif int(slot[:2]) >= 10:
+            tasks += [f for f in FLOATS if f != "Float_ALL"] + ["Outdoor"] + FLOORS
+        options.append(tasks)
+    return options
+
+
+SLOT_OPTIONS = _slot_options()
+
+
+def _vector(task: str | None) -> np.ndarray:
+    vec = np.zeros(len(CATEGORIES), dtype=bool)
+    if task is not None:
+        vec[list(_category_codes(task))] = True
+    return vec
+
+
+class _Grid:
+    """One task (or None) per employee and slot, plus the rows it came from."""
+
+    def __init__(self, assignments: list[dict]):
+        self.rows = {}
+        cells = {}
+        for a in assignments:
+            self.rows.setdefault(a["employee"], a)
+            for time_, task in a["tasks"].items():
+                s = _slot_index(time_)
+                if s is not None:
+                    cells.setdefault((a["employee"], s), []).append(task)
+        self.employees = list(self.rows)
+        self.original = {key: " / ".join(tasks) for key, tasks in cells.items()}
+        self.tasks = np.full((len(self.employees), len(SLOTS)), None, dtype=object)
+        for e, name in enumerate(self.employees):
+            for s in range(len(SLOTS)):
+                # Double-booked cells keep their first task
+                if (name, s) in cells:
+                    self.tasks[e, s] = cells[(name, s)][0]
+
+    def original_task(self, e: int, s: int) -> str | None:
+        return self.original.get((self.employees[e], s))
+
+    def to_assignments(self) -> list[dict]:
+        out = []
+        for e, name in enumerate(self.employees):
+            row = {k: v for k, v in self.rows[name].items() if k != "tasks"}
+            row["tasks"] = {SLOTS[s]: t for s, t in enumerate(self.tasks[e]) if t is not None}
+            if "break" in row:
+                starts = [SLOTS[s] for s, t in enumerate(self.tasks[e]) if t == BREAK]
+                if len(starts) == 1:
+                    row["break"] = f"{starts[0]}-{int(starts[0][:2]) + 1:02d}:00"
+            out.append(row)
+        return out
+
+    def changes(self) -> list[dict]:
+        diff = []
+        for e, name in enumerate(self.employees):
+            for s, slot in enumerate(SLOTS):
+                before, after = self.original_task(e, s), self.tasks[e, s]
+                if before != after:
+                    diff.append({"employee": name, "time": slot, "before": before, "after": after})
+        return diff
+
+
+def _focus(o) -> list[tuple]:
+    """Violated cells, as ("slot", s, category), ("cell", e, s) or ("employee", e, category)."""
+    focus = []
+    for cr, mask in zip(COMPILED, rule_masks(o)):
+        kind = cr.rule.kind
+        if kind == "count":
+            focus += [("slot", s, int(cr.cats[k])) for k, s in zip(*np.nonzero(mask))]
+        elif kind == "per_person":
+            focus += [("employee", e, int(cr.cats[k])) for e, k in zip(*np.nonzero(mask))]
+        else:
+            focus += [("cell", e, s) for e, s in zip(*np.nonzero(mask))]
+    focus += [("employee", e, CATEGORY_INDEX[BREAK]) for e in np.nonzero(_missing_breaks(o))[0]]
+    return focus
+
+
+class _Search:
+    def __init__(self, grid: _Grid):
+        self.grid = grid
+        self.o = encode(grid.to_assignments())
+        self.working = self.o.in_shift | (self.o.busy > 0)
+
+    def on_shift(self, s: int) -> list[int]:
+        return [e for e in range(len(self.grid.employees)) if self.working[e, s]]
+
+    def retask(self, e: int, s: int) -> list[list[tuple]]:
+        current = self.grid.tasks[e, s]
+        options = list(SLOT_OPTIONS[s])
+        if self.o.break_window[e, s]:
+            options.append(BREAK)
+        if not self.o.in_shift[e, s]:
+            options = [None]
+        return [[(e, s, t)] for t in options if t != current]
+
+    def swap_slot(self, e: int, s: int) -> list[list[tuple]]:
+        t = self.grid.tasks[e, s]
+        return [
+            [(e, s, self.grid.tasks[e2, s]), (e2, s, t)]
+            for e2 in self.on_shift(s) if e2 != e and self.grid.tasks[e2, s] != t
+        ]
+
+    def swap_time(self, e: int, s: int) -> list[list[tuple]]:
+        t = self.grid.tasks[e, s]
+        return [
+            [(e, s, self.grid.tasks[e, s2]), (e, s2, t)]
+            for s2 in np.nonzero(self.o.in_shift[e])[0] if s2 != s and self.grid.tasks[e, s2] != t
+        ]
+
+    def holds(self, e: int, s: int, cat: int) -> bool:
+        return bool(self.o.occ[e, s, cat])
+
+    def moves(self, focus: tuple) -> list[list[tuple]]:
+        kind, a, b = focus
+        moves = []
+        if kind == "cell":
+            moves += self.retask(a, b) + self.swap_slot(a, b) + self.swap_time(a, b)
+        elif kind == "slot":
+            s, cat = a, b
+            for e in self.on_shift(s):
+                codes = [c for c in range(len(CATEGORIES)) if self.o.occ[e, s, c]]
+                if not codes or set(codes) <= FILLER or cat in codes:
+                    moves += self.retask(e, s)
+                # Pull the task in from another of the person's hours
+                moves += [m for m in self.swap_time(e, s) if self.holds(e, m[1][1], cat)]
+        else:
+            e, cat = a, b
+            if cat == CATEGORY_INDEX[BREAK]:
+                for s in np.nonzero(self.o.break_window[e])[0]:
+                    moves += self.retask(e, s) + self.swap_time(e, s)
+            else:
+                for s in np.nonzero(self.o.occ[e, :, cat])[0]:
+                    moves += self.swap_slot(e, s) + self.retask(e, s)
+        return moves
+
+    def score(self, moves: list[list[tuple]]) -> np.ndarray:
+        """Total violations after each move, evaluated as one batch."""
+        occ = np.repeat(self.o.occ[None], len(moves), axis=0)
+        busy = np.repeat(self.o.busy[None], len(moves), axis=0)
+        for b, move in enumerate(moves):
+            for e, s, task in move:
+                occ[b, e, s] = _vector(task)
+                busy[b, e, s] = task is not None
+        return violation_counts(replace(self.o, occ=occ, busy=busy)).sum(axis=-1)
+
+    def edits(self, move: list[tuple]) -> int:
+        """Change in the number of cells that differ from the original."""
+        grid = self.grid
+        return sum(
+            (t != grid.original_task(e, s)) - (grid.tasks[e, s] != grid.original_task(e, s))
+            for e, s, t in move
+        )
+
+    def apply(self, move: list[tuple]) -> None:
+        for e, s, task in move:
+            self.grid.tasks[e, s] = task
+            self.o.occ[e, s] = _vector(task)
+            self.o.busy[e, s] = task is not None
+
+
+def repair_schedule(
+    assignments: list[dict], max_steps: int = MAX_STEPS, time_budget: float = TIME_BUDGET, seed: int = 0
+) -> dict:
+    """Fix as many rule violations as possible with local moves.
+
+    Returns the repaired ``assignments``, the cell-level ``changes``
+    (employee, time, before, after) and violation totals before and after.
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    grid = _Grid(assignments)
+    before = int(violation_counts(encode(assignments)).sum())
+    search = _Search(grid)
+    current = int(violation_counts(search.o).sum())
+    best, best_tasks = current, grid.tasks.copy()
+
+    sideways = 0
+    for _ in range(max_steps):
+        if current == 0 or sideways > MAX_SIDEWAYS or time.perf_counter() - started > time_budget:
+            break
+        focus = _focus(search.o)
+        moves = search.moves(rng.choice(focus))
+        if not moves:
+            sideways += 1
+            continue
+        scores = search.score(moves)
+        # Fewest violations first, then the smallest diff from the original, then random
+        keys = [(int(v), search.edits(m), rng.random()) for v, m in zip(scores, moves)]
+        i = min(range(len(moves)), key=keys.__getitem__)
+        if scores[i] > current:
+            sideways += 1
+            continue
+        sideways = sideways + 1 if scores[i] == current else 0
+        search.apply(moves[i])
+        current = int(scores[i])
+        if current < best:
+            best, best_tasks = current, grid.tasks.copy()
+
+    grid.tasks = best_tasks
+    return {
+        "assignments": grid.to_assignments(),
+        "changes": grid.changes(),
+        "violations_before": before,
+        "violations_after": best,
+    }
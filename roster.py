@@ -0,0 +1,148 @@
+"""Staff roster ingestion.
+
+An upload is a wide table: a ``Name`` column followed by one column per day
+whose cells hold a shift description ("7.00 am to 15.00 pm", "Shift 2",
+"OFF", ...). It is flattened person-major into a long table, the shift
+strings are classified once per distinct value, and the result is a
+columnar frame with one row per person and working day.
+
+Workbooks can instead be streamed with ``iter_workbook``, which walks every
+sheet row by row in openpyxl's read-only mode and never holds more than one
+row in memory. ``iter_uploaded_file`` streams either format into a consumer
+such as ``RosterStore.from_schedule`` (the CLI does this);
+``parse_uploaded_file`` materializes the entries as a list, which the app
+keeps for the sheet picker, Supabase sync and day filtering.
+"""
+
+import re
+from collections.abc import Iterator
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+SHIFT_TIME_MAP = {
+    "shift_1": {"start_time": "07:00", "end_time": "15:00"},
+    "shift_2": {"start_time": "13:00", "end_time": "21:00"},
+    "shift_3": {"start_time": "15:00", "end_time": "23:00"},
+}
+
+# First match wins, so "17.00" still reads as shift_1 like it always has
+SHIFT_PATTERNS = [
+    (re.compile(r"7\.00|07"), "shift_1"),
+    (re.compile(r"13\.00|1\.00"), "shift_2"),
+    (re.compile(r"15\.00|3\.00"), "shift_3"),
+    (re.compile(r"shift 1"), "shift_1"),
+    (re.compile(r"shift 2"), "shift_2"),
+    (re.compile(r"shift 3"), "shift_3"),
+]
+
+ROSTER_COLUMNS = ["name", "day", "shift_name", "start_time", "end_time"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def normalize_shift(value):
+    if pd.isna(value):
+        return None
+    value = str(value).strip().lower()
+    if value == "off":
+        return None
+    for pattern, shift_name in SHIFT_PATTERNS:
+        if pattern.search(value):
+            return shift_name
+    return None
+
+
+def read_table(uploaded_file) -> pd.DataFrame:
+    if uploaded_file.name.endswith(".csv"):
+        df = pd.read_csv(uploaded_file)
+    else:
+        df = pd.read_excel(uploaded_file)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def roster_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Wide Name x day table -> long ``ROSTER_COLUMNS`` frame, person by person."""
+    days = list(df.columns[1:])
+    cells = df[days].to_numpy(dtype=object).ravel()  # row-major: each person's days in column order
+    names = np.repeat(df["Name"].to_numpy(dtype=object), len(days))
+    day_labels = np.tile(np.array(days, dtype=object), len(df))
+
+    # Classify each distinct cell once; missing cells get code -1 -> the trailing None
+    codes, uniques = pd.factorize(cells)
+    shift_of = np.array([normalize_shift(v) for v in uniques] + [None], dtype=object)
+    start_of = np.array([SHIFT_TIME_MAP[s]["start_time"] if s else None for s in shift_of], dtype=object)
+    end_of = np.array([SHIFT_TIME_MAP[s]["end_time"] if s else None for s in shift_of], dtype=object)
+    keep = np.not_equal(shift_of, None)[codes]
+    codes = codes[keep]
+
+    return pd.DataFrame({
+        "name": names[keep],
+        "day": day_labels[keep],
+        "shift_name": shift_of[codes],
+        "start_time": start_of[codes],
+        "end_time": end_of[codes],
+    }, columns=ROSTER_COLUMNS, dtype=object)
+
+
+def roster_records(frame: pd.DataFrame) -> list[dict]:
+    """The frame as the list-of-dicts shape the rest of the app uses."""
+    columns = [frame[c].tolist() for c in ROSTER_COLUMNS]
+    return [dict(zip(ROSTER_COLUMNS, row)) for row in zip(*columns)]
+
+
+def iter_workbook(source, sheets: list[str] | None = None) -> Iterator[dict]:
+    """Yield schedule entries from every roster sheet of an .xlsx, tagged with ``sheet``.
+
+    A sheet counts as a roster if its header row has a ``Name`` column; every
+    other non-empty header is a day. ``sheets`` limits which sheets are read.
+    """
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    shifts = {}  # distinct cell value -> shift name
+    try:
+        for ws in workbook.worksheets:
+            if sheets is not None and ws.title not in sheets:
+                continue
+            rows = ws.iter_rows(values_only=True)
+            header = [None if h is None else str(h).strip() for h in next(rows, None) or ()]
+            if "Name" not in header:
+                continue
+            name_col = header.index("Name")
+            days = [(i, day) for i, day in enumerate(header) if i != name_col and day]
+            for row in rows:
+                if name_col >= len(row) or all(v is None for v in row):
+                    continue
+                for i, day in days:
+                    value = row[i] if i < len(row) else None
+                    if value is None:
+                        continue
+                    if value not in shifts:
+                        shifts[value] = normalize_shift(value)
+                    shift_name = shifts[value]
+                    if shift_name:
+                        yield {
+                            "name": row[name_col],
+                            "day": day,
+                            "shift_name": shift_name,
+                            **SHIFT_TIME_MAP[shift_name],
+                            "sheet": ws.title,
+                        }
+    finally:
+        workbook.close()
+
+
+def roster_sheets(schedule: list[dict]) -> list[str]:
+    """Sheet names present in a parsed schedule, in workbook order."""
+    return list(dict.fromkeys(s["sheet"] for s in schedule if s.get("sheet") is not None))
+
+
+def iter_uploaded_file(uploaded_file) -> Iterator[dict]:
+    """Schedule entries of a CSV or workbook upload; workbooks are streamed row by row."""
+    if uploaded_file.name.endswith(".csv"):
+        return iter(roster_records(roster_frame(read_table(uploaded_file))))
+    return iter_workbook(uploaded_file)
+
+
+def parse_uploaded_file(uploaded_file) -> list[dict]:
+    return list(iter_uploaded_file(uploaded_file))
@@ -0,0 +1,237 @@
+"""Columnar roster keyed by calendar date.
+
+Each entry is three small integers: the date (proleptic ordinal), an
+interned employee code and a shift code; names are stored once and shift
+times come from ``SHIFT_TIME_MAP`` when entries are materialized. Entries
+are kept sorted by (date, shift, employee) with CSR-style offset tables by
+date, (weekday, shift), shift and employee, so every lookup slices an index
+and costs O(result); a whole weekday merges its shifts back into date order
+and employee date windows add a binary search. A year of 500 staff (~180k
+entries) takes under 4 MB.
+
+Uploads only name weekdays, so dates are assigned from a ``week_start``:
+the first sheet (or a sheet-less roster) is that week and each further
+sheet the week after. Day columns that already hold a date keep it. One
+person has at most one shift per date; later entries replace earlier ones.
+"""
+
+import bisect
+from collections.abc import Iterable
+from datetime import date, timedelta
+
+import numpy as np
+
+from roster import DAYS, SHIFT_TIME_MAP
+
+SHIFTS = list(SHIFT_TIME_MAP)
+SHIFT_CODES = {s: i for i, s in enumerate(SHIFTS)}
+WEEKDAYS = {**{d.lower(): i for i, d in enumerate(DAYS)}, **{d[:3].lower(): i for i, d in enumerate(DAYS)}}
+
+
+def monday(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def entry_date(day, week_start: date, week: int = 0) -> date | None:
+    """Calendar date of a roster day label: an ISO date, or a weekday name in week ``week``."""
+    if isinstance(day, date):
+        return day
+    label = str(day).strip()
+    try:
+        return date.fromisoformat(label[:10])
+    except ValueError:
+        pass
+    weekday = WEEKDAYS.get(label.lower())
+    if weekday is None:
+        return None
+    return monday(week_start) + timedelta(days=7 * week + weekday)
+
+
+def _csr(keys: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Entry indices grouped by ``keys`` (stable, so date order is kept) and each group's offsets."""
+    order = np.argsort(keys, kind="stable").astype(np.int32)
+    offsets = np.zeros(n + 1, dtype=np.int32)
+    np.cumsum(np.bincount(keys, minlength=n), out=offsets[1:])
+    return order, offsets
+
+
+class RosterStore:
+    """Immutable roster of (date, employee, shift) entries with lookups by each key."""
+
+    __slots__ = (
+        "names", "dates", "employees", "shifts", "undated", "_codes", "_first",
+        "_date_offsets", "_by_weekday_shift", "_weekday_shift_offsets", "_by_shift", "_shift_offsets",
+        "_by_employee", "_employee_offsets",
+    )
+
+    def __init__(self, names: list, dates: np.ndarray, employees: np.ndarray, shifts: np.ndarray,
+                 undated: int = 0):
+        # Keep the last entry per (date, employee), then store in (date, shift, employee) order
+        latest = np.lexsort((np.arange(len(dates)), employees, dates))[::-1]
+        key = dates[latest].astype(np.int64) * len(names) + employees[latest]
+        _, first = np.unique(key, return_index=True)
+        keep = latest[first]
+        order = keep[np.lexsort((employees[keep], shifts[keep], dates[keep]))]
+
+        self.names = names
+        self.dates = dates[order].astype(np.int32)
+        self.employees = employees[order].astype(np.int32)
+        self.shifts = shifts[order].astype(np.uint8)
+        self.undated = undated
+        self._codes = {name: i for i, name in enumerate(names)}
+
+        self._first = int(self.dates[0]) if len(self.dates) else 0
+        span = int(self.dates[-1]) - self._first + 1 if len(self.dates) else 0
+        self._date_offsets = np.zeros(span + 1, dtype=np.int32)
+        np.cumsum(np.bincount(self.dates - self._first, minlength=span), out=self._date_offsets[1:])
+        # date.weekday() of an ordinal is (ordinal - 1) % 7
+        self._by_weekday_shift, self._weekday_shift_offsets = _csr(
+            ((self.dates - 1) % 7) * len(SHIFTS) + self.shifts, 7 * len(SHIFTS)
+        )
+        self._by_shift, self._shift_offsets = _csr(self.shifts, len(SHIFTS))
+        self._by_employee, self._employee_offsets = _csr(self.employees, len(names))
+
+    @classmethod
+    def from_schedule(cls, schedule: Iterable[dict], week_start: date) -> "RosterStore":
+        """Build from parsed roster entries (``roster.parse_uploaded_file``, Supabase rows)."""
+        names, codes, weeks = [], {}, {}
+        dates, employees, shifts = [], [], []
+        undated = 0
+        for s in schedule:
+            week = weeks.setdefault(s.get("sheet"), len(weeks))
+            day = entry_date(s["day"], week_start, week)
+            if day is None or s["shift_name"] not in SHIFT_CODES:
+                undated += 1
+                continue
+            code = codes.get(s["name"])
+            if code is None:
+                code = codes[s["name"]] = len(names)
+                names.append(s["name"])
+            dates.append(day.toordinal())
+            employees.append(code)
+            shifts.append(SHIFT_CODES[s["shift_name"]])
+        return cls(
+            names, np.array(dates, dtype=np.int32), np.array(employees, dtype=np.int32),
+            np.array(shifts, dtype=np.uint8), undated,
+        )
+
+    def merge(self, other: "RosterStore") -> "RosterStore":
+        """Both rosters in one store; ``other`` wins where both have a shift for a person on a date."""
+        names = list(self.names)
+        codes = dict(self._codes)
+        remap = np.empty(len(other.names), dtype=np.int32)
+        for i, name in enumerate(other.names):
+            code = codes.get(name)
+            if code is None:
+                code = codes[name] = len(names)
+                names.append(name)
+            remap[i] = code
+        return RosterStore(
+            names,
+            np.concatenate([self.dates, other.dates]),
+            np.concatenate([self.employees, remap[other.employees]]),
+            np.concatenate([self.shifts, other.shifts]),
+            self.undated + other.undated,
+        )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in entry and index arrays (names excluded)."""
+        arrays = (
+            self.dates, self.employees, self.shifts, self._date_offsets, self._by_weekday_shift,
+            self._weekday_shift_offsets, self._by_shift, self._shift_offsets, self._by_employee, self._employee_offsets,
+        )
+        return sum(a.nbytes for a in arrays)
+
+    @property
+    def first_date(self) -> date | None:
+        return date.fromordinal(int(self.dates[0])) if len(self) else None
+
+    @property
+    def last_date(self) -> date | None:
+        return date.fromordinal(int(self.dates[-1])) if len(self) else None
+
+    # --- Lookups ---
+
+    def _date_range(self, day: date) -> tuple[int, int]:
+        i = day.toordinal() - self._first
+        if not 0 <= i < len(self._date_offsets) - 1:
+            return 0, 0
+        return int(self._date_offsets[i]), int(self._date_offsets[i + 1])
+
+    def on(self, day: date, shift_name: str | None = None) -> list[dict]:
+        """Everyone working on ``day``, optionally only on ``shift_name``."""
+        lo, hi = self._date_range(day)
+        if shift_name is not None:
+            code = SHIFT_CODES.get(shift_name)
+            if code is None:
+                return []
+            # Within a date entries are sorted by shift
+            lo, hi = lo + np.searchsorted(self.shifts[lo:hi], [code, code + 1])
+        return self._records(np.arange(lo, hi))
+
+    def weekday(self, day: str, shift_name: str | None = None) -> list[dict]:
+        """Entries on every date that falls on weekday ``day`` ("Thursday" or "thu")."""
+        w = WEEKDAYS.get(day.strip().lower())
+        code = SHIFT_CODES.get(shift_name) if shift_name is not None else None
+        if w is None or (shift_name is not None and code is None):
+            return []
+        group = w * len(SHIFTS)
+        if code is not None:
+            group += code
+            idx = self._by_weekday_shift[self._weekday_shift_offsets[group]:self._weekday_shift_offsets[group + 1]]
+        else:
+            # Entry indices follow (date, shift, employee) order, so sorting the shift groups restores it
+            idx = np.sort(self._by_weekday_shift[
+                self._weekday_shift_offsets[group]:self._weekday_shift_offsets[group + len(SHIFTS)]
+            ])
+        return self._records(idx)
+
+    def shift(self, shift_name: str) -> list[dict]:
+        code = SHIFT_CODES.get(shift_name)
+        if code is None:
+            return []
+        return self._records(self._by_shift[self._shift_offsets[code]:self._shift_offsets[code + 1]])
+
+    def employee(self, name: str, start: date | None = None, days: int | None = None) -> list[dict]:
+        """``name``'s shifts in date order, from ``start`` for ``days`` days when given."""
+        code = self._codes.get(name)
+        if code is None:
+            return []
+        idx = self._by_employee[self._employee_offsets[code]:self._employee_offsets[code + 1]]
+        if start is not None or days is not None:
+            # The slice is date-sorted; bisect it instead of gathering the whole history's dates
+            lo = start.toordinal() if start is not None else self._first
+            hi = lo + days if days is not None else np.iinfo(np.int32).max
+            date_of = self.dates.item
+            idx = idx[bisect.bisect_left(idx, lo, key=date_of):bisect.bisect_left(idx, hi, key=date_of)]
+        return self._records(idx)
+
+    def day_roster(self, day: date) -> list[dict]:
+        """``on(day)`` in the undated shape the prompt and solver take (``roster.ROSTER_COLUMNS``)."""
+        weekday = DAYS[day.weekday()]
+        return [
+            {"name": r["name"], "day": weekday, "shift_name": r["shift_name"],
+             "start_time": r["start_time"], "end_time": r["end_time"]}
+            for r in self.on(day)
+        ]
+
+    def week(self, week_start: date) -> dict[str, list[dict]]:
+        """``day_roster`` of each rostered day in the week of ``week_start``, keyed Monday..Sunday."""
+        first = monday(week_start)
+        rosters = {day: self.day_roster(first + timedelta(days=i)) for i, day in enumerate(DAYS)}
+        return {day: staff for day, staff in rosters.items() if staff}
+
+    def _records(self, idx: np.ndarray) -> list[dict]:
+        records = []
+        for ordinal, e, s in zip(self.dates[idx].tolist(), self.employees[idx].tolist(), self.shifts[idx].tolist()):
+            day = date.fromordinal(ordinal)
+            shift_name = SHIFTS[s]
+            records.append({
+                "name": self.names[e], "date": day.isoformat(), "day": DAYS[day.weekday()],
+                "shift_name": shift_name, **SHIFT_TIME_MAP[shift_name],
+            })
+        return records
@@ -0,0 +1,368 @@
+"""Declarative schedule rule engine.
+
+Every rule from ``prompt.CONSTRAINT`` is declared in ``RULES`` and compiled
+once into index/bound arrays. A schedule is encoded as a boolean
+employee x slot x task-category occupancy tensor and every rule becomes a
+count or range check over it, evaluated with NumPy. Leading batch axes are
+supported, so thousands of candidate schedules can be scored at once.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+HOURS = range(7, 23)
+SLOTS = sorted([f"{h:02d}:00" for h in HOURS] + ["20:30"])
+SLOT_INDEX = {s: i for i, s in enumerate(SLOTS)}
+SLOT_MINUTES = np.array([int(s[:2]) * 60 + int(s[3:]) for s in SLOTS])
+HOURLY = np.array([s.endswith(":00") for s in SLOTS])
+
+OUTDOOR_AREAS = ["Outdoor DP", "Outdoor Hallway", "Outdoor Side Hallway", "Outdoor Main Gate", "Design Pavilion"]
+FLOATS = ["Float_TRELLO", "Float_0", "Float_1", "Float_-1", "Float_ALL"]
+CATEGORIES = [
+    "Floor -1", "Floor 0", "Floor 1", "Floor 2", "Floor 3", "Floor 4",
+    "Outdoor", *OUTDOOR_AREAS,
+    "Egress", "BOH-Breakroom", "BOH-Restrooms", "Restroom 2", "Restroom 4",
+    *FLOATS, "Trash Removal", "Break", "Other",
+]
+CATEGORY_INDEX = {c: i for i, c in enumerate(CATEGORIES)}
+
+SHIFT_HOURS = {"shift_1": (7, 15), "shift_2": (13, 21), "shift_3": (15, 23)}
+BREAK_WINDOWS = {"shift_1": (11, 13), "shift_2": (17, 19), "shift_3": (19, 20)}
+UNBOUNDED = 10**6
+
+
+# --- Task vocabulary ---
+
+@lru_cache(maxsize=1024)
+def task_categories(task: str) -> tuple[str, ...]:
+    """Map any spelling of a task ("Restroom_2", "Outdoor - DP", ...) to its categories."""
+    key = re.sub(r"[\s_]+", " ", str(task).strip().lower())
+    letters = re.sub(r"[^a-z]", "", key)
+
+    if key == "break":
+        return ("Break",)
+    if "boh" in letters:
+        if "breakroom" in letters:
+            return ("BOH-Breakroom",)
+        return ("BOH-Restrooms",) if "restroom" in letters else ("Other",)
+    if "restroom" in letters:
+        digits = set(re.findall(r"\d", key.split("restroom", 1)[1]))
+        cats = tuple(c for d, c in (("2", "Restroom 2"), ("4", "Restroom 4")) if d in digits)
+        return cats or ("Other",)
+    if "egress" in letters:
+        return ("Egress",)
+    if "trash" in letters:
+        return ("Trash Removal",)
+    match = re.match(r"float ?(.*)", key)
+    if match:
+        suffix = match.group(1).replace(" ", "").upper()
+        name = f"Float_{suffix}"
+        return (name,) if name in CATEGORY_INDEX else ("Other",)
+    match = re.search(r"floor ?(-? ?\d)", key)
+    if match:
+        name = f"Floor {match.group(1).replace(' ', '')}"
+        return (name,) if name in CATEGORY_INDEX else ("Other",)
+    if "designpavilion" in letters:
+        return ("Outdoor", "Design Pavilion")
+    if "outdoor" in letters or "outside" in letters:
+        for area, marker in (("Outdoor Side Hallway", "sidehallway"), ("Outdoor Hallway", "hallway"),
+                             ("Outdoor Main Gate", "maingate"), ("Outdoor DP", "dp")):
+            if letters.endswith(marker):
+                return ("Outdoor", area)
+        return ("Outdoor",)
+    return ("Other",)
+
+
+@lru_cache(maxsize=1024)
+def _category_codes(task: str) -> tuple[int, ...]:
+    return tuple(CATEGORY_INDEX[c] for c in task_categories(task))
+
+
+@lru_cache(maxsize=256)
+def _slot_index(time: str) -> int | None:
+    match = re.match(r"^\s*(\d{1,2})[:.](\d{2})", str(time))
+    if not match:
+        return None
+    return SLOT_INDEX.get(f"{int(match.group(1)):02d}:{match.group(2)}")
+
+
+@lru_cache(maxsize=256)
+def _shift_hours(shift: str) -> tuple[int, int] | None:
+    match = re.search(r"(\d{1,2})[:.]\d{2}\s*-\s*(\d{1,2})[:.]\d{2}", shift)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    match = re.search(r"shift[\s_]*(\d)", shift.lower())
+    if match:
+        return SHIFT_HOURS.get(f"shift_{match.group(1)}")
+    return None
+
+
+# --- Encoding ---
+
+@lru_cache(maxsize=32)
+def _shift_masks(hours: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+    """Slot masks for a shift's working hours and its break window."""
+    in_shift = (SLOT_MINUTES >= hours[0] * 60) & (SLOT_MINUTES < hours[1] * 60)
+    break_window = np.zeros(len(SLOTS), dtype=bool)
+    shift_name = next((k for k, v in SHIFT_HOURS.items() if v[0] == hours[0]), None)
+    if shift_name:
+        lo, hi = BREAK_WINDOWS[shift_name]
+        break_window = HOURLY & (SLOT_MINUTES >= lo * 60) & (SLOT_MINUTES < hi * 60)
+    return in_shift, break_window
+
+
+@dataclass
+class Occupancy:
+    """Tensor form of one schedule (or a batch sharing the same roster)."""
+
+    employees: list[str]
+    occ: np.ndarray         # (..., E, S, C) bool — employee holds a task of category C in slot S
+    busy: np.ndarray        # (..., E, S) int — task entries per employee and slot
+    in_shift: np.ndarray    # (E, S) bool — slot lies inside the employee's shift
+    break_window: np.ndarray  # (E, S) bool — slot lies inside the employee's break window
+    has_shift: np.ndarray   # (E,) bool — shift hours are known for the employee
+
+
+def encode(assignments) -> Occupancy:
+    """Build the occupancy tensor for a list of LLM-style assignments or a ``ScheduleMatrix``."""
+    if not isinstance(assignments, list):
+        return assignments.occupancy()
+    rows = {}
+    for a in assignments:
+        rows.setdefault(a["employee"], []).append(a)
+    employees = list(rows)
+    E, S, C = len(employees), len(SLOTS), len(CATEGORIES)
+
+    occ = np.zeros((E, S, C), dtype=bool)
+    busy = np.zeros((E, S), dtype=np.int16)
+    in_shift = np.ones((E, S), dtype=bool)
+    break_window = np.zeros((E, S), dtype=bool)
+    has_shift = np.zeros(E, dtype=bool)
+
+    busy_e, busy_s = [], []
+    es, ss, cs = [], [], []
+    for e, name in enumerate(employees):
+        first = None
+        for a in rows[name]:
+            for time, task in a["tasks"].items():
+                s = _slot_index(time)
+                if s is None:
+                    continue
+                busy_e.append(e)
+                busy_s.append(s)
+                for c in _category_codes(task):
+                    es.append(e)
+                    ss.append(s)
+                    cs.append(c)
+                if first is None or s < first:
+                    first = s
+
+        hours = next((h for a in rows[name] if (h := _shift_hours(str(a.get("shift", ""))))), None)
+        if hours is None and first is not None:
+            hours = next((h for h in SHIFT_HOURS.values() if h[0] * 60 == SLOT_MINUTES[first]), None)
+        if hours is None:
+            continue
+        has_shift[e] = True
+        in_shift[e], break_window[e] = _shift_masks(hours)
+
+    occ[es, ss, cs] = True
+    np.add.at(busy, (busy_e, busy_s), 1)
+    return Occupancy(employees, occ, busy, in_shift, break_window, has_shift)
+
+
+# --- Rule declarations ---
+
+@dataclass(frozen=True)
+class Check:
+    category: str
+    slots: tuple[str, ...]
+    lo: int
+    hi: int
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    kind: str  # "count" | "per_person" | "double_booking" | "shift_hours" | "breaks"
+    checks: tuple[Check, ...] = ()
+    categories: tuple[str, ...] = ()
+    limit: int = 0
+
+
+def _hours(start: int, end: int) -> tuple[str, ...]:
+    return tuple(f"{h:02d}:00" for h in range(start, end))
+
+
+def _checks(categories, slots, lo, hi) -> tuple[Check, ...]:
+    return tuple(Check(c, tuple(slots), lo, hi) for c in categories)
+
+
+BOH = ["BOH-Breakroom", "BOH-Restrooms"]
+BOH_SLOTS = ("10:00", "14:00", "17:00", "19:00")
+
+RULES = [
+    Rule("No double-booking", "double_booking"),
+    Rule("Restroom 2 staffing", "count",
+         _checks(["Restroom 2"], _hours(12, 14), 1, 2)
+         + _checks(["Restroom 2"], _hours(14, 21), 2, 2)
+         # Only Shift 3 is left after 21:00; the restroom must still be attended
+         + _checks(["Restroom 2"], _hours(21, 23), 1, 2)),
+    Rule("Restroom 4 staffing (exactly 1)", "count", _checks(["Restroom 4"], _hours(10, 23), 1, 1)),
+    Rule("Egress (exactly 2, 10-12)", "count", _checks(["Egress"], _hours(10, 12), 2, 2)),
+    Rule("BOH-Breakroom (exactly 1)", "count", _checks(["BOH-Breakroom"], ("10:00", "14:00"), 1, 1)),
+    Rule("BOH-Restrooms (exactly 1)", "count", _checks(["BOH-Restrooms"], ("10:00", "14:00"), 1, 1)),
+    Rule("Egress (exactly 1, 15-16)", "count", _checks(["Egress"], ("15:00",), 1, 1)),
+    Rule("BOH evening rounds (exactly 1, 17-18 & 19-20)", "count", _checks(BOH, ("17:00", "19:00"), 1, 1)),
+    Rule("BOH only in scheduled windows", "count",
+         _checks(BOH, [s for s in _hours(7, 23) if s not in BOH_SLOTS], 0, 0)),
+    Rule("Opening floor coverage (07-09)", "count",
+         _checks(["Floor 2"], _hours(7, 9), 2, 2)
+         + _checks(["Floor -1"], ("07:00",), 1, 1)
+         + _checks(["Floor 3"], ("08:00",), 1, 1)
+         + _checks(["Floor 0", "Floor 1", "Floor 4"], _hours(7, 9), 1, 2)),
+    Rule("Opening outdoor round (09-10)", "count", _checks(OUTDOOR_AREAS, ("09:00",), 1, UNBOUNDED)),
+    Rule("Outdoor (max 3 at a time)", "count", _checks(["Outdoor"], _hours(10, 23), 0, 3)),
+    # The prompt staffs floats 11:00-19:00; outside that window they are not counted
+    Rule("Float tasks (1 person each)", "count", _checks(FLOATS, _hours(11, 19), 0, 1)),
+    Rule("Trash Removal (2 people, 20:30-21:00)", "count", _checks(["Trash Removal"], ("20:30",), 2, 2)),
+    Rule("Restroom 2 max 2h per person", "per_person", categories=("Restroom 2",), limit=2),
+    Rule("Restroom 4 max 2h per person", "per_person", categories=("Restroom 4",), limit=2),
+    Rule("Shift hours", "shift_hours"),
+    Rule("Breaks (1h inside break window)", "breaks"),
+]
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    rule: Rule
+    cats: np.ndarray    # (K,) category index per check
+    mask: np.ndarray    # (K, S) slots each check applies to
+    lo: np.ndarray      # (K, 1)
+    hi: np.ndarray      # (K, 1)
+
+
+def compile_rules(rules: list[Rule]) -> list[CompiledRule]:
+    compiled = []
+    for rule in rules:
+        checks = rule.checks
+        if rule.kind == "per_person":
+            checks = tuple(Check(c, (), 0, rule.limit) for c in rule.categories)
+        mask = np.zeros((len(checks), len(SLOTS)), dtype=bool)
+        for k, check in enumerate(checks):
+            mask[k, [SLOT_INDEX[s] for s in check.slots]] = True
+        compiled.append(CompiledRule(
+            rule,
+            np.array([CATEGORY_INDEX[c.category] for c in checks], dtype=np.intp),
+            mask,
+            np.array([[c.lo] for c in checks], dtype=np.int64).reshape(-1, 1),
+            np.array([[c.hi] for c in checks], dtype=np.int64).reshape(-1, 1),
+        ))
+    return compiled
+
+
+COMPILED = compile_rules(RULES)
+
+
+# --- Evaluation ---
+
+def _active_slots(o: Occupancy) -> np.ndarray:
+    """Slots anyone is scheduled in; the half-hour slot follows its hour."""
+    active = o.busy.sum(axis=-2) > 0
+    half = SLOT_INDEX["20:30"]
+    active[..., half] = active[..., SLOT_INDEX["20:00"]]
+    return active
+
+
+def rule_masks(o: Occupancy) -> list[np.ndarray]:
+    """One boolean violation mask per rule, in ``RULES`` order.
+
+    Count rules give (..., K, S) masks over (check, slot); per-person rules give
+    (..., E, K); the remaining rules give (..., E, S) masks over (employee, slot).
+    """
+    counts = np.moveaxis(o.occ.sum(axis=-3), -1, -2)  # (..., C, S)
+    hours = o.occ.sum(axis=-2)                          # (..., E, C)
+    active = _active_slots(o)[..., None, :]
+    breaks = o.occ[..., CATEGORY_INDEX["Break"]]
+
+    masks = []
+    for cr in COMPILED:
+        kind = cr.rule.kind
+        if kind == "count":
+            c = counts[..., cr.cats, :]
+            masks.append(cr.mask & active & ((c < cr.lo) | (c > cr.hi)))
+        elif kind == "per_person":
+            masks.append(hours[..., cr.cats] > cr.hi[:, 0])
+        elif kind == "double_booking":
+            masks.append(o.busy > 1)
+        elif kind == "shift_hours":
+            masks.append((o.busy > 0) & ~o.in_shift & o.has_shift[:, None])
+        elif kind == "breaks":
+            inside = breaks & o.break_window
+            extra = inside & (np.cumsum(inside, axis=-1) > 1)
+            masks.append(((breaks & ~o.break_window) | extra) & o.break_window.any(axis=-1)[:, None])
+        else:
+            raise ValueError(f"Unknown rule kind: {kind}")
+    return masks
+
+
+def _missing_breaks(o: Occupancy) -> np.ndarray:
+    breaks = o.occ[..., CATEGORY_INDEX["Break"]]
+    return o.break_window.any(axis=-1) & ~(breaks & o.break_window).any(axis=-1)
+
+
+def violation_counts(o: Occupancy) -> np.ndarray:
+    """Per-rule violation counts with shape (..., len(RULES))."""
+    counts = [m.sum(axis=(-2, -1)) for m in rule_masks(o)]
+    breaks_idx = next(i for i, cr in enumerate(COMPILED) if cr.rule.kind == "breaks")
+    counts[breaks_idx] = counts[breaks_idx] + _missing_breaks(o).sum(axis=-1)
+    return np.stack(counts, axis=-1)
+
+
+def _cells(cr: CompiledRule, mask: np.ndarray, o: Occupancy) -> list[dict]:
+    kind = cr.rule.kind
+    if kind == "count":
+        counts = o.occ.sum(axis=0)
+        cells = []
+        for k, s in zip(*np.nonzero(mask)):
+            cat = int(cr.cats[k])
+            lo, hi = int(cr.lo[k, 0]), int(cr.hi[k, 0])
+            expected = f"{lo}" if lo == hi else f"{lo}+" if hi >= UNBOUNDED else f"{lo}-{hi}"
+            cells.append({"time": SLOTS[s], "task": CATEGORIES[cat], "count": int(counts[s, cat]), "expected": expected})
+        return cells
+    if kind == "per_person":
+        hours = o.occ.sum(axis=1)
+        return [
+            {"employee": o.employees[e], "task": CATEGORIES[int(cr.cats[k])], "hours": int(hours[e, cr.cats[k]])}
+            for e, k in zip(*np.nonzero(mask))
+        ]
+    return [{"employee": o.employees[e], "time": SLOTS[s]} for e, s in zip(*np.nonzero(mask))]
+
+
+def validate_constraints(assignments) -> list[dict]:
+    """Check a schedule against every rule.
+
+    Returns one entry per rule with ``pass``, the number of ``violations`` and
+    the offending ``cells``.
+    """
+    o = encode(assignments)
+    masks = rule_masks(o)
+    missing = _missing_breaks(o)
+
+    results = []
+    for cr, mask in zip(COMPILED, masks):
+        cells = _cells(cr, mask, o)
+        if cr.rule.kind == "breaks":
+            cells += [{"employee": o.employees[e], "time": None} for e in np.nonzero(missing)[0]]
+        results.append({"rule": cr.rule.name, "pass": not cells, "violations": len(cells), "cells": cells})
+    return results
+
+
+def score_schedule(result: dict | None) -> int | None:
+    """Total rule violations of a parsed result, or None if it is not a schedule."""
+    try:
+        return int(violation_counts(encode(result["assignments"])).sum())
+    except (KeyError, TypeError, AttributeError):
+        return None
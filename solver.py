@@ -0,0 +1,292 @@
+"""Deterministic, in-process schedule solver.
+
+Encodes the rules from ``prompt.TASK_DESCRIPTION`` / ``prompt.CONSTRAINT`` as
+per-hour demands and fills them greedily, hour by hour, so a schedule comes
+back in milliseconds without a network round trip. The result has the same
+``{"assignments": [...]}`` shape the LLM is asked to produce.
+"""
+
+from collections import Counter
+from itertools import product
+
+SHIFT_LABELS = {"shift_1": "Shift 1", "shift_2": "Shift 2", "shift_3": "Shift 3"}
+
+# Break start hours allowed per shift (1h break inside the window)
+BREAK_STARTS = {
+    "shift_1": (11, 12),
+    "shift_2": (17, 18),
+    "shift_3": (19,),
+}
+
+OPENING_FLOORS = [("Floor 2", 2), ("Floor -1", 1), ("Floor 0", 1), ("Floor 1", 1), ("Floor 4", 1)]
+OPENING_EXTRA_FLOORS = ["Floor 0", "Floor 1", "Floor 4"]
+OPENING_FLOOR_MAX = 2
+OUTDOOR_AREAS = ["Outdoor DP", "Outdoor Hallway", "Outdoor Side Hallway", "Outdoor Main Gate", "Design Pavilion"]
+
+FLOATS = ["Float_TRELLO", "Float_0", "Float_1", "Float_-1"]
+OUTDOOR_BLOCKS = (11, 13, 15, 17)
+OUTDOOR_BLOCK_SIZE = 2
+MAX_OUTDOOR = 3
+# Showroom touch-ups absorb anyone left over once floats and outdoor are full
+TOUCH_UP_FLOORS = ["Floor 0", "Floor 1", "Floor -1", "Floor 3", "Floor 4"]
+
+EGRESS = {10: 2, 11: 2, 15: 1}
+BOH_HOURS = (10, 14, 17, 19)
+RESTROOM_2 = {12: 1, 13: 1, **{h: 2 for h in range(14, 21)}, 21: 1, 22: 1}
+RESTROOM_4 = {h: 1 for h in range(10, 23)}
+RESTROOM_MAX_HOURS = 2
+# After Shift 2 leaves, one person may have to cover both restrooms
+LATE_HOURS = (21, 22)
+RESTROOM_BOTH = "Restroom 2&4"
+
+TRASH_SLOT = "20:30"
+TRASH_PEOPLE = 2
+
+FIRST_HOUR = 7
+LAST_HOUR = 22
+# Headcount the opening hours must reach; shortfalls are reported like the hourly demands
+OPENING_DEMAND = {
+    FIRST_HOUR: OPENING_FLOORS,
+    FIRST_HOUR + 1: [("Floor 2", 2), ("Floor 3", 1), ("Floor 0", 1), ("Floor 1", 1), ("Floor 4", 1)],
+    FIRST_HOUR + 2: [(area, 1) for area in OUTDOOR_AREAS],
+}
+MAX_BREAK_PLANS = 25
+
+
+def _hour(time: str) -> int:
+    return int(time.split(":")[0])
+
+
+def _slot(hour: int) -> str:
+    return f"{hour:02d}:00"
+
+
+def _required(hour: int) -> list[tuple[str, int]]:
+    """Mandatory headcount per task at ``hour``, highest priority first."""
+    demand = [
+        ("Egress", EGRESS.get(hour, 0)),
+        ("Restroom 4", RESTROOM_4.get(hour, 0)),
+        ("Restroom 2", RESTROOM_2.get(hour, 0)),
+        ("BOH-Restrooms", 1 if hour in BOH_HOURS else 0),
+        ("BOH-Breakroom", 1 if hour in BOH_HOURS else 0),
+    ]
+    return [(task, n) for task, n in demand if n]
+
+
+def _restroom_hours(used: Counter, task: str) -> int:
+    return used[task] + used[RESTROOM_BOTH]
+
+
+def _can_take(used: Counter, task: str) -> bool:
+    if task in ("Restroom 2", "Restroom 4"):
+        return _restroom_hours(used, task) < RESTROOM_MAX_HOURS
+    if task == RESTROOM_BOTH:
+        return all(_restroom_hours(used, t) < RESTROOM_MAX_HOURS for t in ("Restroom 2", "Restroom 4"))
+    return True
+
+
+def _break_plans(staff: list[dict]):
+    """Yield break-start assignments, most evenly staggered first."""
+    per_shift = []
+    for shift_name, starts in BREAK_STARTS.items():
+        names = [s["name"] for s in staff if s["shift_name"] == shift_name]
+        if len(starts) == 1 or not names:
+            per_shift.append([{n: starts[0] for n in names}])
+            continue
+        n = len(names)
+        splits = sorted(range(n + 1), key=lambda k: (abs(2 * k - n), -k))
+        per_shift.append([
+            {name: starts[0] if i < k else starts[1] for i, name in enumerate(names)}
+            for k in splits
+        ])
+
+    combos = sorted(
+        product(*[range(len(p)) for p in per_shift]), key=lambda idx: (sum(idx), idx)
+    )
+    for idx in combos[:MAX_BREAK_PLANS]:
+        plan = {}
+        for options, i in zip(per_shift, idx):
+            plan.update(options[i])
+        yield plan
+
+
+def _fill(staff: list[dict], breaks: dict[str, int]) -> tuple[dict, list[dict]]:
+    tasks = {s["name"]: {} for s in staff}
+    used = {s["name"]: Counter() for s in staff}
+    bounds = {s["name"]: (_hour(s["start_time"]), _hour(s["end_time"])) for s in staff}
+    unfilled = []
+    prev = {}
+
+    def assign(name, hour, task):
+        tasks[name][_slot(hour)] = task
+        used[name][task] += 1
+
+    for hour in range(FIRST_HOUR, LAST_HOUR + 1):
+        on_shift = [n for n in tasks if bounds[n][0] <= hour < bounds[n][1]]
+        if not on_shift:
+            continue
+        free = []
+        for name in on_shift:
+            if breaks.get(name) == hour:
+                tasks[name][_slot(hour)] = "Break"
+            else:
+                free.append(name)
+
+        current = {}
+        if hour < 10:
+            _fill_opening(hour, free, prev, current)
+            held = Counter(current.values())
+            unfilled += [
+                {"time": _slot(hour), "task": task, "missing": need - held[task]}
+                for task, need in OPENING_DEMAND[hour] if held[task] < need
+            ]
+        else:
+            demand = _required(hour)
+            slots = [task for task, need in demand for _ in range(need)]
+            options = [
+                sorted(
+                    (n for n in free if _can_take(used[n], task)),
+                    key=lambda n, task=task: (prev.get(n) != task, bounds[n][1], used[n][task], n),
+                )
+                for task in slots
+            ]
+            current.update(_match(slots, options))
+            for task, need in demand:
+                missing = need - sum(1 for t in current.values() if t == task)
+                if missing and hour in LATE_HOURS and task == "Restroom 2":
+                    for name, t in current.items():
+                        if t == "Restroom 4" and missing and _can_take(used[name], RESTROOM_BOTH):
+                            current[name] = RESTROOM_BOTH
+                            missing -= 1
+                if missing:
+                    unfilled.append({"time": _slot(hour), "task": task, "missing": missing})
+            _fill_overflow(hour, [n for n in free if n not in current], prev, used, current)
+
+        for name, task in current.items():
+            assign(name, hour, task)
+        prev = current
+
+    _assign_trash(staff, tasks, bounds, unfilled)
+    return tasks, unfilled
+
+
+def _match(slots: list[str], options: list[list[str]]) -> dict[str, str]:
+    """Staff as many task slots as possible, earlier slots taking priority.
+
+    Augmenting-path bipartite matching: a slot only displaces an earlier
+    holder if that holder can be moved to another slot they qualify for.
+    """
+    holder = {}
+
+    def place(i, seen):
+        for name in options[i]:
+            if name in seen:
+                continue
+            seen.add(name)
+            if name not in holder or place(holder[name], seen):
+                holder[name] = i
+                return True
+        return False
+
+    for i in range(len(slots)):
+        place(i, set())
+    return {name: slots[i] for name, i in holder.items()}
+
+
+def _fill_opening(hour: int, free: list[str], prev: dict, current: dict) -> None:
+    if hour == FIRST_HOUR:
+        queue = list(free)
+        for floor, n in OPENING_FLOORS:
+            for _ in range(n):
+                if queue:
+                    current[queue.pop(0)] = floor
+        for i, name in enumerate(list(queue)[: len(OPENING_EXTRA_FLOORS) * (OPENING_FLOOR_MAX - 1)]):
+            current[name] = OPENING_EXTRA_FLOORS[i % len(OPENING_EXTRA_FLOORS)]
+            queue.remove(name)
+        # One person per float; anyone beyond that starts on the outdoor areas
+        for i, name in enumerate(queue):
+            current[name] = FLOATS[i] if i < len(FLOATS) else OUTDOOR_AREAS[(i - len(FLOATS)) % len(OUTDOOR_AREAS)]
+    elif hour == FIRST_HOUR + 1:
+        for name in free:
+            task = prev.get(name, "Floor 0")
+            current[name] = "Floor 3" if task == "Floor -1" else task
+    else:
+        for i, name in enumerate(free):
+            current[name] = OUTDOOR_AREAS[i % len(OUTDOOR_AREAS)]
+
+
+def _fill_overflow(hour: int, spare: list[str], prev: dict, used: dict, current: dict) -> None:
+    spare = sorted(spare, key=lambda n: (prev.get(n, "") == "Outdoor", n))
+    outdoor = 0
+    if hour in OUTDOOR_BLOCKS:
+        while spare and outdoor < OUTDOOR_BLOCK_SIZE:
+            current[spare.pop(0)] = "Outdoor"
+            outdoor += 1
+    open_floats = list(FLOATS)
+    for name in list(spare):
+        if not open_floats:
+            break
+        task = min(open_floats, key=lambda f: (prev.get(name) == f, used[name][f], FLOATS.index(f)))
+        open_floats.remove(task)
+        current[name] = task
+        spare.remove(name)
+    while spare and outdoor < MAX_OUTDOOR:
+        current[spare.pop(0)] = "Outdoor"
+        outdoor += 1
+    for i, name in enumerate(spare):
+        current[name] = TOUCH_UP_FLOORS[i % len(TOUCH_UP_FLOORS)]
+
+
+def _assign_trash(staff: list[dict], tasks: dict, bounds: dict, unfilled: list[dict]) -> None:
+    last = _hour(TRASH_SLOT)
+    overflow = set(FLOATS) | {"Outdoor"} | set(TOUCH_UP_FLOORS)
+    candidates = [
+        n for n in tasks
+        if bounds[n][0] <= last < bounds[n][1] and bounds[n][1] == last + 1
+        and tasks[n].get(_slot(last), "Break") != "Break"
+    ]
+    if not candidates:
+        return
+    candidates.sort(key=lambda n: (tasks[n][_slot(last)] not in overflow, n))
+    for name in candidates[:TRASH_PEOPLE]:
+        tasks[name][TRASH_SLOT] = "Trash Removal"
+    missing = TRASH_PEOPLE - min(TRASH_PEOPLE, len(candidates))
+    if missing:
+        unfilled.append({"time": TRASH_SLOT, "task": "Trash Removal", "missing": missing})
+
+
+def _shortfall(unfilled: list[dict]) -> int:
+    return sum(u["missing"] for u in unfilled)
+
+
+def solve_schedule(day_staff: list[dict]) -> dict:
+    """Build a schedule for one day's roster without calling the LLM.
+
+    Every mandatory slot that cannot be staffed without breaking a rule is
+    left unassigned and reported under ``"unfilled"``.
+    """
+    staff = sorted(
+        (s for s in day_staff if s.get("shift_name") in BREAK_STARTS),
+        key=lambda s: (s["shift_name"], s["name"]),
+    )
+
+    best = None
+    for breaks in _break_plans(staff):
+        tasks, unfilled = _fill(staff, breaks)
+        if best is None or _shortfall(unfilled) < _shortfall(best[2]):
+            best = (breaks, tasks, unfilled)
+        if not unfilled:
+            break
+    breaks, tasks, unfilled = best or ({}, {}, [])
+
+    assignments = []
+    for s in staff:
+        name = s["name"]
+        start = breaks.get(name)
+        assignments.append({
+            "employee": name,
+            "shift": f"{SHIFT_LABELS[s['shift_name']]} ({s['start_time']}-{s['end_time']})",
+            "break": f"{_slot(start)}-{_slot(start + 1)}" if start is not None else "",
+            "tasks": dict(sorted(tasks[name].items())),
+        })
+    return {"assignments": assignments, "unfilled": unfilled}
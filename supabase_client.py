@@ -1,13 +1,21 @@
+import hashlib
+import json
 import os
+import threading
 
 from supabase import create_client, Client
 
+import metrics
+from lru import LRUCache
 
 TABLE = "staff_schedule"
+READ_TTL = float(os.environ.get("HK_SUPABASE_TTL", "300"))
 
+_client = None
+_client_lock = threading.Lock()
 
-def get_client() -> Client:
-    """Create a Supabase client using env vars or Streamlit secrets."""
+
+def _credentials() -> tuple[str | None, str | None]:
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_API_KEY")
 
@@ -19,26 +27,137 @@ def get_client() -> Client:
         except Exception:
             pass
 
-    if not url or not key:
-        raise RuntimeError("Missing SUPABASE_URL or SUPABASE_API_KEY")
+    return url, key
+
+
+def get_client() -> Client:
+    """Process-wide Supabase client, created on first use from env vars or Streamlit secrets."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            url, key = _credentials()
+            if not url or not key:
+                raise RuntimeError("Missing SUPABASE_URL or SUPABASE_API_KEY")
+            _client = create_client(url, key)
+        return _client
+
+
+COLUMNS = ("name", "day", "shift_name", "start_time", "end_time")
+BATCH_SIZE = 500
+# PostgREST returns at most this many rows per request by default (max-rows)
+PAGE_SIZE = 1000
+
+_pushed_hash = None
+# Bumped on every write; read-cache keys include it so writes invalidate reads
+_version = 0
+_reads = LRUCache(maxsize=64, ttl=READ_TTL)
+
+
+def roster_hash(schedule: list[dict]) -> str:
+    """Content hash of a roster; independent of row order and extra keys."""
+    rows = sorted(json.dumps([row.get(c) for c in COLUMNS], default=str) for row in schedule)
+    return hashlib.sha256("\n".join(rows).encode()).hexdigest()
+
+
+def _batches(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _select_all(query) -> list[dict]:
+    """Every row of ``query()``, fetched in ``PAGE_SIZE`` pages ordered by id.
+
+    ``query`` builds a fresh request per page, since ``range()`` appends to a
+    builder's parameters rather than replacing them.
+    """
+    rows = []
+    while True:
+        page = query().order("id").range(len(rows), len(rows) + PAGE_SIZE - 1).execute().data
+        rows += page
+        if len(page) < PAGE_SIZE:
+            return rows
+
+
+def diff_schedule(stored: list[dict], schedule: list[dict]) -> tuple[list[dict], list[dict], list]:
+    """Compare stored rows (with ``id``) to a new roster on (name, day).
+
+    The table holds one row per (name, day): when ``schedule`` lists a person
+    twice on a day the later entry wins, as in ``RosterStore``, and extra
+    stored rows for a key are deleted. Returns ``(inserts, updates,
+    delete_ids)``; updates carry the stored ``id``.
+    """
+    wanted = {(row["name"], row["day"]): {c: row.get(c) for c in COLUMNS} for row in schedule}
+    inserts, updates, delete_ids = [], [], []
+    seen = set()
+    for row in stored:
+        key = (row["name"], row["day"])
+        if key not in wanted or key in seen:
+            delete_ids.append(row["id"])
+            continue
+        seen.add(key)
+        if any(row.get(c) != wanted[key][c] for c in COLUMNS):
+            updates.append({"id": row["id"], **wanted[key]})
+    inserts = [row for key, row in wanted.items() if key not in seen]
+    return inserts, updates, delete_ids
+
+
+def push_schedule(schedule: list[dict], client: Client | None = None, force: bool = False) -> dict:
+    """Sync ``staff_schedule`` to ``schedule`` with batched inserts, updates and deletes.
+
+    A roster identical to the last one pushed from this process is skipped
+    without touching the database. Returns the number of rows written per kind.
+    """
+    global _pushed_hash, _version
+    digest = roster_hash(schedule)
+    if digest == _pushed_hash and not force:
+        return {"skipped": True, "inserted": 0, "updated": 0, "deleted": 0}
+
+    with metrics.span("supabase.push") as span:
+        client = client or get_client()
+        table = client.table(TABLE)
+        stored = _select_all(lambda: table.select("id, " + ", ".join(COLUMNS)))
+        inserts, updates, delete_ids = diff_schedule(stored, schedule)
 
-    return create_client(url, key)
+        # Write new rows before deleting old ones so readers never see an empty table
+        for batch in _batches(inserts, BATCH_SIZE):
+            table.insert(batch).execute()
+        for batch in _batches(updates, BATCH_SIZE):
+            table.upsert(batch).execute()
+        for batch in _batches(delete_ids, BATCH_SIZE):
+            table.delete().in_("id", batch).execute()
+        span["rows"] = len(inserts) + len(updates) + len(delete_ids)
 
+    _pushed_hash = digest
+    _version += 1
+    return {"skipped": False, "inserted": len(inserts), "updated": len(updates), "deleted": len(delete_ids)}
 
-def push_schedule(schedule: list[dict]) -> None:
-    """Replace all rows in staff_schedule with the new schedule."""
-    client = get_client()
-    # Delete existing rows
-    client.table(TABLE).delete().neq("id", 0).execute()
-    # Insert new rows (strip any extra keys, keep only the columns we need)
-    columns = {"name", "day", "shift_name", "start_time", "end_time"}
-    rows = [{k: v for k, v in row.items() if k in columns} for row in schedule]
-    if rows:
-        client.table(TABLE).insert(rows).execute()
 
+def load_schedule(day: str | None = None, shift_name: str | None = None) -> list[dict]:
+    """Rows of staff_schedule, optionally filtered server-side by day and shift.
 
-def load_schedule() -> list[dict]:
-    """Load all rows from staff_schedule table."""
-    client = get_client()
-    response = client.table(TABLE).select("name, day, shift_name, start_time, end_time").execute()
-    return response.data
+    Results are cached for ``READ_TTL`` seconds and dropped whenever this
+    process writes. Once the whole table is cached, filtered reads are served
+    from it without a round trip.
+    """
+    key = (_version, day, shift_name)
+    with metrics.span("supabase.load") as span:
+        rows = _reads.get(key)
+        span["cache_hit"] = rows is not None
+        if rows is None:
+            week = _reads.get((_version, None, None)) if (day or shift_name) else None
+            span["cache_hit"] = week is not None
+            if week is not None:
+                rows = [r for r in week if (day is None or r["day"] == day)
+                        and (shift_name is None or r["shift_name"] == shift_name)]
+            else:
+                def query():
+                    q = get_client().table(TABLE).select(", ".join(COLUMNS))
+                    if day is not None:
+                        q = q.eq("day", day)
+                    if shift_name is not None:
+                        q = q.eq("shift_name", shift_name)
+                    return q
+                rows = _select_all(query)
+            _reads.set(key, rows)
+        span["rows"] = len(rows)
+    return list(rows)
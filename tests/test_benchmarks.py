@@ -0,0 +1,38 @@
+from benchmarks.bench_pipeline import compare, load_baselines, run, save_baselines, synthetic_assignments
+from rules import BREAK_WINDOWS, validate_constraints
+
+
+def test_pipeline_grid_covers_every_stage():
+    results = run([10], [1, 2], repeat=1)
+    assert {k.split("/")[0] for k in results} == {
+        "parse_uploaded_file", "filter_by_day", "validate_constraints",
+        "build_timeline_html", "build_timeline_html_warm", "assignments_to_csv", "parse_response",
+    }
+    # Day-sized stages are measured once per staff size, roster stages per week count
+    assert "validate_constraints/10/2" not in results and "parse_uploaded_file/10/2" in results
+    assert all(r["seconds"] > 0 for r in results.values())
+
+
+def test_synthetic_assignments_are_valid_schedules():
+    assignments = synthetic_assignments(30)
+    assert len(assignments) == 30 and len({a["employee"] for a in assignments}) == 30
+    # Task mix is random, but the shape every rule reads must be right
+    checks = {v["rule"]: v for v in validate_constraints(assignments)}
+    for rule in ("No double-booking", "Shift hours", "Breaks (1h inside break window)"):
+        assert checks[rule]["pass"], checks[rule]
+    for a in assignments:
+        shift = "shift_" + a["shift"].split()[1]
+        breaks = [t for t, task in a["tasks"].items() if task == "Break"]
+        lo, hi = BREAK_WINDOWS[shift]
+        assert len(breaks) == 1 and lo <= int(breaks[0][:2]) < hi and a["break"].startswith(breaks[0])
+
+
+def test_compare_flags_only_real_regressions(tmp_path):
+    path = tmp_path / "baselines.json"
+    save_baselines({"stage/10/1": {"seconds": 0.1, "peak_mb": 4.0}}, str(path))
+    baselines = load_baselines(str(path))
+    assert compare({"stage/10/1": {"seconds": 0.15, "peak_mb": 4.2}}, baselines, 1.5) == []
+    assert len(compare({"stage/10/1": {"seconds": 0.2, "peak_mb": 9.0}}, baselines, 1.5)) == 2
+    assert compare({"new/10/1": {"seconds": 9.0, "peak_mb": 9.0}}, baselines) == []
+    # Tiny stages get an absolute floor so sub-millisecond jitter is not a regression
+    assert compare({"tiny": {"seconds": 0.003, "peak_mb": 0}}, {"tiny": {"seconds": 0.0001, "peak_mb": 0}}) == []
@@ -0,0 +1,167 @@
+import threading
+
+import pytest
+
+import cache
+import prompt
+from cache import DiskStore, LRUCache, ScheduleCache, cached_generate_schedule, schedule_key
+from solver import solve_schedule
+from tests.test_solver import make_roster
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fresh_cache(tmp_path, monkeypatch):
+    c = ScheduleCache(LRUCache(4, ttl=60), DiskStore(str(tmp_path), ttl=60, max_entries=3))
+    monkeypatch.setattr(cache, "_cache", c)
+    return c
+
+
+def test_lru_evicts_least_recent_and_expires():
+    clock = Clock()
+    lru = LRUCache(2, ttl=10, clock=clock)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert "b" not in lru and lru.get("a") == 1
+    clock.now += 11
+    assert lru.get("a") is None
+    assert (lru.hits, lru.misses) == (2, 1)
+
+
+def test_disk_store_survives_instances_and_bounds_size(tmp_path):
+    store = DiskStore(str(tmp_path), max_entries=2)
+    for key in ("k1", "k2", "k3"):
+        store.set(key, {"v": key})
+    reopened = DiskStore(str(tmp_path), max_entries=2)
+    assert reopened.get("k3") == {"v": "k3"}
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_lru_and_disk_store_survive_concurrent_use(tmp_path):
+    lru = LRUCache(8)
+    store = DiskStore(str(tmp_path), max_entries=4)
+    errors = []
+
+    def hammer(worker):
+        try:
+            for i in range(300):
+                key = f"k{(worker * 7 + i) % 20}"
+                lru.set(key, i)
+                lru.get(key)
+                lru.get(f"k{i % 20}")
+                if i % 30 == 0:
+                    store.set(key, {"i": i})
+                    store.get(key)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=hammer, args=(w,)) for w in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(lru) <= 8 and lru.hits + lru.misses == 8 * 300 * 2
+    assert len(list(tmp_path.glob("*.json"))) <= 4
+
+
+def test_entries_promoted_from_disk_keep_their_age(tmp_path):
+    clock = Clock()
+    valid = solve_schedule(make_roster(7, 6, 3))
+    def open_cache():
+        return ScheduleCache(LRUCache(4, ttl=60, clock=clock), DiskStore(str(tmp_path), ttl=60, clock=clock))
+
+    open_cache().admit("k", valid, "raw")
+    clock.now += 50
+    restarted = open_cache()
+    assert restarted.get("k") == (valid, "raw") and "k" in restarted.memory
+    clock.now += 11
+    assert restarted.get("k") is None and "k" not in restarted.memory
+
+
+def test_schedule_key_ignores_roster_order():
+    roster = make_roster(6, 5, 2)
+    assert schedule_key(roster) == schedule_key(list(reversed(roster)))
+    assert schedule_key(roster) != schedule_key(roster[:-1])
+    assert schedule_key(roster) != schedule_key(roster, backend="other")
+
+
+def test_only_valid_schedules_are_admitted(fresh_cache):
+    valid = solve_schedule(make_roster(7, 6, 3))
+    assert fresh_cache.admit("good", valid, "raw") is True
+    assert fresh_cache.admit("bad", {"assignments": [{"employee": "A", "tasks": {"10:00": "Egress"}}]}, "raw") is False
+    assert fresh_cache.admit("none", None, "raw") is False
+    assert fresh_cache.get("good") == (valid, "raw")
+    assert fresh_cache.get("bad") is None
+
+
+def test_cached_generate_hits_and_bypasses(fresh_cache, monkeypatch):
+    roster = make_roster(7, 6, 3)
+    calls = []
+
+    def fake_generate(day_staff, backend="llm", samples=1, compact=False):
+        calls.append(backend)
+        return solve_schedule(day_staff), "raw"
+
+    monkeypatch.setattr(prompt, "generate_schedule", fake_generate)
+    assert cached_generate_schedule(roster)[2] is False
+    assert cached_generate_schedule(list(reversed(roster)))[2] is True
+    assert cached_generate_schedule(roster, bypass_cache=True)[2] is False
+    assert calls == ["llm", "llm"]
+
+
+def test_mutating_a_hit_leaves_the_cache_intact(fresh_cache, monkeypatch):
+    roster = make_roster(7, 6, 3)
+    monkeypatch.setattr(prompt, "generate_schedule", lambda day_staff, **kwargs: (solve_schedule(day_staff), "raw"))
+    generated, _, _ = cached_generate_schedule(roster)
+    expected = solve_schedule(roster)
+    generated["assignments"].clear()
+    hit, _, cache_hit = cached_generate_schedule(roster)
+    assert cache_hit and hit == expected
+    hit["assignments"][0]["tasks"].clear()
+    hit["unfilled"] = ["edited"]
+    assert cached_generate_schedule(roster)[0] == expected
+
+
+def test_memoize_hits_on_equal_content():
+    calls = []
+
+    @cache.memoize("test-stage", maxsize=2)
+    def render(rows, title=""):
+        calls.append(title)
+        return f"{title}:{len(rows)}"
+
+    rows = [{"employee": "A", "tasks": {"07:00": "Floor 0"}}]
+    assert render(rows, title="x") == "x:1"
+    assert render([dict(r) for r in rows], title="x") == "x:1"
+    assert calls == ["x"]
+    render(rows, title="y")
+    render(rows, title="z")
+    render(rows, title="x")  # evicted by y and z
+    assert calls == ["x", "y", "z", "x"]
+    stats = cache.stage_stats()["test-stage"]
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 4, 2)
+
+
+def test_memoize_caches_none_and_hashes_bytes():
+    calls = []
+
+    @cache.memoize("test-bytes")
+    def parse(name, data):
+        calls.append(data)
+        return None
+
+    assert parse("a.csv", b"x,y") is None
+    assert parse("a.csv", b"x,y") is None
+    parse("a.csv", b"x,z")
+    assert calls == [b"x,y", b"x,z"]
+    assert cache.content_hash(b"ab", b"c") != cache.content_hash(b"a", b"bc")
@@ -0,0 +1,83 @@
+import json
+import subprocess
+import sys
+from datetime import date
+
+import pytest
+
+import main
+import week
+from roster_store import RosterStore
+
+SAMPLE = "data/sample staff schedule.xlsx"
+
+
+def cli(tmp_path, *extra):
+    out = tmp_path / "out"
+    code = main.main([SAMPLE, "--backend", "solver", "--week-start", "2026-10-21", "--out", str(out), *extra])
+    return code, out
+
+
+def test_generates_validates_and_writes_every_rostered_day(tmp_path, capsys):
+    code, out = cli(tmp_path)
+    assert code == 0
+    summary = json.loads((out / "summary.json").read_text())
+    assert [d["date"] for d in summary["days"]] == [f"2026-10-{d}" for d in range(19, 26)]
+    assert all(d["ok"] and d["staff"] > 0 and "violations" in d for d in summary["days"])
+
+    day = json.loads((out / "2026-10-22_Thursday.json").read_text())
+    assert day["date"] == "2026-10-22" and day["assignments"]
+    assert {v["rule"] for v in day["validation"]} and day["repair"] is None and "unfilled" in day
+    csv = (out / "2026-10-22_Thursday.csv").read_text().splitlines()
+    assert csv[0] == "Employee,Time,Task" and len(csv) > 1
+    assert "7/7 day(s) written" in capsys.readouterr().out
+
+
+def test_selects_weekdays_or_a_date_range(tmp_path):
+    store = RosterStore.from_schedule(
+        [{"name": "A", "day": d, "shift_name": "shift_1", "sheet": s}
+         for s in ("W1", "W2") for d in ("Monday", "Thursday")],
+        date(2026, 10, 19),
+    )
+    week_start = date(2026, 10, 19)
+    assert main.select_dates(store, week_start, days=["thu", "Sunday"]) == [date(2026, 10, 22)]
+    assert main.select_dates(store, week_start) == [
+        date(2026, 10, 19), date(2026, 10, 22), date(2026, 10, 26), date(2026, 10, 29),
+    ]
+    assert main.select_dates(store, week_start, start=date(2026, 10, 20), end=date(2026, 10, 26)) == [
+        date(2026, 10, 22), date(2026, 10, 26),
+    ]
+    with pytest.raises(ValueError):
+        main.select_dates(store, week_start, days=["Someday"])
+
+
+def test_png_and_failed_days(tmp_path, monkeypatch):
+    rendered = []
+    monkeypatch.setattr(main, "_png_renderer", lambda: lambda a: rendered.append(a) or b"\x89PNG")
+    real = week.cached_generate_schedule
+
+    def flaky(day_staff, **kwargs):
+        if any(s["day"] == "Monday" for s in day_staff):
+            raise RuntimeError("backend down")
+        return real(day_staff, **kwargs)
+
+    monkeypatch.setattr(week, "cached_generate_schedule", flaky)
+    code, out = cli(tmp_path, "--days", "Monday", "Tuesday", "--formats", "png")
+    assert code == 1
+    assert (out / "2026-10-20_Tuesday.png").read_bytes() == b"\x89PNG" and len(rendered) == 1
+    assert not (out / "2026-10-20_Tuesday.csv").exists()
+    days = json.loads((out / "summary.json").read_text())["days"]
+    assert [(d["day"], d["ok"], d["error"]) for d in days] == [
+        ("Monday", False, "backend down"), ("Tuesday", True, None),
+    ]
+
+
+def test_cold_start_skips_ui_browser_and_llm_imports(tmp_path):
+    script = (
+        "import sys, main; "
+        f"main.main([{SAMPLE!r}, '--backend', 'solver', '--days', 'thu', '--out', {str(tmp_path)!r}]); "
+        "print(sorted(m for m in ('streamlit', 'playwright', 'supabase', 'app', 'openai', 'prompt', 'cache')"
+        " if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert out.stdout.splitlines()[-1] == "[]"
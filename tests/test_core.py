@@ -1,8 +1,16 @@
+import asyncio
 import json
+
+import httpx
+import openai
 import pytest
 
-from app import filter_by_day, get_task_color, validate_constraints, TASK_COLORS
+import prompt
+from app import filter_by_day, load_bundled_schedule
 from prompt import parse_response
+from rules import validate_constraints
+from solver import solve_schedule
+from timeline import TASK_COLORS, get_task_color
 
 
 # --- filter_by_day ---
@@ -43,12 +51,28 @@ def test_parse_response_raw_json():
 
 
 def test_parse_response_with_surrounding_text():
-    text = 'Here is the schedule:\n<response>\n{"assignments": [{"employee": "B", "tasks": {}}]}\n</response>\nDone.'
+    text = 'Here is the schedule:\n<response>\n{"assignments": [{"employee": "B", "tasks": {"07:00": "Egress"}}]}\n</response>\nDone.'
     result = parse_response(text)
     assert result is not None
     assert result["assignments"][0]["employee"] == "B"
 
 
+def test_parse_response_skips_prose_before_the_response_tag():
+    text = 'Here is my plan {draft}. <response>{"assignments": []}</response>'
+    assert parse_response(text) == {"assignments": []}
+
+
+def test_parse_response_skips_example_json_before_the_tag():
+    example = '{"assignments": [{"employee": "staff_1", "tasks": {"07:00": "Floor 0"}}]}'
+    text = f'Following the example {example} I get:\n<response>{{"assignments": [{{"employee": "A", "tasks": {{"07:00": "Egress"}}}}]}}</response>'
+    assert parse_response(text)["assignments"][0]["employee"] == "A"
+
+
+def test_parse_response_tries_each_top_level_object_without_tags():
+    text = 'Constraints: {"min_staff": 6}. Plan {not json}. {"assignments": [{"employee": "C", "tasks": {"07:00": "Egress"}}]}'
+    assert parse_response(text)["assignments"][0]["employee"] == "C"
+
+
 def test_parse_response_malformed():
     result = parse_response("not json at all")
     assert result is None
@@ -61,6 +85,77 @@ def test_parse_response_with_think_tags():
     assert result["assignments"][0]["employee"] == "A"
 
 
+def test_parse_response_keeps_apostrophes():
+    text = '<response>{"assignments": [{"employee": "O\'Brien", "tasks": {"07:00": "Floor 0"}}]}</response>'
+    assert parse_response(text)["assignments"][0]["employee"] == "O'Brien"
+
+
+def test_parse_response_tolerates_single_quotes_and_trailing_commas():
+    text = "{'assignments': [{'employee': 'A', 'tasks': {'07:00': 'Floor 0',},},]}"
+    assert parse_response(text) == {"assignments": [{"employee": "A", "tasks": {"07:00": "Floor 0"}}]}
+
+
+def test_parse_schedule_reports_position():
+    text = '{"assignments": [\n  {"employee": "A", "tasks": {"07:00" "Floor 0"}}\n]}'
+    with pytest.raises(prompt.ParseError) as info:
+        prompt.parse_schedule(text)
+    assert (info.value.line, info.value.column) == (2, 39)
+    assert "expected ':'" in str(info.value)
+
+
+def test_parse_schedule_reports_schema_path():
+    text = '{"assignments": [{"employee": "A", "tasks": {"07:00": "Egress"}}, {"employee": "B", "tasks": {"7am": "Floor 0"}}]}'
+    with pytest.raises(prompt.ParseError) as info:
+        prompt.parse_schedule(text)
+    assert info.value.path == "assignments[1].tasks['7am']"
+
+
+def test_parse_schedule_rejects_an_assignment_without_tasks():
+    text = '{"assignments": [{"employee": "A", "tasks": {"07:00": "Egress"}}, {"employee": "B", "tasks": {}}]}'
+    with pytest.raises(prompt.ParseError) as info:
+        prompt.parse_schedule(text)
+    assert info.value.path == "assignments[1].tasks"
+    assert parse_response(text) is None
+
+
+class _FakeTransport:
+    def __init__(self):
+        self.calls = []
+
+    def complete(self, messages, **params):
+        self.calls.append(params)
+        if "response_format" in params:
+            request = httpx.Request("POST", "http://llm/chat/completions")
+            raise openai.BadRequestError("response_format unsupported", response=httpx.Response(400, request=request), body=None)
+        return '{"assignments": []}'
+
+
+def test_get_completion_falls_back_without_structured_output(monkeypatch):
+    fake = _FakeTransport()
+    monkeypatch.setattr(prompt, "_transport", lambda: fake)
+    monkeypatch.setattr(prompt, "_structured_output", True)
+    assert prompt.get_completion("hi") == '{"assignments": []}'
+    assert prompt.get_completion("hi") == '{"assignments": []}'
+    assert ["response_format" in c for c in fake.calls] == [True, False, False]
+
+
+def test_unrelated_bad_request_keeps_structured_output(monkeypatch):
+    request = httpx.Request("POST", "http://llm/chat/completions")
+    error = openai.BadRequestError(
+        "This model's maximum context length is 8192 tokens", response=httpx.Response(400, request=request), body=None,
+    )
+
+    class Transport:
+        def complete(self, messages, **params):
+            raise error
+
+    monkeypatch.setattr(prompt, "_transport", Transport)
+    monkeypatch.setattr(prompt, "_structured_output", True)
+    with pytest.raises(openai.BadRequestError):
+        prompt.get_completion("hi")
+    assert prompt._structured_output is True
+
+
 # --- validate_constraints ---
 
 VALID_ASSIGNMENTS = [
@@ -105,3 +200,109 @@ def test_task_color_mapping():
     assert get_task_color("BOH-Breakroom") == TASK_COLORS["BOH"]
     assert get_task_color("Float_0") == TASK_COLORS["Float"]
 
+
+
+# --- generate_best_of_n ---
+
+def _fake_completions(monkeypatch, responses):
+    """Serve ``(delay, text)`` pairs in call order; record which ones finished."""
+    calls = iter(responses)
+    finished = []
+
+    async def fake_acomplete(client, text):
+        delay, response = next(calls)
+        await asyncio.sleep(delay)
+        finished.append(response)
+        return response
+
+    monkeypatch.setenv("HF_TOKEN", "test")
+    monkeypatch.setattr(prompt, "_acomplete", fake_acomplete)
+    return finished
+
+
+def _valid_response():
+    roster = [
+        {"name": f"S{i}", "day": "Monday", "shift_name": shift, "start_time": start, "end_time": end}
+        for i, (shift, start, end) in enumerate(
+            [("shift_1", "07:00", "15:00")] * 7 + [("shift_2", "13:00", "21:00")] * 6 + [("shift_3", "15:00", "23:00")] * 3
+        )
+    ]
+    return "<response>" + json.dumps(solve_schedule(roster)) + "</response>"
+
+
+def test_best_of_n_first_valid_wins_and_cancels_rest(monkeypatch):
+    valid = _valid_response()
+    invalid = '<response>{"assignments": [{"employee": "A", "tasks": {"10:00": "Egress"}}]}</response>'
+    finished = _fake_completions(monkeypatch, [(0.05, invalid), (0.01, valid), (5, valid)])
+    result, raw = prompt.generate_best_of_n([], samples=3)
+    assert raw == valid
+    assert prompt.score_schedule(result) == 0
+    assert len(finished) == 1
+
+
+def test_best_of_n_falls_back_to_best_score(monkeypatch):
+    worse = '<response>{"assignments": [{"employee": "A", "tasks": {"10:00": "Egress", "11:00": "Egress"}}]}</response>'
+    better = '<response>{"assignments": [{"employee": "A", "tasks": {"10:00": "Egress"}}]}</response>'
+    _fake_completions(monkeypatch, [(0.01, worse), (0.02, "no json here"), (0.03, better)])
+    result, raw = prompt.generate_best_of_n([], samples=3)
+    assert raw == better
+    assert prompt.score_schedule(result) < prompt.score_schedule(parse_response(worse))
+
+
+# --- streaming ---
+
+STREAMED = (
+    '<think>plan {first} then "assignments"?</think><response>{"assignments": ['
+    '{"employee": "A", "tasks": {"07:00": "Floor 2", "08:00": "Note: use \\"}\\" carefully"}},'
+    '{"employee": "B", "tasks": {"07:00": "Floor 0"}}'
+    ']}</response>'
+)
+
+
+def test_assignment_stream_emits_rows_as_they_close():
+    parser = prompt.AssignmentStream()
+    emitted = []
+    for i, ch in enumerate(STREAMED):
+        for row in parser.feed(ch):
+            emitted.append((row["employee"], i))
+    assert [e for e, _ in emitted] == ["A", "B"]
+    first_close = STREAMED.index('}},') + 1
+    assert emitted[0][1] == first_close
+    assert parser.done
+
+
+def test_schedule_stream_times_first_row(monkeypatch):
+    monkeypatch.setattr(prompt, "stream_completion", lambda text: iter([STREAMED[:120], STREAMED[120:]]))
+    stream = prompt.ScheduleStream([])
+    rows = list(stream)
+    assert [r["employee"] for r in rows] == ["A", "B"]
+    assert stream.first_row_seconds is not None
+    assert stream.result()["assignments"][1]["tasks"] == {"07:00": "Floor 0"}
+
+
+# --- compact prompt ---
+
+def test_compact_prompt_is_smaller_on_bundled_roster():
+    day_staff = filter_by_day(load_bundled_schedule(), "Thursday")
+    report = prompt.token_report(day_staff)
+    assert report["compact"] < report["full"] * 0.6
+    compact = prompt.build_prompt(day_staff, compact=True)
+    assert all(f"{s['name']}|S" in compact for s in day_staff)
+    assert '"start_time"' not in compact
+
+
+def test_compact_codes_expand_on_parse(monkeypatch):
+    raw = '<response>{"assignments": [{"employee": "A", "shift": "S2", "tasks": {"13:00": "R2", "20:30": "TR", "21:00": "Egress"}}]}</response>'
+    monkeypatch.setattr(prompt, "get_completion", lambda text: raw)
+    result, _ = prompt.generate_schedule([], compact=True)
+    row = result["assignments"][0]
+    assert row["shift"] == "Shift 2 (13:00-21:00)"
+    assert row["tasks"] == {"13:00": "Restroom 2", "20:30": "Trash Removal", "21:00": "Egress"}
+    plain, _ = prompt.generate_schedule([])
+    assert plain["assignments"][0]["tasks"]["13:00"] == "R2"
+
+
+def test_count_tokens():
+    assert prompt.count_tokens("") == 0
+    assert prompt.count_tokens('{"07:00": "Floor 0"}') == 12
+    assert prompt.count_tokens("Housekeeping") == 2
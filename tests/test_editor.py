@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+
+from app import ordered_assignments
+from editor import ScheduleEditor
+from export import assignments_to_csv
+from rules import SLOTS, encode, validate_constraints, violation_counts
+from tests.test_matrix import messy_schedule
+from timeline import build_timeline_html
+
+TASKS = ["Floor 2", "Restroom 2", "Restroom_4", "Egress", "BOH-Breakroom", "Break", "Outdoor DP", "Float_0", "Trash Removal", ""]
+
+
+def assert_in_sync(editor):
+    assignments = editor.to_assignments()
+    np.testing.assert_array_equal(editor.violation_counts(), violation_counts(encode(assignments)))
+    assert editor.results() == validate_constraints(assignments)
+
+
+def test_random_edits_match_full_validation():
+    editor = ScheduleEditor(messy_schedule())
+    rng = random.Random(0)
+    rows = len(editor.matrix)
+    for step in range(300):
+        if step % 3:
+            editor.set_task(rng.randrange(rows), rng.choice(SLOTS), rng.choice(TASKS))
+        else:
+            editor.swap(rng.randrange(rows), rng.choice(SLOTS), rng.randrange(rows), rng.choice(SLOTS))
+        if step % 25 == 0:
+            assert_in_sync(editor)
+    assert_in_sync(editor)
+    assert editor.total == int(violation_counts(encode(editor.to_assignments())).sum())
+
+
+def test_inferred_shift_follows_the_first_task():
+    editor = ScheduleEditor([{"employee": "A", "tasks": {"07:00": "Floor 2", "08:00": "Floor 2"}}])
+    editor.set_task(0, "07:00", None)
+    editor.set_task(0, "13:00", "Restroom 2")
+    assert_in_sync(editor)
+    assert editor.to_assignments() == [{"employee": "A", "tasks": {"08:00": "Floor 2", "13:00": "Restroom 2"}}]
+
+
+def test_blank_entry_is_replaced_by_an_edit():
+    editor = ScheduleEditor([{"employee": "A", "shift": "Shift 1", "tasks": {"07:00": "", "08:00": "Floor 2"}}])
+    editor.set_task(0, "07:00", "Floor 2")
+    assert_in_sync(editor)
+    assert editor.to_assignments()[0]["tasks"] == {"07:00": "Floor 2", "08:00": "Floor 2"}
+
+
+def test_cleared_row_still_renders_and_exports():
+    editor = ScheduleEditor([
+        {"employee": "A", "tasks": {"07:00": "Floor 2", "08:00": "Break"}},
+        {"employee": "B", "tasks": {"13:00": "Restroom 2"}},
+    ])
+    for time in SLOTS:
+        editor.set_task(0, time, None)
+    assignments = ordered_assignments(editor.to_assignments())
+    assert [a["employee"] for a in assignments] == ["A", "B"] and assignments[0]["tasks"] == {}
+    assert "hk-name\">A<" in build_timeline_html(assignments)
+    assert assignments_to_csv(assignments).splitlines() == ["Employee,Time,Task", "B,13:00,Restroom 2"]
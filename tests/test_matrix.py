@@ -0,0 +1,56 @@
+import copy
+import random
+
+import numpy as np
+
+from export import assignments_to_csv
+from matrix import REGISTRY, ScheduleMatrix
+from rules import encode, validate_constraints
+from solver import solve_schedule
+from tests.test_core import VALID_ASSIGNMENTS
+from tests.test_solver import make_roster
+from timeline import timeline_body
+
+
+def messy_schedule():
+    """A solved day with the quirks LLM output has: other spellings, odd keys, repeated names."""
+    assignments = copy.deepcopy(solve_schedule(make_roster(7, 6, 3))["assignments"])
+    rng = random.Random(3)
+    for a in rng.sample(assignments, 5):
+        time = rng.choice(list(a["tasks"]))
+        a["tasks"][time] = a["tasks"][time].replace(" ", "_")
+    assignments[0]["tasks"]["7:30"] = "Floor 2"
+    assignments[1]["tasks"]["09:00"] = ""
+    assignments[2]["note"] = {"lead": True}
+    assignments.append({"employee": assignments[3]["employee"], "tasks": {"10:00": "Egress"}})
+    return assignments
+
+
+def test_round_trip_is_lossless():
+    for assignments in (VALID_ASSIGNMENTS, messy_schedule()):
+        assert ScheduleMatrix.from_assignments(assignments).to_assignments() == assignments
+
+
+def test_spellings_get_their_own_code_but_share_categories():
+    a, b = REGISTRY.code("Restroom 2"), REGISTRY.code("Restroom_2")
+    assert a != b and REGISTRY.code("Restroom 2") == a
+    assert REGISTRY.categories(a) == REGISTRY.categories(b) == ("Restroom 2",)
+    assert (REGISTRY.occupancy()[a] == REGISTRY.occupancy()[b]).all()
+
+
+def test_occupancy_matches_the_list_encoder():
+    for assignments in (VALID_ASSIGNMENTS, messy_schedule()):
+        expected = encode(assignments)
+        actual = ScheduleMatrix.from_assignments(assignments).occupancy()
+        assert actual.employees == expected.employees
+        for field in ("occ", "busy", "in_shift", "break_window", "has_shift"):
+            np.testing.assert_array_equal(getattr(actual, field), getattr(expected, field), err_msg=field)
+
+
+def test_validator_timeline_and_csv_run_on_the_matrix():
+    assignments = messy_schedule()
+    matrix = ScheduleMatrix.from_assignments(assignments)
+    assert validate_constraints(matrix) == validate_constraints(assignments)
+    assert timeline_body(matrix) == timeline_body(assignments)
+    assert sorted(assignments_to_csv(matrix).splitlines()) == sorted(assignments_to_csv(assignments).splitlines())
+    assert matrix.nbytes == len(assignments) * matrix.codes.shape[1] * 2
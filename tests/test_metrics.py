@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+import metrics
+from metrics import Recorder
+from prompt import parse_schedule
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def recorder(tmp_path, monkeypatch, clock):
+    r = Recorder(str(tmp_path / "metrics.jsonl"), str(tmp_path / "metrics.prom"), flush_seconds=5, clock=clock)
+    monkeypatch.setattr(metrics, "RECORDER", r)
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    yield r
+    r.close()
+
+
+def test_span_records_duration_and_attributes(recorder):
+    with metrics.span("csv", rows=3) as span:
+        span["bytes"] = 120
+    with metrics.span("csv", rows=2, cache_hit=True):
+        pass
+    (row,) = recorder.summary()
+    assert row["stage"] == "csv" and row["count"] == 2 and row["cache_hits"] == 1
+    assert row["rows"] == 5 and row["bytes"] == 120 and row["errors"] == 0
+    assert recorder.recent()[0]["rows"] == 2
+
+
+def test_span_records_errors_and_reraises(recorder):
+    with pytest.raises(KeyError):
+        with metrics.span("supabase.load"):
+            raise KeyError("x")
+    assert recorder.summary()[0]["errors"] == 1
+    assert recorder.recent()[0]["error"] == "KeyError"
+
+
+def test_disabled_spans_record_nothing(recorder, monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    with metrics.span("csv") as span:
+        span["rows"] = 1
+    metrics.record("llm", 1.0)
+    assert recorder.summary() == []
+
+
+def test_log_is_json_lines(recorder, tmp_path):
+    metrics.record("llm", 0.25, prompt_tokens=100, completion_tokens=40)
+    metrics.record("parse_response", 0.001, bytes=900)
+    recorder.flush()
+    lines = [json.loads(line) for line in (tmp_path / "metrics.jsonl").read_text().splitlines()]
+    assert [line["stage"] for line in lines] == ["llm", "parse_response"]
+    assert lines[0]["seconds"] == 0.25 and lines[0]["prompt_tokens"] == 100 and lines[0]["ts"] == 1000.0
+
+
+def test_log_rolls_over_at_max_bytes(tmp_path, clock):
+    path = tmp_path / "metrics.jsonl"
+    r = Recorder(str(path), None, clock=clock, log_max_bytes=400)
+    for i in range(20):
+        r.record("csv", 0.001, rows=i)
+    r.close()
+    rolled = (tmp_path / "metrics.jsonl.1").read_text().splitlines()
+    current = path.read_text().splitlines()
+    assert path.stat().st_size <= 400 and (tmp_path / "metrics.jsonl.1").stat().st_size <= 400
+    assert [json.loads(line)["rows"] for line in rolled + current] == list(range(20 - len(rolled) - len(current), 20))
+
+
+def test_prometheus_histogram_and_counters(recorder):
+    metrics.record("llm", 0.3, prompt_tokens=100, completion_tokens=40)
+    metrics.record("llm", 2.0, prompt_tokens=50, completion_tokens=10, error="RateLimitError")
+    recorder.register("hk_memo_hits_total", "Memo hits.", lambda: {"timeline": 7})
+    text = recorder.prometheus()
+    assert "# TYPE hk_stage_seconds histogram" in text
+    assert 'hk_stage_seconds_bucket{stage="llm",le="0.25"} 0' in text
+    assert 'hk_stage_seconds_bucket{stage="llm",le="0.5"} 1' in text
+    assert 'hk_stage_seconds_bucket{stage="llm",le="+Inf"} 2' in text
+    assert 'hk_stage_seconds_count{stage="llm"} 2' in text
+    assert 'hk_stage_seconds_sum{stage="llm"} 2.300000' in text
+    assert 'hk_stage_prompt_tokens_total{stage="llm"} 150' in text
+    assert 'hk_stage_errors_total{stage="llm"} 1' in text
+    assert 'hk_memo_hits_total{stage="timeline"} 7' in text
+
+
+def test_prometheus_file_is_rewritten_on_interval(recorder, clock, tmp_path):
+    prom = tmp_path / "metrics.prom"
+    metrics.record("csv", 0.01)
+    assert not prom.exists()
+    clock.now += 5
+    metrics.record("csv", 0.01)
+    assert 'hk_stage_seconds_count{stage="csv"} 2' in prom.read_text()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_parse_schedule_is_instrumented(recorder):
+    parse_schedule('{"assignments": [{"employee": "A", "tasks": {"07:00": "Floor 1"}}]}')
+    (span,) = recorder.recent()
+    assert span["stage"] == "parse_response" and span["rows"] == 1 and span["bytes"] > 0
@@ -0,0 +1,140 @@
+import contextlib
+import hashlib
+import io
+import threading
+import zipfile
+
+import pytest
+
+from render import READY_FLAG, RenderWorker, page_document, week_document, week_zip
+
+
+class FakePage:
+    def __init__(self, log, fail_on=None):
+        self.log, self.fail_on = log, fail_on
+
+    def set_viewport_size(self, size):
+        self.log.append(("viewport", size["width"]))
+
+    def set_content(self, html, wait_until):
+        if self.fail_on and self.fail_on in html:
+            raise RuntimeError("render failed")
+        self.log.append(("content", html))
+
+    def wait_for_function(self, expression, timeout):
+        self.log.append(("wait", expression))
+
+    def screenshot(self, full_page):
+        html = next(entry[1] for entry in reversed(self.log) if entry[0] == "content")
+        return b"PNG:" + hashlib.sha256(html.encode()).digest()
+
+    def locator(self, selector):
+        page = self
+
+        class Locator:
+            def screenshot(self):
+                page.log.append(("element", selector))
+                return b"PNG:" + selector.encode()
+        return Locator()
+
+    def evaluate(self, expression):
+        return 640
+
+    def pdf(self, **options):
+        self.log.append(("pdf", options))
+        return b"%PDF"
+
+    def close(self):
+        self.log.append(("close",))
+
+
+class FakeBrowser:
+    def __init__(self, log, fail_on=None):
+        self.log, self.fail_on = log, fail_on
+        self.pages = 0
+
+    def new_page(self):
+        self.pages += 1
+        return FakePage(self.log, self.fail_on)
+
+
+def fake_launcher(log, launches, fail_on=None):
+    @contextlib.contextmanager
+    def launch():
+        launches.append(threading.current_thread().name)
+        browser = FakeBrowser(log, fail_on)
+        yield browser
+        log.append(("pages", browser.pages))
+    return launch
+
+
+def test_document_carries_ready_signal():
+    doc = page_document("<table></table>")
+    assert "<table></table>" in doc
+    assert "__hkRendered = true" in doc and "__hkRendered" in READY_FLAG
+
+
+def test_worker_launches_once_and_reuses_page():
+    log, launches = [], []
+    worker = RenderWorker(launch=fake_launcher(log, launches), timeout=5)
+    first = worker.png("<p>one</p>", 900)
+    second = worker.png("<p>two</p>", 900)
+    worker.close()
+    assert first != second and first.startswith(b"PNG:")
+    assert launches == ["render-worker"]
+    assert ("wait", READY_FLAG) in log
+    assert ("pages", 1) in log
+    assert worker.renders == 2
+
+
+def test_failed_job_does_not_poison_the_next():
+    log, launches = [], []
+    worker = RenderWorker(launch=fake_launcher(log, launches, fail_on="boom"), timeout=5)
+    with pytest.raises(RuntimeError):
+        worker.png("<p>boom</p>", 900)
+    assert worker.png("<p>fine</p>", 900).startswith(b"PNG:")
+    worker.close()
+    assert ("close",) in log
+    assert launches == ["render-worker"]
+
+
+def test_launch_failure_is_reported_and_retried():
+    attempts = []
+
+    @contextlib.contextmanager
+    def broken():
+        attempts.append(1)
+        raise ImportError("No module named 'playwright'")
+        yield
+
+    worker = RenderWorker(launch=broken, timeout=5)
+    for _ in range(2):
+        with pytest.raises(ImportError):
+            worker.png("<p>x</p>", 900)
+    assert len(attempts) == 2
+
+
+def test_week_renders_every_day_in_one_load():
+    log, launches = [], []
+    worker = RenderWorker(launch=fake_launcher(log, launches), timeout=5)
+    pdf, pngs = worker.week({"Monday": "<p>mon</p>", "Tuesday": "<p>tue</p>"}, 900)
+    worker.close()
+    assert pdf == b"%PDF"
+    assert pngs == {"Monday": b"PNG:#day-0", "Tuesday": b"PNG:#day-1"}
+    assert [e[0] for e in log].count("content") == 1
+    options = next(e[1] for e in log if e[0] == "pdf")
+    assert options == {"width": "900px", "height": "640px", "print_background": True}
+    assert worker.renders == 1
+
+
+def test_week_document_breaks_pages_between_days():
+    doc = week_document({"Mon & Tue": "<table></table>", "Wednesday": "<p></p>"})
+    assert doc.count("break-after:page") == 2
+    assert "Mon &amp; Tue" in doc and "id='day-1'" in doc
+
+
+def test_week_zip_holds_png_and_csv_per_day():
+    data = week_zip({"Monday": b"PNG"}, {"Monday": "Employee,Time,Task\n"})
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert sorted(zf.namelist()) == ["Monday_Schedule.csv", "Monday_Schedule.png"]
+        assert zf.read("Monday_Schedule.png") == b"PNG"
@@ -0,0 +1,63 @@
+import copy
+import random
+import time
+
+from repair import repair_schedule
+from rules import validate_constraints
+from solver import solve_schedule
+from tests.test_solver import make_roster
+
+
+def failing(assignments):
+    return [r["rule"] for r in validate_constraints(assignments) if not r["pass"]]
+
+
+def test_repairs_swapped_and_dropped_tasks():
+    schedule = solve_schedule(make_roster(7, 6, 3))["assignments"]
+    broken = copy.deepcopy(schedule)
+    broken[0]["tasks"]["07:00"] = "Float_0"
+    broken[8]["tasks"]["15:00"] = "Restroom 4"
+    assert failing(broken)
+
+    started = time.perf_counter()
+    result = repair_schedule(broken)
+    assert time.perf_counter() - started < 1
+    assert result["violations_before"] > 0
+    assert result["violations_after"] == 0
+    assert failing(result["assignments"]) == []
+    assert result["changes"]
+    for change in result["changes"]:
+        assert set(change) == {"employee", "time", "before", "after"}
+
+
+def test_valid_schedule_is_untouched():
+    schedule = solve_schedule(make_roster(7, 6, 3))["assignments"]
+    result = repair_schedule(schedule)
+    assert result["changes"] == []
+    assert result["assignments"] == schedule
+
+
+def test_repairs_most_random_perturbations():
+    rng = random.Random(3)
+    tasks = ["Egress", "BOH-Breakroom", "Float_0", "Restroom 2", "Restroom 4", "Break", "Outdoor"]
+    fixed = 0
+    for _ in range(20):
+        schedule = copy.deepcopy(solve_schedule(make_roster(8, 6, 3))["assignments"])
+        for _ in range(rng.randint(1, 4)):
+            a = rng.choice(schedule)
+            a["tasks"][rng.choice(list(a["tasks"]))] = rng.choice(tasks)
+        result = repair_schedule(schedule)
+        assert result["violations_after"] <= result["violations_before"]
+        fixed += result["violations_after"] == 0
+    assert fixed >= 16
+
+
+def test_out_of_shift_and_double_booked_cells_are_cleared():
+    schedule = copy.deepcopy(solve_schedule(make_roster(7, 6, 3))["assignments"])
+    first = schedule[0]
+    extra = {"employee": first["employee"], "tasks": {"07:00": "Floor 4", "20:00": "Float_1"}}
+    result = repair_schedule(schedule + [extra])
+    assert result["violations_after"] == 0
+    row = next(a for a in result["assignments"] if a["employee"] == first["employee"])
+    assert "20:00" not in row["tasks"]
+    assert len(result["assignments"]) == len(schedule)
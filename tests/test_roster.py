@@ -0,0 +1,96 @@
+import io
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from benchmarks.bench_ingest import legacy_parse, synthetic_roster
+from roster import (
+    iter_uploaded_file, iter_workbook, normalize_shift, parse_uploaded_file, read_table, roster_frame, roster_records,
+    roster_sheets,
+)
+
+SAMPLE = "data/sample staff schedule.xlsx"
+
+
+class Upload(io.BytesIO):
+    def __init__(self, data: bytes, name: str):
+        super().__init__(data)
+        self.name = name
+
+
+def test_matches_legacy_loop_on_sample_workbook():
+    with open(SAMPLE, "rb") as f:
+        df = read_table(Upload(f.read(), "roster.xlsx"))
+    assert roster_records(roster_frame(df)) == legacy_parse(df)
+
+
+def test_matches_legacy_loop_on_synthetic_roster():
+    df = synthetic_roster(500, seed=3)
+    df.loc[3, "Name"] = np.nan
+    df["Monday"] = df["Monday"].astype(object)
+    df.loc[4, "Monday"] = 1.0
+    assert roster_records(roster_frame(df)) == legacy_parse(df)
+
+
+def test_normalize_shift_precedence():
+    assert normalize_shift("7.00 am to 15.00 pm") == "shift_1"
+    assert normalize_shift("17.00 to 23.00") == "shift_1"
+    assert normalize_shift("13.00 pm to 21.00 pm") == "shift_2"
+    assert normalize_shift(" Shift 3 ") == "shift_3"
+    assert normalize_shift("OFF") is None
+    assert normalize_shift(float("nan")) is None
+
+
+def test_parse_uploaded_csv():
+    csv = "Name , Monday,Tuesday\nAna,Shift 1,OFF\nBo,,15.00 pm to 23.00 pm\n"
+    assert parse_uploaded_file(Upload(csv.encode(), "roster.csv")) == [
+        {"name": "Ana", "day": "Monday", "shift_name": "shift_1", "start_time": "07:00", "end_time": "15:00"},
+        {"name": "Bo", "day": "Tuesday", "shift_name": "shift_3", "start_time": "15:00", "end_time": "23:00"},
+    ]
+
+
+def test_empty_roster_frame():
+    frame = roster_frame(pd.DataFrame({"Name": [], "Monday": []}))
+    assert list(frame.columns) == ["name", "day", "shift_name", "start_time", "end_time"]
+    assert roster_records(frame) == []
+
+
+def write_workbook(path, sheets):
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for title, rows in sheets.items():
+        ws = wb.create_sheet(title)
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+    return path
+
+
+def test_streaming_reader_matches_legacy_on_sample_workbook():
+    with open(SAMPLE, "rb") as f:
+        df = read_table(Upload(f.read(), "roster.xlsx"))
+    streamed = list(iter_workbook(SAMPLE))
+    assert len(roster_sheets(streamed)) == 1
+    assert [{k: v for k, v in s.items() if k != "sheet"} for s in streamed] == legacy_parse(df)
+
+
+def test_streaming_reader_reads_every_sheet(tmp_path):
+    path = write_workbook(tmp_path / "weeks.xlsx", {
+        "Week 1": [["Name", "Monday", "Tuesday"], ["Ana", "Shift 1", "OFF"], [None, None, None], ["Bo", None, "Shift 2"]],
+        "Notes": [["Updated by HR"]],
+        "Week 2": [[" Name ", "Monday"], ["Ana", "15.00 pm to 23.00 pm"]],
+    })
+    entries = list(iter_workbook(path))
+    assert [(e["sheet"], e["name"], e["day"], e["shift_name"]) for e in entries] == [
+        ("Week 1", "Ana", "Monday", "shift_1"),
+        ("Week 1", "Bo", "Tuesday", "shift_2"),
+        ("Week 2", "Ana", "Monday", "shift_3"),
+    ]
+    assert roster_sheets(entries) == ["Week 1", "Week 2"]
+    assert [e["sheet"] for e in iter_workbook(path, sheets=["Week 2"])] == ["Week 2"]
+    with open(path, "rb") as f:
+        assert parse_uploaded_file(Upload(f.read(), "weeks.xlsx")) == entries
+    with open(path, "rb") as f:
+        streamed = iter_uploaded_file(f)
+        assert not isinstance(streamed, list) and list(streamed) == entries
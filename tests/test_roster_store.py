@@ -0,0 +1,130 @@
+import random
+import subprocess
+import sys
+from datetime import date, timedelta
+
+from app import filter_by_day, load_bundled_schedule
+from roster_store import RosterStore, entry_date
+
+WEEK = date(2026, 10, 19)  # a Monday
+
+
+def key(entries):
+    return sorted((e["name"], e["day"], e["shift_name"], e["start_time"], e["end_time"]) for e in entries)
+
+
+def test_day_roster_matches_filter_by_day():
+    schedule = load_bundled_schedule()
+    store = RosterStore.from_schedule(schedule, WEEK)
+    assert len(store) == len(schedule) and store.undated == 0
+    for offset, day in enumerate(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]):
+        assert key(store.day_roster(WEEK + timedelta(days=offset))) == key(filter_by_day(schedule, day))
+
+
+def test_sheets_are_consecutive_weeks():
+    schedule = [
+        {"name": "Alice", "day": "Thursday", "shift_name": "shift_1", "sheet": "Week 1"},
+        {"name": "Alice", "day": "Thursday", "shift_name": "shift_2", "sheet": "Week 2"},
+        {"name": "Bob", "day": "thu", "shift_name": "shift_2", "sheet": "Week 2"},
+    ]
+    store = RosterStore.from_schedule(schedule, WEEK + timedelta(days=2))  # any day of the week works
+    assert [e["shift_name"] for e in store.on(date(2026, 10, 22))] == ["shift_1"]
+    week2 = store.on(date(2026, 10, 29), "shift_2")
+    assert [e["name"] for e in week2] == ["Alice", "Bob"]
+    assert week2[0] == {
+        "name": "Alice", "date": "2026-10-29", "day": "Thursday",
+        "shift_name": "shift_2", "start_time": "13:00", "end_time": "21:00",
+    }
+    assert store.on(date(2026, 10, 29), "shift_3") == [] and store.on(date(2025, 1, 1)) == []
+
+
+def test_lookups_by_weekday_shift_and_employee():
+    names = [f"Staff {i}" for i in range(50)]
+    rng = random.Random(1)
+    schedule = [
+        {"name": n, "day": (WEEK + timedelta(days=d)).isoformat(), "shift_name": rng.choice(["shift_1", "shift_2"])}
+        for d in range(120) for n in names if rng.random() < 0.7
+    ]
+    store = RosterStore.from_schedule(schedule, WEEK)
+    assert len(store) == len(schedule)
+
+    start = WEEK + timedelta(days=40)
+    expected = [s for s in schedule if s["name"] == "Staff 3" and start.isoformat() <= s["day"]
+                < (start + timedelta(days=30)).isoformat()]
+    assert [e["date"] for e in store.employee("Staff 3", start, 30)] == [s["day"] for s in expected]
+    assert len(store.employee("Staff 3")) == sum(s["name"] == "Staff 3" for s in schedule)
+    assert store.employee("Nobody") == []
+
+    thursdays = store.weekday("Thursday", "shift_2")
+    assert thursdays and all(e["day"] == "Thursday" and e["shift_name"] == "shift_2" for e in thursdays)
+    assert len(thursdays) == sum(
+        date.fromisoformat(s["day"]).weekday() == 3 and s["shift_name"] == "shift_2" for s in schedule
+    )
+    assert len(store.shift("shift_1")) == sum(s["shift_name"] == "shift_1" for s in schedule)
+    mondays = store.weekday("mon")
+    assert [(e["date"], e["shift_name"]) for e in mondays] == sorted((e["date"], e["shift_name"]) for e in mondays)
+    assert len(mondays) == sum(date.fromisoformat(s["day"]).weekday() == 0 for s in schedule)
+    assert store.weekday("Someday") == store.weekday("thu", "shift_9") == store.shift("shift_9") == []
+    assert store.employee("Staff 3", start, 0) == [] and store.employee("Staff 3", days=1) == [
+        e for e in store.employee("Staff 3") if e["date"] == WEEK.isoformat()
+    ]
+
+
+def test_later_entries_replace_earlier_and_merge():
+    first = RosterStore.from_schedule([
+        {"name": "Alice", "day": "Monday", "shift_name": "shift_1"},
+        {"name": "Alice", "day": "Monday", "shift_name": "shift_3"},
+        {"name": "Bob", "day": "Monday", "shift_name": "shift_1"},
+        {"name": "Bob", "day": "Someday", "shift_name": "shift_1"},
+    ], WEEK)
+    assert [(e["name"], e["shift_name"]) for e in first.on(WEEK)] == [("Bob", "shift_1"), ("Alice", "shift_3")]
+    assert first.undated == 1
+
+    second = RosterStore.from_schedule([
+        {"name": "Carol", "day": "Monday", "shift_name": "shift_2"},
+        {"name": "Bob", "day": "Monday", "shift_name": "shift_2"},
+    ], WEEK)
+    merged = first.merge(second)
+    assert key(merged.on(WEEK)) == key([
+        {"name": "Alice", "day": "Monday", "shift_name": "shift_3", "start_time": "15:00", "end_time": "23:00"},
+        {"name": "Bob", "day": "Monday", "shift_name": "shift_2", "start_time": "13:00", "end_time": "21:00"},
+        {"name": "Carol", "day": "Monday", "shift_name": "shift_2", "start_time": "13:00", "end_time": "21:00"},
+    ])
+    assert len(RosterStore.from_schedule([], WEEK)) == 0
+
+
+def test_week_keys_rostered_days_of_one_week():
+    store = RosterStore.from_schedule([
+        {"name": "Ana", "day": "Tuesday", "shift_name": "shift_1"},
+        {"name": "Bo", "day": "Sunday", "shift_name": "shift_2"},
+        {"name": "Ana", "day": "Monday", "shift_name": "shift_1", "sheet": "Week 2"},
+    ], WEEK)
+    week = store.week(WEEK + timedelta(days=3))
+    assert list(week) == ["Tuesday", "Sunday"]
+    assert week["Sunday"] == store.day_roster(WEEK + timedelta(days=6))
+    assert list(store.week(WEEK + timedelta(days=7))) == ["Monday"]
+    assert store.week(WEEK - timedelta(days=7)) == {}
+
+
+def test_year_of_history_stays_small():
+    rng = random.Random(0)
+    schedule = [
+        {"name": f"Staff {i}", "day": (WEEK + timedelta(days=d)).isoformat(), "shift_name": f"shift_{rng.randint(1, 3)}"}
+        for d in range(365) for i in range(500) if rng.random() < 0.8
+    ]
+    store = RosterStore.from_schedule(schedule, WEEK)
+    assert store.nbytes < 4 * 2**20
+    assert store.first_date == WEEK and store.last_date == WEEK + timedelta(days=364)
+
+
+def test_entry_date():
+    assert entry_date("Sunday", WEEK, week=1) == date(2026, 11, 1)
+    assert entry_date("2026-10-20 00:00:00", WEEK) == date(2026, 10, 20)
+    assert entry_date(date(2026, 1, 1), WEEK) == date(2026, 1, 1)
+    assert entry_date("Holiday", WEEK) is None
+
+
+def test_import_stays_off_the_generation_stack():
+    script = "import sys, roster_store; print(sorted(m for m in ('week', 'cache', 'prompt', 'openai') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert out.stdout.splitlines()[-1] == "[]"
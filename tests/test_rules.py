@@ -0,0 +1,106 @@
+import copy
+import random
+
+import numpy as np
+
+from rules import RULES, encode, task_categories, validate_constraints, violation_counts
+from solver import solve_schedule
+from tests.test_core import VALID_ASSIGNMENTS
+from tests.test_solver import make_roster
+
+
+def legacy_validate(assignments):
+    """The pre-engine checks that carried over unchanged, used as an oracle."""
+    time_map = {}
+    for a in assignments:
+        for time, task in a["tasks"].items():
+            time_map.setdefault(time, {})[a["employee"]] = task
+
+    def exactly(name, times, count):
+        ok = all(
+            sum(1 for t in time_map[time].values() if name in t) == count
+            for time in times if time in time_map
+        )
+        return ok
+
+    return {
+        "Egress (exactly 2, 10-12)": exactly("Egress", ["10:00", "11:00"], 2),
+        "BOH-Breakroom (exactly 1)": exactly("BOH-Breakroom", ["10:00", "14:00"], 1),
+        "BOH-Restrooms (exactly 1)": exactly("BOH-Restrooms", ["10:00", "14:00"], 1),
+    }
+
+
+def by_rule(results):
+    return {r["rule"]: r for r in results}
+
+
+def test_one_result_per_rule():
+    results = validate_constraints(VALID_ASSIGNMENTS)
+    assert [r["rule"] for r in results] == [r.name for r in RULES]
+    for r in results:
+        assert r["pass"] == (r["violations"] == 0) == (r["cells"] == [])
+
+
+def test_matches_legacy_checks_on_perturbed_schedules():
+    rng = random.Random(7)
+    base = solve_schedule(make_roster(7, 6, 3))["assignments"]
+    tasks = ["Egress", "BOH-Breakroom", "BOH-Restrooms", "Float_0", "Restroom 2"]
+    for _ in range(200):
+        schedule = copy.deepcopy(base)
+        for _ in range(rng.randint(1, 4)):
+            a = rng.choice(schedule)
+            time = rng.choice(list(a["tasks"]))
+            a["tasks"][time] = rng.choice(tasks)
+        results = by_rule(validate_constraints(schedule))
+        for rule, passed in legacy_validate(schedule).items():
+            assert results[rule]["pass"] is passed
+
+
+def test_solver_schedule_passes_every_rule():
+    results = validate_constraints(solve_schedule(make_roster(8, 6, 3))["assignments"])
+    assert [r["rule"] for r in results if not r["pass"]] == []
+
+
+def test_reports_offending_cells():
+    results = by_rule(validate_constraints(VALID_ASSIGNMENTS))
+    caps = results["Restroom 4 max 2h per person"]
+    assert {c["employee"] for c in caps["cells"]} == {"D", "I"}
+    shift = results["Shift hours"]
+    assert shift["cells"] == [{"employee": "I", "time": "21:00"}, {"employee": "I", "time": "22:00"}]
+    floats = results["Float tasks (1 person each)"]
+    assert floats["cells"] == [{"time": "13:00", "task": "Float_0", "count": 2, "expected": "0-1"}]
+
+
+def test_float_limit_applies_only_inside_float_hours():
+    times = ["10:00", "11:00", "18:00", "19:00"]
+    schedule = [{"employee": e, "tasks": {t: "Float_0" for t in times}} for e in ("A", "B")]
+    floats = by_rule(validate_constraints(schedule))["Float tasks (1 person each)"]
+    assert [c["time"] for c in floats["cells"]] == ["11:00", "18:00"]
+
+
+def test_detects_double_booking_across_rows():
+    schedule = [
+        {"employee": "A", "tasks": {"10:00": "Egress"}},
+        {"employee": "A", "tasks": {"10:00": "Restroom 4"}},
+    ]
+    results = by_rule(validate_constraints(schedule))
+    assert results["No double-booking"]["cells"] == [{"employee": "A", "time": "10:00"}]
+
+
+def test_task_spellings_share_categories():
+    assert task_categories("Restroom_2") == task_categories("Restroom 2") == ("Restroom 2",)
+    assert task_categories("Restroom 2&4") == ("Restroom 2", "Restroom 4")
+    assert task_categories("Outdoor - SideHallway") == ("Outdoor", "Outdoor Side Hallway")
+    assert task_categories("Float_-1") == ("Float_-1",)
+    assert task_categories("BOH-Breakroom") == ("BOH-Breakroom",)
+
+
+def test_violation_counts_batches():
+    o = encode(solve_schedule(make_roster(7, 6, 3))["assignments"])
+    batch = np.stack([o.occ, o.occ])
+    batch[1, :, :, :] = False
+    o.occ, o.busy = batch, np.stack([o.busy, o.busy])
+    counts = violation_counts(o)
+    assert counts.shape == (2, len(RULES))
+    assert counts[0].sum() == 0
+    assert counts[1].sum() > 0
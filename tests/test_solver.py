@@ -0,0 +1,105 @@
+from collections import Counter
+
+import pytest
+
+from prompt import generate_schedule
+from rules import validate_constraints
+from solver import BREAK_STARTS, solve_schedule
+
+SHIFT_TIMES = {
+    "shift_1": ("07:00", "15:00"),
+    "shift_2": ("13:00", "21:00"),
+    "shift_3": ("15:00", "23:00"),
+}
+
+
+def make_roster(n1, n2, n3, day="Monday"):
+    roster = []
+    for i in range(n1 + n2 + n3):
+        shift = "shift_1" if i < n1 else "shift_2" if i < n1 + n2 else "shift_3"
+        start, end = SHIFT_TIMES[shift]
+        roster.append({"name": f"Staff {i:02d}", "day": day, "shift_name": shift, "start_time": start, "end_time": end})
+    return roster
+
+
+def slot_counts(assignments):
+    counts = {}
+    for a in assignments:
+        for time, task in a["tasks"].items():
+            counts.setdefault(time, Counter())[task] += 1
+    return counts
+
+
+def test_solver_fully_staffed_roster_has_no_gaps():
+    result = solve_schedule(make_roster(7, 6, 3))
+    assert result["unfilled"] == []
+    counts = slot_counts(result["assignments"])
+    assert counts["07:00"]["Floor 2"] == 2
+    assert counts["10:00"]["Egress"] == 2
+    assert counts["15:00"]["Egress"] == 1
+    for time in ("10:00", "14:00", "17:00", "19:00"):
+        assert counts[time]["BOH-Breakroom"] == 1
+        assert counts[time]["BOH-Restrooms"] == 1
+    for hour in range(14, 21):
+        assert counts[f"{hour:02d}:00"]["Restroom 2"] == 2
+    assert counts["20:30"]["Trash Removal"] == 2
+
+
+def test_solver_respects_shift_hours_breaks_and_caps():
+    roster = make_roster(8, 6, 4)
+    result = solve_schedule(roster)
+    shifts = {s["name"]: s for s in roster}
+    for a in result["assignments"]:
+        staff = shifts[a["employee"]]
+        start, end = int(staff["start_time"][:2]), int(staff["end_time"][:2])
+        hours = [int(t[:2]) for t in a["tasks"]]
+        assert all(start <= h < end for h in hours)
+        breaks = [int(t[:2]) for t, task in a["tasks"].items() if task == "Break"]
+        assert len(breaks) == 1 and breaks[0] in BREAK_STARTS[staff["shift_name"]]
+        per_task = Counter(a["tasks"].values())
+        assert per_task["Restroom 2"] <= 2
+        assert per_task["Restroom 4"] <= 2
+
+
+def test_solver_is_order_insensitive():
+    roster = make_roster(6, 5, 2)
+    assert solve_schedule(roster) == solve_schedule(list(reversed(roster)))
+
+
+def test_solver_reports_understaffed_slots():
+    result = solve_schedule(make_roster(6, 2, 0))
+    assert result["unfilled"]
+    assert all(u["missing"] > 0 for u in result["unfilled"])
+
+
+def test_generate_schedule_solver_backend_skips_llm(monkeypatch):
+    monkeypatch.delenv("HF_TOKEN", raising=False)
+    result, raw = generate_schedule(make_roster(7, 6, 3), backend="solver")
+    assert len(result["assignments"]) == 16
+    assert '"assignments"' in raw
+
+
+def test_generate_schedule_unknown_backend():
+    with pytest.raises(ValueError):
+        generate_schedule([], backend="oracle")
+
+
+@pytest.mark.parametrize("total", [11, 13, 16, 20])
+def test_solver_results_pass_the_rule_engine_unless_gaps_are_reported(total):
+    # Realistic splits: a handful of openers, the rest over the two later shifts
+    for n1 in range(3, 9):
+        for n2 in range(1, total - n1, 2):
+            result = solve_schedule(make_roster(n1, n2, total - n1 - n2))
+            failed = [v for v in validate_constraints(result["assignments"]) if not v["pass"]]
+            if not result["unfilled"]:
+                assert failed == [], (n1, n2, [v["rule"] for v in failed])
+            opening = next((v for v in failed if v["rule"] == "Opening floor coverage (07-09)"), None)
+            if opening:
+                reported = {(u["time"], u["task"]) for u in result["unfilled"]}
+                assert {(c["time"], c["task"]) for c in opening["cells"]} <= reported
+
+
+def test_short_opening_reports_missing_floors():
+    result = solve_schedule(make_roster(5, 5, 3))
+    assert {"time": "07:00", "task": "Floor 4", "missing": 1} in result["unfilled"]
+    assert {"time": "08:00", "task": "Floor 4", "missing": 1} in result["unfilled"]
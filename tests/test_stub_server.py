@@ -0,0 +1,59 @@
+import os
+
+import openai
+import pytest
+
+from benchmarks.bench_load import run_load
+from benchmarks.stub_server import StubServer, prompt_roster
+from prompt import RESPONSE_FORMAT, build_prompt, parse_response
+from tests.test_solver import make_roster
+from transport import TokenBucket, Transport
+
+ROSTER = make_roster(5, 4, 3)
+
+
+def stub_transport(server, retries=0):
+    return Transport("stub", base_url=server.url, max_retries=retries, limiter=TokenBucket(1000, 1000))
+
+
+def test_prompt_roster_reads_full_and_compact_prompts():
+    for compact in (False, True):
+        roster = prompt_roster(build_prompt(ROSTER, compact))
+        assert [(s["name"], s["shift_name"], s["start_time"]) for s in roster] == [
+            (s["name"], s["shift_name"], s["start_time"]) for s in ROSTER
+        ]
+
+
+def test_blocking_and_streaming_replies_parse_as_schedules():
+    messages = [{"role": "user", "content": build_prompt(ROSTER)}]
+    with StubServer(latency=0, token_rate=1e6) as server:
+        t = stub_transport(server)
+        blocking = t.complete(messages, model="stub")
+        streamed = "".join(t.stream(messages, model="stub", response_format=RESPONSE_FORMAT))
+    assert blocking.startswith("<response>") and not streamed.startswith("<response>")
+    for text in (blocking, streamed):
+        assert len(parse_response(text)["assignments"]) == len(ROSTER)
+    assert t.calls[-1]["completion_tokens"] > 0 and t.calls[-1]["first_token"] is not None
+
+
+def test_injected_errors_are_retried_then_raised():
+    with StubServer(latency=0, error_rate=1.0, errors=(503,)) as server:
+        with pytest.raises(openai.InternalServerError):
+            stub_transport(server, retries=1).complete([{"role": "user", "content": "hi"}], model="stub")
+        assert server.requests == server.failures == 2
+
+
+def test_structured_output_can_be_refused():
+    with StubServer(latency=0, structured=False) as server:
+        with pytest.raises(openai.BadRequestError):
+            stub_transport(server).complete([{"role": "user", "content": "hi"}], model="stub",
+                                            response_format=RESPONSE_FORMAT)
+
+
+def test_load_run_reports_stage_percentiles():
+    base_url = os.environ.get("HF_BASE_URL")
+    report = run_load(sessions=2, rounds=1, staff=10, rate=1000, latency=0, token_rate=1e6)
+    assert report["failed"] == 0 and report["sessions"] == 2
+    assert report["stages"]["session"]["n"] == 2
+    assert report["stages"]["generate"]["p50"] <= report["stages"]["session"]["p99"]
+    assert os.environ.get("HF_BASE_URL") == base_url
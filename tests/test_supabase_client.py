@@ -0,0 +1,193 @@
+import subprocess
+import sys
+
+import pytest
+
+import supabase_client
+from supabase_client import diff_schedule, load_schedule, push_schedule, roster_hash
+
+
+class FakeQuery:
+    def __init__(self, table, op, payload=None, columns=None):
+        self.table, self.op, self.payload, self.columns = table, op, payload, columns
+
+    def in_(self, column, values):
+        self.payload = (column, list(values))
+        return self
+
+    def eq(self, column, value):
+        self.payload = {**(self.payload or {}), column: value}
+        return self
+
+    def order(self, column):
+        self.order_by = column
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end)
+        return self
+
+    def execute(self):
+        t = self.table
+        t.requests.append((self.op, self.payload))
+        if self.op == "select":
+            filters = self.payload or {}
+            rows = sorted((r for r in t.rows if all(r[k] == v for k, v in filters.items())),
+                          key=lambda r: r[self.order_by])
+            # Like PostgREST, never return more than max_rows per request
+            start, end = self.window
+            rows = rows[start:min(end + 1, start + t.max_rows)]
+            return type("Response", (), {"data": [{c: r[c] for c in self.columns} for r in rows]})()
+        if self.op == "insert":
+            for row in self.payload:
+                t.next_id += 1
+                t.rows.append({"id": t.next_id, **row})
+        elif self.op == "upsert":
+            by_id = {r["id"]: r for r in t.rows}
+            for row in self.payload:
+                by_id[row["id"]].update(row)
+        elif self.op == "delete":
+            ids = set(self.payload[1])
+            t.rows = [r for r in t.rows if r["id"] not in ids]
+        return type("Response", (), {"data": []})()
+
+
+class FakeTable:
+    def __init__(self, rows=()):
+        self.rows = [{"id": i + 1, **r} for i, r in enumerate(rows)]
+        self.next_id = len(self.rows)
+        self.requests = []
+        self.max_rows = 1000
+
+    def select(self, columns):
+        return FakeQuery(self, "select", columns=[c.strip() for c in columns.split(",")])
+
+    def insert(self, rows):
+        return FakeQuery(self, "insert", rows)
+
+    def upsert(self, rows):
+        return FakeQuery(self, "upsert", rows)
+
+    def delete(self):
+        return FakeQuery(self, "delete")
+
+
+class FakeClient:
+    def __init__(self, table):
+        self._table = table
+
+    def table(self, name):
+        return self._table
+
+
+def entry(name, day, shift="shift_1", start="07:00", end="15:00"):
+    return {"name": name, "day": day, "shift_name": shift, "start_time": start, "end_time": end}
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(supabase_client, "_pushed_hash", None)
+    monkeypatch.setattr(supabase_client, "_reads", supabase_client.LRUCache(64, ttl=60))
+
+
+def test_hash_ignores_order_and_extra_keys():
+    a = [entry("Ana", "Monday"), entry("Bo", "Monday")]
+    b = [{**entry("Bo", "Monday"), "sheet": "Week 1"}, entry("Ana", "Monday")]
+    assert roster_hash(a) == roster_hash(b)
+    assert roster_hash(a) != roster_hash([entry("Ana", "Monday")])
+
+
+def test_diff_on_name_and_day():
+    stored = [{"id": 1, **entry("Ana", "Monday")}, {"id": 2, **entry("Bo", "Monday")},
+              {"id": 3, **entry("Cy", "Monday")}, {"id": 4, **entry("Ana", "Monday")}]
+    new = [entry("Ana", "Monday"), entry("Bo", "Monday", "shift_2", "13:00", "21:00"), entry("Di", "Tuesday")]
+    inserts, updates, delete_ids = diff_schedule(stored, new)
+    assert inserts == [entry("Di", "Tuesday")]
+    assert updates == [{"id": 2, **entry("Bo", "Monday", "shift_2", "13:00", "21:00")}]
+    assert delete_ids == [3, 4]
+
+    inserts, _, _ = diff_schedule([], [entry("Ana", "Monday"), entry("Ana", "Monday", "shift_2", "13:00", "21:00")])
+    assert inserts == [entry("Ana", "Monday", "shift_2", "13:00", "21:00")]
+
+
+def test_push_syncs_table_without_emptying_it(monkeypatch):
+    monkeypatch.setattr(supabase_client, "BATCH_SIZE", 2)
+    table = FakeTable([entry("Ana", "Monday"), entry("Old", "Monday")])
+    new = [entry(f"P{i}", "Monday") for i in range(5)] + [entry("Ana", "Monday", "shift_3", "15:00", "23:00")]
+
+    result = push_schedule(new, client=FakeClient(table))
+    assert result == {"skipped": False, "inserted": 5, "updated": 1, "deleted": 1}
+    assert sorted((r["name"], r["shift_name"]) for r in table.rows) == sorted((r["name"], r["shift_name"]) for r in new)
+    ops = [op for op, _ in table.requests]
+    assert ops == ["select", "insert", "insert", "insert", "upsert", "delete"]
+    assert all(len(payload) <= 2 for op, payload in table.requests if op in ("insert", "upsert"))
+
+
+def test_push_and_load_page_through_large_tables(monkeypatch):
+    monkeypatch.setattr(supabase_client, "PAGE_SIZE", 3)
+    table = FakeTable([entry(f"P{i}", "Monday") for i in range(7)])
+    table.max_rows = 3
+    result = push_schedule([entry(f"P{i}", "Monday") for i in range(7)], client=FakeClient(table))
+    assert result == {"skipped": False, "inserted": 0, "updated": 0, "deleted": 0}
+    assert [op for op, _ in table.requests] == ["select"] * 3
+
+    monkeypatch.setattr(supabase_client, "_client", FakeClient(table))
+    assert len(load_schedule()) == 7 and len(load_schedule("Monday")) == 7
+    assert len(selects(table)) == 6
+
+
+def test_unchanged_roster_is_skipped():
+    table = FakeTable()
+    roster = [entry("Ana", "Monday")]
+    push_schedule(roster, client=FakeClient(table))
+    requests = len(table.requests)
+    assert push_schedule(list(reversed(roster)), client=FakeClient(table))["skipped"]
+    assert len(table.requests) == requests
+    assert not push_schedule(roster, client=FakeClient(table), force=True)["skipped"]
+
+
+def selects(table):
+    return [payload for op, payload in table.requests if op == "select"]
+
+
+def test_load_filters_on_server_and_caches(monkeypatch):
+    table = FakeTable([entry("Ana", "Monday"), entry("Bo", "Tuesday", "shift_2", "13:00", "21:00")])
+    monkeypatch.setattr(supabase_client, "_client", FakeClient(table))
+    assert load_schedule("Tuesday") == [entry("Bo", "Tuesday", "shift_2", "13:00", "21:00")]
+    assert load_schedule("Tuesday") == load_schedule("Tuesday")
+    assert selects(table) == [{"day": "Tuesday"}]
+    assert load_schedule("Monday", shift_name="shift_2") == []
+    assert selects(table)[-1] == {"day": "Monday", "shift_name": "shift_2"}
+
+
+def test_day_switches_after_week_load_are_local(monkeypatch):
+    table = FakeTable([entry("Ana", "Monday"), entry("Bo", "Tuesday")])
+    monkeypatch.setattr(supabase_client, "_client", FakeClient(table))
+    assert len(load_schedule()) == 2
+    for day in ("Monday", "Tuesday", "Sunday", "Monday"):
+        assert all(r["day"] == day for r in load_schedule(day))
+    assert len(selects(table)) == 1
+
+
+def test_push_invalidates_cached_reads(monkeypatch):
+    table = FakeTable([entry("Ana", "Monday")])
+    client = FakeClient(table)
+    monkeypatch.setattr(supabase_client, "_client", client)
+    assert [r["name"] for r in load_schedule("Monday")] == ["Ana"]
+    push_schedule([entry("Ana", "Monday"), entry("Bo", "Monday")], client=client)
+    assert [r["name"] for r in load_schedule("Monday")] == ["Ana", "Bo"]
+
+
+def test_client_is_created_once(monkeypatch):
+    created = []
+    monkeypatch.setattr(supabase_client, "_client", None)
+    monkeypatch.setattr(supabase_client, "_credentials", lambda: ("https://db", "key"))
+    monkeypatch.setattr(supabase_client, "create_client", lambda url, key: created.append(url) or object())
+    assert supabase_client.get_client() is supabase_client.get_client()
+    assert created == ["https://db"]
+
+
+def test_import_does_not_load_the_generation_stack():
+    script = "import sys, supabase_client; print(sorted(m for m in ('cache', 'prompt', 'openai', 'solver') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert out.stdout.splitlines()[-1] == "[]"
@@ -0,0 +1,36 @@
+from timeline import EMPTY_CELL, TIME_SLOTS, TIMELINE_STYLE, build_timeline_html, get_task_color, timeline_body, timeline_row
+
+
+def assignment(name, **tasks):
+    return {"employee": name, "tasks": {t.replace("h", ":"): task for t, task in tasks.items()}}
+
+
+def test_body_has_one_row_per_employee_and_no_stylesheet():
+    body = timeline_body([assignment("Ana Lopez", **{"07h00": "Floor 1"}), assignment("Ben Ng")])
+    assert "<style>" not in body
+    assert body.count("<tr>") == 3  # header + 2 rows
+    assert ">AL<" in body and "Floor 1" in body
+    assert body.count(EMPTY_CELL) == 2 * len(TIME_SLOTS) - 1
+
+
+def test_full_html_carries_stylesheet_once():
+    html = build_timeline_html([assignment("Ana", **{"08h00": "BOH"})] * 3)
+    assert html.startswith(TIMELINE_STYLE) and html.count("<style>") == 1
+    assert f"background:{get_task_color('BOH')};" in html
+
+
+def test_editing_one_person_rebuilds_one_row():
+    rows = [assignment(f"Staff {i}", **{"07h00": "Floor 0", "08h00": "Break"}) for i in range(50)]
+    timeline_body(rows)
+    before = timeline_row.cache_info()
+    rows[7] = assignment("Staff 7", **{"07h00": "Outdoor"})
+    timeline_body(rows)
+    after = timeline_row.cache_info()
+    assert after.misses - before.misses == 1
+    assert after.hits - before.hits == 49
+
+
+def test_names_and_tasks_are_escaped():
+    body = timeline_body([assignment("<b>Ana</b>", **{"07h00": "<img src=x onerror=alert(1)>", "08h00": "Floor < 2"})])
+    assert "<img" not in body and "<b>" not in body
+    assert "&lt;img src=x onerror=alert(1)&gt;" in body and "Floor &lt; 2" in body and "&lt;b&gt;Ana&lt;/b&gt;" in body
@@ -0,0 +1,140 @@
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+import transport
+from transport import TokenBucket, Transport, call_usage, get_transport, track_calls
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def status_error(cls, status, headers=None):
+    response = httpx.Response(status, headers=headers or {}, request=httpx.Request("POST", "http://llm"))
+    return cls("error", response=response, body=None)
+
+
+def completion(text="ok", prompt_tokens=10, completion_tokens=5):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens),
+    )
+
+
+@pytest.fixture
+def fake_transport(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(transport.time, "sleep", sleeps.append)
+    t = Transport("key", limiter=TokenBucket(rate=1000, capacity=1000))
+    t.sleeps = sleeps
+    return t
+
+
+def script(t, monkeypatch, outcomes):
+    outcomes = iter(outcomes)
+
+    def create(**kwargs):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(t.client.chat.completions, "create", create)
+
+
+def test_token_bucket_spaces_requests_after_burst():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    clock.now += 1
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_retries_rate_limits_and_server_errors(fake_transport, monkeypatch):
+    script(fake_transport, monkeypatch, [
+        status_error(openai.RateLimitError, 429, {"retry-after": "2"}),
+        status_error(openai.InternalServerError, 503),
+        completion("done"),
+    ])
+    assert fake_transport.complete([{"role": "user", "content": "hi"}], model="m") == "done"
+    assert fake_transport.sleeps[0] == 2.0
+    call = fake_transport.calls[-1]
+    assert call["attempts"] == 3 and call["ok"]
+    assert (call["prompt_tokens"], call["completion_tokens"]) == (10, 5)
+
+
+def test_does_not_retry_client_errors(fake_transport, monkeypatch):
+    script(fake_transport, monkeypatch, [status_error(openai.BadRequestError, 400), completion()])
+    with pytest.raises(openai.BadRequestError):
+        fake_transport.complete([], model="m")
+    assert fake_transport.sleeps == []
+    assert fake_transport.calls[-1]["error"] == "BadRequestError"
+
+
+def test_gives_up_after_max_retries(fake_transport, monkeypatch):
+    fake_transport.max_retries = 1
+    script(fake_transport, monkeypatch, [status_error(openai.RateLimitError, 429)] * 3)
+    with pytest.raises(openai.RateLimitError):
+        fake_transport.complete([], model="m")
+    assert fake_transport.calls[-1]["attempts"] == 2
+
+
+def test_transport_is_shared_per_key():
+    assert get_transport("a") is get_transport("a")
+    assert get_transport("b") is not None
+
+
+
+def test_track_calls_sums_reported_usage_of_this_callers_calls(fake_transport, monkeypatch):
+    script(fake_transport, monkeypatch, [completion(prompt_tokens=1), completion(prompt_tokens=100, completion_tokens=7)])
+
+    async def acreate(**kwargs):
+        return completion(prompt_tokens=200, completion_tokens=9)
+
+    fake_transport._aclient = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=acreate)))
+    fake_transport.complete([])
+    with track_calls() as calls:
+        fake_transport.complete([])
+        fake_transport.run(fake_transport.acomplete([]))  # runs on the transport's loop thread
+    assert len(fake_transport.calls) == 3 and len(calls) == 2
+    assert call_usage(calls) == (300, 16)
+    assert call_usage([{"prompt_tokens": None, "completion_tokens": None}]) is None
+
+
+def test_close_stops_the_loop_thread_and_clients(fake_transport, monkeypatch):
+    closed = []
+
+    async def acreate(**kwargs):
+        return completion()
+
+    async def aclose():
+        closed.append("async")
+
+    fake_transport._aclient = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=acreate)),
+                                              close=aclose)
+    assert fake_transport.run(fake_transport.acomplete([])) == "ok"
+    loop, thread = fake_transport._loop, fake_transport._thread
+    fake_transport.close()
+    assert closed == ["async"] and not thread.is_alive() and loop.is_closed()
+    assert fake_transport.client._client.is_closed
+
+
+def test_changed_base_url_closes_the_old_transport(monkeypatch):
+    monkeypatch.setattr(transport, "_transport", None)
+    monkeypatch.setenv("HF_BASE_URL", "http://one/v1")
+    first = get_transport("k")
+    closed = []
+    monkeypatch.setattr(first, "close", lambda: closed.append(first))
+    assert get_transport("k") is first and closed == []
+    monkeypatch.setenv("HF_BASE_URL", "http://two/v1")
+    assert get_transport("k").base_url == "http://two/v1" and closed == [first]
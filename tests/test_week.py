@@ -0,0 +1,51 @@
+import time
+
+import week
+from app import load_bundled_schedule, week_to_csv
+from tests.test_solver import make_roster
+
+
+def week_roster():
+    return [s for day in week.DAYS for s in make_roster(7, 6, 3, day=day)]
+
+
+def test_days_run_concurrently(monkeypatch):
+    def slow_generate(day_staff, **kwargs):
+        time.sleep(0.2)
+        return {"assignments": [{"employee": day_staff[0]["name"], "tasks": {"07:00": "Floor 0"}}]}, "raw", False
+
+    monkeypatch.setattr(week, "cached_generate_schedule", slow_generate)
+    started = time.perf_counter()
+    results = week.generate_week(week_roster(), auto_repair=False)
+    assert time.perf_counter() - started < 0.2 * 3
+    assert list(results) == week.DAYS
+    assert all(r.ok and r.attempts == 1 for r in results.values())
+
+
+def test_failed_day_is_retried_alone(monkeypatch):
+    calls = {}
+
+    def flaky_generate(day_staff, **kwargs):
+        day = day_staff[0]["day"]
+        calls[day] = calls.get(day, 0) + 1
+        if day == "Tuesday" and calls[day] == 1:
+            raise TimeoutError("timed out")
+        if day == "Friday":
+            return None, "garbage", False
+        return {"assignments": []}, "{}", False
+
+    monkeypatch.setattr(week, "cached_generate_schedule", flaky_generate)
+    results = week.generate_week(week_roster(), auto_repair=False)
+    assert results["Tuesday"].ok and results["Tuesday"].attempts == 2
+    assert not results["Friday"].ok and results["Friday"].attempts == week.DAY_ATTEMPTS
+    assert results["Friday"].error
+    assert calls["Monday"] == 1
+
+
+def test_solver_week_and_csv():
+    schedule = load_bundled_schedule()
+    results = week.generate_week(schedule, backend="solver")
+    assert all(r.ok for r in results.values() if any(s["day"] == r.day for s in schedule))
+    csv = week_to_csv(results)
+    assert csv.splitlines()[0] == "Day,Employee,Time,Task"
+    assert {line.split(",")[0] for line in csv.splitlines()[1:]} <= set(week.DAYS)
@@ -0,0 +1,268 @@
+"""Timeline grid HTML: one row per employee, one column per hour.
+
+Cell fragments and colors are computed once per distinct task, and each
+employee row is cached on its name and task tuple, so a rerun or a
+single edit only builds the rows that changed. The stylesheet is a
+separate constant; a page includes it once, however many grids it shows.
+Names and tasks can be typed into the override editor, so both are escaped.
+"""
+
+from functools import lru_cache
+from html import escape
+
+from matrix import ScheduleMatrix
+
+TASK_COLORS = {
+    "Floor": "#6C9BD2",
+    "Outdoor": "#7BC67E",
+    "Restroom": "#E8A87C",
+    "Egress": "#D4A5D0",
+    "BOH": "#F0C75E",
+    "Float": "#85E0E0",
+    "Break": "#CCCCCC",
+}
+
+TIME_SLOTS = ["07:00", "08:00", "09:00", "10:00", "11:00", "12:00", "13:00", "14:00", "15:00", "16:00", "17:00", "18:00", "19:00", "20:00", "21:00", "22:00"]
+# Viewport width for image export: 120px per hour plus the name column
+TIMELINE_WIDTH = len(TIME_SLOTS) * 120 + 300
+ROW_ENTRIES = 4096
+
+TIMELINE_STYLE = """<style>
+    @import url('https://fonts.googleapis.com/css2?family=DM+Sans:ital,opsz,wght@0,9..40,300;0,9..40,500;0,9..40,700;1,9..40,300&display=swap');
+
+    .hk-grid-wrap {
+        font-family: 'DM Sans', -apple-system, BlinkMacSystemFont, sans-serif;
+        max-width: 100%;
+        overflow-x: auto;
+        color: #1A1A2E;
+    }
+
+    /* ── Legend ── */
+    .hk-legend {
+        display: flex;
+        flex-wrap: wrap;
+        gap: 6px;
+        margin-bottom: 16px;
+        padding: 10px 14px;
+        background: #F1F3F5;
+        border-radius: 8px;
+        border: 1px solid #E2E6EA;
+    }
+    .hk-legend-item {
+        display: inline-flex;
+        align-items: center;
+        gap: 6px;
+        padding: 3px 10px 3px 6px;
+        background: #FFFFFF;
+        border-radius: 100px;
+        border: 1px solid #E2E6EA;
+    }
+    .hk-legend-swatch {
+        width: 10px;
+        height: 10px;
+        border-radius: 3px;
+        flex-shrink: 0;
+    }
+    .hk-legend-label {
+        font-size: 11px;
+        font-weight: 500;
+        letter-spacing: 0.02em;
+        color: #495057;
+    }
+
+    /* ── Table ── */
+    .hk-table {
+        border-collapse: separate;
+        border-spacing: 0;
+        width: 100%;
+        border-radius: 10px;
+        overflow: hidden;
+        border: 1px solid #DEE2E6;
+        box-shadow: 0 1px 3px rgba(0,0,0,0.04), 0 4px 12px rgba(0,0,0,0.03);
+    }
+
+    .hk-th {
+        padding: 10px 8px;
+        font-size: 11px;
+        font-weight: 700;
+        letter-spacing: 0.06em;
+        text-transform: uppercase;
+        text-align: center;
+        color: #868E96;
+        background: #F8F9FA;
+        border-bottom: 2px solid #DEE2E6;
+        min-width: 100px;
+    }
+    .hk-th:first-child {
+        text-align: left;
+        padding-left: 16px;
+        min-width: 180px;
+    }
+
+    /* ── Name cell ── */
+    .hk-name-cell {
+        padding: 8px 12px 8px 16px;
+        border-bottom: 1px solid #ECEEF0;
+        vertical-align: middle;
+    }
+    .hk-name-row {
+        display: flex;
+        align-items: center;
+        gap: 10px;
+    }
+    .hk-initials {
+        width: 28px;
+        height: 28px;
+        border-radius: 6px;
+        background: #E9ECEF;
+        color: #495057;
+        font-size: 10px;
+        font-weight: 700;
+        letter-spacing: 0.04em;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        flex-shrink: 0;
+    }
+    .hk-name {
+        font-size: 13px;
+        font-weight: 500;
+        color: #212529;
+        white-space: nowrap;
+    }
+
+    /* ── Task cells ── */
+    .hk-cell {
+        padding: 4px 3px;
+        border-bottom: 1px solid #ECEEF0;
+        border-left: 1px solid #F1F3F5;
+        vertical-align: middle;
+        text-align: center;
+    }
+    .hk-block {
+        padding: 7px 6px;
+        border-radius: 5px;
+        min-height: 32px;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        transition: transform 0.1s ease, box-shadow 0.1s ease;
+    }
+    .hk-block:hover {
+        transform: translateY(-1px);
+        box-shadow: 0 2px 6px rgba(0,0,0,0.1);
+    }
+    .hk-task-text {
+        font-size: 11px;
+        font-weight: 600;
+        color: rgba(0,0,0,0.7);
+        letter-spacing: 0.01em;
+        white-space: nowrap;
+        line-height: 1.2;
+    }
+    .hk-empty {
+        min-height: 32px;
+        border-radius: 5px;
+        background: repeating-linear-gradient(
+            -45deg,
+            transparent,
+            transparent 3px,
+            #F1F3F5 3px,
+            #F1F3F5 4px
+        );
+    }
+
+    /* ── Row stripes ── */
+    .hk-table tbody tr {
+        background: #FFFFFF;
+    }
+    .hk-table tbody tr:nth-child(even) {
+        background: #F8F9FA;
+    }
+
+    /* ── Row hover ── */
+    .hk-table tbody tr:hover {
+        background: #F0F4FF !important;
+    }
+    .hk-table tbody tr:hover .hk-initials {
+        background: #D0D7DE;
+    }
+
+    /* ── Last row no border ── */
+    .hk-table tbody tr:last-child td {
+        border-bottom: none;
+    }
+</style>"""
+
+EMPTY_CELL = '<td class="hk-cell"><div class="hk-empty"></div></td>'
+HEADER = (
+    '<thead><tr><th class="hk-th">Employee</th>'
+    + "".join(f'<th class="hk-th">{t}</th>' for t in TIME_SLOTS)
+    + "</tr></thead>"
+)
+LEGEND = '<div class="hk-legend">' + "".join(
+    f'<div class="hk-legend-item">'
+    f'<span class="hk-legend-swatch" style="background:{color};"></span>'
+    f'<span class="hk-legend-label">{cat}</span>'
+    f'</div>'
+    for cat, color in TASK_COLORS.items()
+) + "</div>"
+
+
+@lru_cache(maxsize=1024)
+def get_task_color(task: str) -> str:
+    task_lower = task.lower()
+    if "boh" in task_lower:
+        return TASK_COLORS["BOH"]
+    if task_lower == "break":
+        return TASK_COLORS["Break"]
+    if "floor" in task_lower:
+        return TASK_COLORS["Floor"]
+    if "outdoor" in task_lower:
+        return TASK_COLORS["Outdoor"]
+    if "restroom" in task_lower:
+        return TASK_COLORS["Restroom"]
+    if "egress" in task_lower:
+        return TASK_COLORS["Egress"]
+    if "float" in task_lower:
+        return TASK_COLORS["Float"]
+    return "#B0B0B0"
+
+
+@lru_cache(maxsize=1024)
+def _cell(task: str) -> str:
+    if not task:
+        return EMPTY_CELL
+    return (
+        f'<td class="hk-cell">'
+        f'<div class="hk-block" style="background:{get_task_color(task)};">'
+        f'<span class="hk-task-text">{escape(task)}</span>'
+        f'</div></td>'
+    )
+
+
+@lru_cache(maxsize=ROW_ENTRIES)
+def timeline_row(name: str, tasks: tuple[str, ...]) -> str:
+    """One ``<tr>``; ``tasks`` holds one entry per ``TIME_SLOTS`` slot ("" when idle)."""
+    initials = "".join(w[0].upper() for w in name.split()[:2])
+    return (
+        f'<tr><td class="hk-name-cell"><div class="hk-name-row">'
+        f'<span class="hk-initials">{escape(initials)}</span>'
+        f'<span class="hk-name">{escape(name)}</span>'
+        f'</div></td>{"".join(map(_cell, tasks))}</tr>'
+    )
+
+
+def timeline_body(assignments: list[dict] | ScheduleMatrix) -> str:
+    """The grid without its stylesheet, for pages that include ``TIMELINE_STYLE`` once."""
+    if isinstance(assignments, ScheduleMatrix):
+        rows = assignments.tasks(TIME_SLOTS)
+    else:
+        rows = ((a["employee"], tuple(a["tasks"].get(t) or "" for t in TIME_SLOTS)) for a in assignments)
+    rows = "".join(timeline_row(name, tasks) for name, tasks in rows)
+    return f'<div class="hk-grid-wrap">{LEGEND}<table class="hk-table">{HEADER}<tbody>{rows}</tbody></table></div>'
+
+
+def build_timeline_html(assignments: list[dict] | ScheduleMatrix) -> str:
+    """Self-contained grid: stylesheet plus body."""
+    return TIMELINE_STYLE + timeline_body(assignments)
@@ -0,0 +1,286 @@
+"""Long-lived LLM transport shared by every Streamlit session in the process.
+
+One OpenAI client (and its keep-alive HTTP connection pool) is reused across
+calls. Every request gets a deadline, 429/5xx responses and connection
+errors are retried with jittered exponential backoff, a token-bucket limiter
+spaces requests process-wide, and each call's latency and token usage is
+recorded in ``Transport.calls``. ``track_calls()`` collects just the calls
+made by one caller (the transport is shared by every session), including
+those it runs on the transport's event loop.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+import metrics
+
+BASE_URL = os.environ.get("HF_BASE_URL", "https://router.huggingface.co/v1")
+REQUEST_TIMEOUT = float(os.environ.get("HK_LLM_TIMEOUT", "120"))
+MAX_RETRIES = int(os.environ.get("HK_LLM_RETRIES", "3"))
+RATE_PER_SECOND = float(os.environ.get("HK_LLM_RATE", "2"))
+BURST = int(os.environ.get("HK_LLM_BURST", "8"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 20.0
+POOL_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=300)
+CALL_HISTORY = 500
+
+RETRYABLE = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``reserve`` returns how long to wait for a token."""
+
+    def __init__(self, rate: float = RATE_PER_SECOND, capacity: int = BURST, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+
+LIMITER = TokenBucket()
+
+
+def _retryable(error: Exception) -> bool:
+    if isinstance(error, RETRYABLE):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+    retry_after = None
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after", ""))
+        except ValueError:
+            pass
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_CAP)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt))
+
+
+def _usage(usage) -> tuple[int | None, int | None]:
+    if usage is None:
+        return None, None
+    return usage.prompt_tokens, usage.completion_tokens
+
+
+_tracked: ContextVar[list | None] = ContextVar("tracked_calls", default=None)
+
+
+@contextmanager
+def track_calls() -> Iterator[list[dict]]:
+    """Collect the ``Transport.calls`` records of every call made in this block."""
+    calls = []
+    token = _tracked.set(calls)
+    try:
+        yield calls
+    finally:
+        _tracked.reset(token)
+
+
+def call_usage(calls: list[dict]) -> tuple[int, int] | None:
+    """Summed (prompt, completion) tokens the server reported for ``calls``; None if it reported none."""
+    reported = [c for c in calls if c["prompt_tokens"] is not None or c["completion_tokens"] is not None]
+    if not reported:
+        return None
+    return (sum(c["prompt_tokens"] or 0 for c in reported),
+            sum(c["completion_tokens"] or 0 for c in reported))
+
+
+class Transport:
+    def __init__(self, api_key: str, base_url: str = BASE_URL, timeout: float = REQUEST_TIMEOUT,
+                 max_retries: int = MAX_RETRIES, limiter: TokenBucket | None = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limiter = limiter or LIMITER
+        self.calls = deque(maxlen=CALL_HISTORY)
+        self.client = OpenAI(
+            base_url=base_url, api_key=api_key, timeout=timeout, max_retries=0,
+            http_client=httpx.Client(limits=POOL_LIMITS, timeout=timeout),
+        )
+        self._async_args = {"base_url": base_url, "api_key": api_key, "timeout": timeout, "max_retries": 0}
+        self._aclient = None
+        self._loop = None
+        self._thread = None
+        self._loop_lock = threading.Lock()
+
+    def _record(self, started: float, attempts: int, usage=None, error: Exception | None = None,
+                first_token: float | None = None) -> None:
+        prompt_tokens, completion_tokens = _usage(usage)
+        latency = time.perf_counter() - started
+        attrs = {"attempts": attempts, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+        if first_token is not None:
+            attrs["first_token"] = round(first_token, 6)
+        if error is not None:
+            attrs["error"] = type(error).__name__
+        metrics.record("llm", latency, **attrs)
+        call = {
+            "latency": latency,
+            "first_token": first_token,
+            "attempts": attempts,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "ok": error is None,
+            "error": type(error).__name__ if error else None,
+        }
+        self.calls.append(call)
+        tracked = _tracked.get()
+        if tracked is not None:
+            tracked.append(call)
+
+    def _deadline_left(self, started: float) -> float:
+        return self.timeout - (time.perf_counter() - started)
+
+    def _with_retries(self, send, started: float):
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                return send(max(self._deadline_left(started), 1.0)), attempt + 1
+            except Exception as e:
+                delay = _backoff(attempt, e)
+                if not _retryable(e) or attempt >= self.max_retries or delay >= self._deadline_left(started):
+                    self._record(started, attempt + 1, error=e)
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+    def complete(self, messages: list[dict], **params) -> str:
+        """Blocking chat completion; returns the message text."""
+        started = time.perf_counter()
+        response, attempts = self._with_retries(
+            lambda timeout: self.client.chat.completions.create(messages=messages, timeout=timeout, **params),
+            started,
+        )
+        self._record(started, attempts, response.usage)
+        return response.choices[0].message.content
+
+    def stream(self, messages: list[dict], **params) -> Iterator[str]:
+        """Streaming chat completion; yields text deltas as they arrive."""
+        started = time.perf_counter()
+        response, attempts = self._with_retries(
+            lambda timeout: self.client.chat.completions.create(
+                messages=messages, timeout=timeout, stream=True,
+                stream_options={"include_usage": True}, **params,
+            ),
+            started,
+        )
+        usage, first_token = None, None
+        for chunk in response:
+            usage = chunk.usage or usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                yield chunk.choices[0].delta.content
+        self._record(started, attempts, usage, first_token=first_token)
+
+    # --- async ---
+
+    def run(self, coro):
+        """Run ``coro`` on the transport's own event loop and wait for the result.
+
+        The loop lives in a daemon thread for the life of the process, so the
+        async client's connection pool survives between calls.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name="llm-transport")
+                self._thread.start()
+        return asyncio.run_coroutine_threadsafe(_tracking(_tracked.get(), coro), self._loop).result()
+
+    async def acomplete(self, messages: list[dict], **params) -> str:
+        if self._aclient is None:
+            self._aclient = AsyncOpenAI(**self._async_args, http_client=httpx.AsyncClient(limits=POOL_LIMITS))
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            wait = self.limiter.reserve()
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                response = await self._aclient.chat.completions.create(
+                    messages=messages, timeout=max(self._deadline_left(started), 1.0), **params
+                )
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = _backoff(attempt, e)
+                if not _retryable(e) or attempt >= self.max_retries or delay >= self._deadline_left(started):
+                    self._record(started, attempt + 1, error=e)
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+        self._record(started, attempt + 1, response.usage)
+        return response.choices[0].message.content
+
+    def close(self) -> None:
+        """Close both HTTP clients and stop the event-loop thread."""
+        self.client.close()
+        with self._loop_lock:
+            loop, thread, self._loop, self._thread = self._loop, self._thread, None, None
+        if loop is None:
+            return
+        if self._aclient is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._aclient.close(), loop).result(timeout=5)
+            except Exception:
+                pass
+            self._aclient = None
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        if not thread.is_alive():
+            loop.close()
+
+
+async def _tracking(tracked: list | None, coro):
+    # Tasks copy the loop thread's context, so carry the caller's tracker over
+    _tracked.set(tracked)
+    return await coro
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport(api_key: str) -> Transport:
+    """Process-wide transport; rebuilt, closing the old one, only if the API key or ``HF_BASE_URL`` changes."""
+    global _transport
+    base_url = os.environ.get("HF_BASE_URL", BASE_URL)
+    old = None
+    with _transport_lock:
+        if _transport is None or _transport.client.api_key != api_key or _transport.base_url != base_url:
+            old, _transport = _transport, Transport(api_key, base_url)
+        current = _transport
+    if old is not None:
+        old.close()
+    return current
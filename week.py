@@ -0,0 +1,109 @@
+"""Whole-week schedule generation.
+
+Every day of the roster is generated on a bounded thread pool, so a week
+takes about as long as its slowest day. Days are retried independently and
+reported as they finish, which lets the UI show progress day by day. The
+LLM stack (cache, prompt, openai) is imported on the first LLM day only.
+"""
+
+import json
+import os
+import random
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import metrics
+from repair import repair_schedule
+from roster import DAYS
+from rules import score_schedule
+from solver import solve_schedule
+
+WEEK_WORKERS = int(os.environ.get("HK_WEEK_WORKERS", "7"))
+DAY_ATTEMPTS = 3
+
+
+@dataclass
+class DayResult:
+    day: str
+    result: dict | None = None
+    raw: str = ""
+    cache_hit: bool = False
+    attempts: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+    repair: dict | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.result is not None
+
+
+def cached_generate_schedule(day_staff: list[dict], backend: str = "llm", **kwargs) -> tuple[dict | None, str, bool]:
+    """``cache.cached_generate_schedule``; the solver runs without importing the LLM stack."""
+    if backend == "solver":
+        with metrics.span("generate", backend=backend, rows=len(day_staff), cache_hit=False):
+            result = solve_schedule(day_staff)
+        return result, json.dumps(result, indent=2), False
+    from cache import cached_generate_schedule as generate
+    return generate(day_staff, backend=backend, **kwargs)
+
+
+def _generate_day(day: str, day_staff: list[dict], backend: str, samples: int, compact: bool,
+                  auto_repair: bool, bypass_cache: bool, attempts: int) -> DayResult:
+    out = DayResult(day)
+    started = time.perf_counter()
+    if not day_staff:
+        out.error = "No staff available"
+        return out
+
+    for attempt in range(1, attempts + 1):
+        out.attempts = attempt
+        try:
+            result, raw, hit = cached_generate_schedule(
+                random.sample(day_staff, len(day_staff)), backend=backend, samples=samples,
+                bypass_cache=bypass_cache, compact=compact,
+            )
+        except Exception as e:
+            out.error = str(e)
+            continue
+        out.raw = raw
+        if result and "assignments" in result:
+            out.result, out.cache_hit, out.error = result, hit, None
+            break
+        out.error = "Could not parse a schedule from the response"
+
+    if out.result is not None and auto_repair and score_schedule(out.result):
+        out.repair = repair_schedule(out.result["assignments"])
+        out.result = {**out.result, "assignments": out.repair["assignments"]}
+    out.seconds = time.perf_counter() - started
+    return out
+
+
+def iter_days(
+    rosters: dict[str, list[dict]], backend: str = "llm", samples: int = 1,
+    compact: bool = False, auto_repair: bool = True, bypass_cache: bool = False,
+    workers: int = WEEK_WORKERS, attempts: int = DAY_ATTEMPTS,
+) -> Iterator[DayResult]:
+    """Generate each labelled day roster concurrently, yielding each ``DayResult`` as it finishes."""
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="week") as pool:
+        futures = [
+            pool.submit(
+                _generate_day, label, day_staff, backend, samples, compact, auto_repair, bypass_cache, attempts,
+            )
+            for label, day_staff in rosters.items()
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def iter_week(schedule: list[dict], days: list[str] = DAYS, **kwargs) -> Iterator[DayResult]:
+    """Generate every weekday of ``schedule`` concurrently, yielding each ``DayResult`` as it finishes."""
+    return iter_days({day: [s for s in schedule if s["day"] == day] for day in days}, **kwargs)
+
+
+def generate_week(schedule: list[dict], days: list[str] = DAYS, **kwargs) -> dict[str, DayResult]:
+    """All days of the week, in ``days`` order."""
+    results = {r.day: r for r in iter_week(schedule, days, **kwargs)}
+    return {day: results[day] for day in days}